@@ -4,7 +4,25 @@ Optional Auth0 JWT validation for protecting routes.
 Set AUTH0_DOMAIN and AUTH0_AUDIENCE in .env to enable. Then use
   Depends(get_current_user)
 on any route that requires a valid Bearer token.
+
+Verification is cached at two levels:
+
+- One process-wide PyJWKClient holds Auth0's JWKS for
+  AUTH_JWKS_CACHE_TTL_SECONDS and refetches it when a token names an
+  unknown `kid` (key rotation). `refresh_jwks_loop` (started from the app
+  lifespan) refetches in the background so requests rarely wait on Auth0.
+  Signing keys are always looked up in the current set (no per-`kid`
+  cache), so a key Auth0 rotates out or revokes stops verifying once the
+  set is refreshed.
+- Tokens that verified successfully are remembered (keyed by SHA-256 of
+  the token) until their `exp`, so repeat requests skip the RSA check.
 """
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
 from typing import Annotated
 
 import jwt
@@ -13,7 +31,16 @@ from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jwt import PyJWKClient
 from pydantic import BaseModel
 
-from api.config import AUTH0_AUDIENCE, AUTH0_DOMAIN, AUTH_ENABLED
+from api.config import (
+    AUTH0_AUDIENCE,
+    AUTH0_DOMAIN,
+    AUTH_ENABLED,
+    AUTH_JWKS_CACHE_TTL_SECONDS,
+    AUTH_JWKS_REFRESH_SECONDS,
+    AUTH_TOKEN_CACHE_SIZE,
+)
+
+logger = logging.getLogger(__name__)
 
 security = HTTPBearer(auto_error=False)
 
@@ -29,11 +56,94 @@ class UserClaims(BaseModel):
         return self.sub
 
 
+_jwks_client: PyJWKClient | None = None
+_jwks_lock = threading.Lock()
+
+
 def _get_jwks_client() -> PyJWKClient:
+    """Process-wide JWKS client (created once, shared by all requests)."""
+    global _jwks_client
     if not AUTH_ENABLED:
         raise RuntimeError("Auth not configured (set AUTH0_DOMAIN and AUTH0_AUDIENCE)")
-    url = f"https://{AUTH0_DOMAIN}/.well-known/jwks.json"
-    return PyJWKClient(url)
+    if _jwks_client is None:
+        with _jwks_lock:
+            if _jwks_client is None:
+                _jwks_client = PyJWKClient(
+                    f"https://{AUTH0_DOMAIN}/.well-known/jwks.json",
+                    cache_jwk_set=True,
+                    lifespan=AUTH_JWKS_CACHE_TTL_SECONDS,
+                    # No per-kid LRU: it would outlive refreshes of the set
+                    cache_keys=False,
+                    timeout=10,
+                )
+    return _jwks_client
+
+
+async def refresh_jwks_loop() -> None:
+    """Fetch the JWKS at startup and then every AUTH_JWKS_REFRESH_SECONDS."""
+    if not AUTH_ENABLED:
+        return
+    client = _get_jwks_client()
+    while True:
+        try:
+            await asyncio.to_thread(client.get_jwk_set, True)
+        except Exception:
+            # Requests fall back to fetching on demand; try again next round
+            logger.warning("JWKS refresh from %s failed", AUTH0_DOMAIN, exc_info=True)
+        await asyncio.sleep(AUTH_JWKS_REFRESH_SECONDS)
+
+
+class _VerifiedTokenCache:
+    """LRU of already-verified tokens: sha256(token) → (exp, claims)."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._data: OrderedDict[bytes, tuple[float, UserClaims]] = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> UserClaims | None:
+        key = self._key(token)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                if entry[0] > time.time():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, token: str, exp: float | None, claims: UserClaims) -> None:
+        # Tokens without exp are never cached; Auth0 access tokens always carry one
+        if self.maxsize <= 0 or not exp:
+            return
+        key = self._key(token)
+        with self._lock:
+            self._data[key] = (float(exp), claims)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+token_cache = _VerifiedTokenCache(AUTH_TOKEN_CACHE_SIZE)
 
 
 def get_current_user(
@@ -52,6 +162,9 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     token = credentials.credentials
+    cached = token_cache.get(token)
+    if cached is not None:
+        return cached
     try:
         jwks_client = _get_jwks_client()
         signing_key = jwks_client.get_signing_key_from_jwt(token)
@@ -62,18 +175,26 @@ def get_current_user(
             audience=AUTH0_AUDIENCE,
             issuer=f"https://{AUTH0_DOMAIN}/",
         )
-        return UserClaims(
+        claims = UserClaims(
             sub=payload.get("sub", ""),
             scope=payload.get("scope"),
             permissions=payload.get("permissions"),
         )
+        token_cache.put(token, payload.get("exp"), claims)
+        return claims
+    except jwt.PyJWKClientConnectionError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Could not fetch signing keys",
+        )
     except jwt.ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token expired",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    except jwt.InvalidTokenError:
+    except (jwt.InvalidTokenError, jwt.PyJWKClientError):
+        # PyJWKClientError: token names a key Auth0 does not publish
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token",
@@ -15,14 +15,46 @@ MONGODB_URI = os.getenv(
     os.getenv("MONGODB_LOCAL_URI", "mongodb://localhost:27017/wapow-data"),
 )
 MONGODB_DB_NAME = "wapow-data"
+# Connection pool (per API process) and timeouts, all in milliseconds
+MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", "32"))
+MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", "2"))
+MONGODB_MAX_IDLE_TIME_MS = int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", "300000"))
+MONGODB_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS", "2000"))
+MONGODB_CONNECT_TIMEOUT_MS = int(os.getenv("MONGODB_CONNECT_TIMEOUT_MS", "5000"))
+MONGODB_SOCKET_TIMEOUT_MS = int(os.getenv("MONGODB_SOCKET_TIMEOUT_MS", "15000"))
+MONGODB_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+# Read preference for read-only content endpoints (articles, videos, podcasts, stories).
+# Writes and per-user reads (comments, saves, users) always use the primary with w=majority.
+MONGODB_CONTENT_READ_PREFERENCE = os.getenv("MONGODB_CONTENT_READ_PREFERENCE", "secondaryPreferred")
+# List endpoint totals (see api/services/totals.py): fresh for TTL, then served
+# while a background recount runs, until MAX_AGE
+TOTALS_CACHE_SIZE = int(os.getenv("TOTALS_CACHE_SIZE", "1000"))
+TOTALS_CACHE_TTL_SECONDS = float(os.getenv("TOTALS_CACHE_TTL_SECONDS", "60"))
+TOTALS_CACHE_MAX_AGE_SECONDS = float(os.getenv("TOTALS_CACHE_MAX_AGE_SECONDS", "900"))
+# Threads that run blocking pymongo calls for request handlers (see api/db/mongodb.run_db).
+# Each in-flight call holds one pooled connection, so this defaults to the pool size.
+MONGODB_EXECUTOR_WORKERS = int(os.getenv("MONGODB_EXECUTOR_WORKERS", str(MONGODB_MAX_POOL_SIZE)))
 
 # Redis
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# Redis only caches; keep calls short so an outage degrades to a cache miss
+REDIS_TIMEOUT_SECONDS = float(os.getenv("REDIS_TIMEOUT_SECONDS", "0.5"))
+# POST /api/recommendations responses (see api/services/recommendation_cache.py); 0 disables
+RECOMMENDATIONS_CACHE_TTL_SECONDS = int(os.getenv("RECOMMENDATIONS_CACHE_TTL_SECONDS", "900"))
 
 # Neo4j (default: local/Docker; set NEO4J_URI in .env for Aura or remote)
 NEO4J_URI = os.getenv("NEO4J_URI", "neo4j://localhost:7687")
 NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "wapow-neo4j")
+# One driver per API process; its pool is shared by every recommendations request
+NEO4J_MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", "50"))
+NEO4J_ACQUISITION_TIMEOUT_SECONDS = float(os.getenv("NEO4J_ACQUISITION_TIMEOUT_SECONDS", "5"))
+NEO4J_CONNECTION_TIMEOUT_SECONDS = float(os.getenv("NEO4J_CONNECTION_TIMEOUT_SECONDS", "5"))
+NEO4J_MAX_CONNECTION_LIFETIME_SECONDS = float(os.getenv("NEO4J_MAX_CONNECTION_LIFETIME_SECONDS", "3600"))
+# Pooled connections idle longer than this are pinged before reuse (Aura drops idle sockets)
+NEO4J_LIVENESS_CHECK_SECONDS = float(os.getenv("NEO4J_LIVENESS_CHECK_SECONDS", "60"))
+# Neighbours kept per user as precomputed (User)-[:SIMILAR_TO]->(User) edges
+NEO4J_SIMILAR_TOP_K = int(os.getenv("NEO4J_SIMILAR_TOP_K", "50"))
 
 # Server
 PORT = int(os.getenv("PORT", "3001"))
@@ -32,6 +64,11 @@ PORT = int(os.getenv("PORT", "3001"))
 AUTH0_DOMAIN = os.getenv("AUTH0_DOMAIN", "").rstrip("/")
 AUTH0_AUDIENCE = os.getenv("AUTH0_AUDIENCE", "")
 AUTH_ENABLED = bool(AUTH0_DOMAIN and AUTH0_AUDIENCE)
+# JWKS is cached for the TTL and refetched in the background every REFRESH seconds;
+# verified tokens are cached (up to TOKEN_CACHE_SIZE) until they expire
+AUTH_JWKS_CACHE_TTL_SECONDS = float(os.getenv("AUTH_JWKS_CACHE_TTL_SECONDS", "3600"))
+AUTH_JWKS_REFRESH_SECONDS = float(os.getenv("AUTH_JWKS_REFRESH_SECONDS", "900"))
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "4096"))
 
 # CORS: comma-separated origins for browsers (e.g. Vercel + custom domain).
 # Use * for local dev only; browsers disallow credentials with *.
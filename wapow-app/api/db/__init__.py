@@ -1,5 +1,15 @@
 """Database modules: MongoDB and Neo4j."""
-from .mongodb import get_client, get_db, get_collection
-from .neo4j_query import Neo4jQuery
+from .mongodb import get_client, get_db, get_read_db, get_collection, run_db
+from .neo4j_query import Neo4jQuery, check_connectivity, close_driver, get_driver
 
-__all__ = ["get_client", "get_db", "get_collection", "Neo4jQuery"]
+__all__ = [
+    "get_client",
+    "get_db",
+    "get_read_db",
+    "get_collection",
+    "run_db",
+    "Neo4jQuery",
+    "get_driver",
+    "close_driver",
+    "check_connectivity",
+]
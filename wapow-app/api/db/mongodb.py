@@ -1,11 +1,180 @@
-"""MongoDB connection and helpers."""
-from pymongo import MongoClient
+"""MongoDB connection and helpers.
+
+pymongo is synchronous. Request handlers must not call it directly from
+the event loop; wrap service calls in `run_db`, which runs them on a
+dedicated thread pool sized for the Mongo connection pool.
+
+Two handles share one client (and one connection pool):
+
+- `get_db()` — primary reads, `w="majority"` writes. Use for anything a
+  user just wrote or is about to write (comments, saves, users).
+- `get_read_db()` — read-only content, using
+  `MONGODB_CONTENT_READ_PREFERENCE` (secondary-preferred by default) so
+  feed traffic spreads across replica set members.
+"""
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from pymongo import MongoClient, monitoring
 from pymongo.database import Database
 from pymongo.collection import Collection
+from pymongo.read_preferences import (
+    Nearest,
+    Primary,
+    PrimaryPreferred,
+    Secondary,
+    SecondaryPreferred,
+)
+
+from api.config import (
+    MONGODB_CONNECT_TIMEOUT_MS,
+    MONGODB_CONTENT_READ_PREFERENCE,
+    MONGODB_DB_NAME,
+    MONGODB_EXECUTOR_WORKERS,
+    MONGODB_MAX_IDLE_TIME_MS,
+    MONGODB_MAX_POOL_SIZE,
+    MONGODB_MIN_POOL_SIZE,
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+    MONGODB_SOCKET_TIMEOUT_MS,
+    MONGODB_URI,
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+)
+
+T = TypeVar("T")
+
+_READ_PREFERENCES = {
+    "primary": Primary,
+    "primarypreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondarypreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """Per-server connection pool counters, fed by pymongo's pool events.
+
+    Events fire on whichever thread checks a connection out, so counters
+    are guarded by a lock and checkout wait time is measured per thread.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._servers: dict[str, dict[str, float]] = {}
+        self._local = threading.local()
+
+    def _server(self, address) -> dict[str, float]:
+        key = f"{address[0]}:{address[1]}"
+        server = self._servers.get(key)
+        if server is None:
+            server = self._servers[key] = {
+                "open": 0,
+                "checked_out": 0,
+                "wait_queue": 0,
+                "checkouts": 0,
+                "checkout_failures": 0,
+                "checkout_timeouts": 0,
+                "wait_ms_total": 0.0,
+                "wait_ms_max": 0.0,
+                "pool_clears": 0,
+            }
+        return server
+
+    def _waited_ms(self) -> float:
+        started = getattr(self._local, "started", None)
+        self._local.started = None
+        return (time.perf_counter() - started) * 1000 if started is not None else 0.0
+
+    # ── pool events ─────────────────────────────────────────────────────
+
+    def pool_created(self, event) -> None:
+        with self._lock:
+            self._server(event.address)
+
+    def pool_ready(self, event) -> None:
+        pass
+
+    def pool_cleared(self, event) -> None:
+        with self._lock:
+            self._server(event.address)["pool_clears"] += 1
+
+    def pool_closed(self, event) -> None:
+        pass
+
+    # ── connection events ───────────────────────────────────────────────
 
-from api.config import MONGODB_URI, MONGODB_DB_NAME
+    def connection_created(self, event) -> None:
+        with self._lock:
+            self._server(event.address)["open"] += 1
+
+    def connection_ready(self, event) -> None:
+        pass
+
+    def connection_closed(self, event) -> None:
+        with self._lock:
+            self._server(event.address)["open"] -= 1
+
+    def connection_check_out_started(self, event) -> None:
+        self._local.started = time.perf_counter()
+        with self._lock:
+            self._server(event.address)["wait_queue"] += 1
+
+    def connection_check_out_failed(self, event) -> None:
+        self._waited_ms()
+        with self._lock:
+            server = self._server(event.address)
+            server["wait_queue"] -= 1
+            server["checkout_failures"] += 1
+            if event.reason == monitoring.ConnectionCheckOutFailedReason.TIMEOUT:
+                server["checkout_timeouts"] += 1
+
+    def connection_checked_out(self, event) -> None:
+        waited = self._waited_ms()
+        with self._lock:
+            server = self._server(event.address)
+            server["wait_queue"] -= 1
+            server["checked_out"] += 1
+            server["checkouts"] += 1
+            server["wait_ms_total"] += waited
+            server["wait_ms_max"] = max(server["wait_ms_max"], waited)
+
+    def connection_checked_in(self, event) -> None:
+        with self._lock:
+            self._server(event.address)["checked_out"] -= 1
+
+    # ── reporting ───────────────────────────────────────────────────────
+
+    def snapshot(self) -> dict:
+        """Pool settings plus a copy of the counters for every server seen."""
+        with self._lock:
+            servers = {
+                key: {
+                    **server,
+                    "wait_ms_total": round(server["wait_ms_total"], 3),
+                    "wait_ms_max": round(server["wait_ms_max"], 3),
+                    "wait_ms_avg": round(server["wait_ms_total"] / server["checkouts"], 3)
+                    if server["checkouts"]
+                    else 0.0,
+                }
+                for key, server in self._servers.items()
+            }
+        return {
+            "max_pool_size": MONGODB_MAX_POOL_SIZE,
+            "min_pool_size": MONGODB_MIN_POOL_SIZE,
+            "wait_queue_timeout_ms": MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+            "executor_workers": MONGODB_EXECUTOR_WORKERS,
+            "servers": servers,
+        }
+
+
+pool_stats = PoolStats()
 
 _client: MongoClient | None = None
+_executor: ThreadPoolExecutor | None = None
 
 
 def get_client() -> MongoClient:
@@ -16,6 +185,14 @@ def get_client() -> MongoClient:
             authSource="admin",
             retryWrites=True,
             w="majority",
+            maxPoolSize=MONGODB_MAX_POOL_SIZE,
+            minPoolSize=MONGODB_MIN_POOL_SIZE,
+            maxIdleTimeMS=MONGODB_MAX_IDLE_TIME_MS,
+            waitQueueTimeoutMS=MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+            connectTimeoutMS=MONGODB_CONNECT_TIMEOUT_MS,
+            socketTimeoutMS=MONGODB_SOCKET_TIMEOUT_MS,
+            serverSelectionTimeoutMS=MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+            event_listeners=[pool_stats],
         )
     return _client
 
@@ -24,5 +201,35 @@ def get_db() -> Database:
     return get_client()[MONGODB_DB_NAME]
 
 
+def get_read_db() -> Database:
+    """Database handle for read-only content queries (may read from secondaries)."""
+    mode = _READ_PREFERENCES.get(MONGODB_CONTENT_READ_PREFERENCE.lower(), SecondaryPreferred)
+    return get_client().get_database(MONGODB_DB_NAME, read_preference=mode())
+
+
 def get_collection(name: str) -> Collection:
     return get_db()[name]
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=MONGODB_EXECUTOR_WORKERS,
+            thread_name_prefix="mongo",
+        )
+    return _executor
+
+
+async def run_db(fn: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+    """Run a blocking MongoDB call (usually a service function) off the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), functools.partial(fn, *args, **kwargs))
+
+
+def shutdown_executor() -> None:
+    """Stop the MongoDB thread pool. Call at app shutdown."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
@@ -1,39 +1,78 @@
-"""Neo4j query class for recommendations (from grapow)."""
-from neo4j import GraphDatabase
+"""Neo4j query class for recommendations (from grapow).
+
+Queries run on the async driver so they never block the event loop. The
+API shares one pooled driver per process (`get_driver`), created on
+first use and closed from the app lifespan with `close_driver`.
+
+Similar-user lookups read precomputed (User)-[:SIMILAR_TO]->(User) edges
+(see api/scripts/compute_user_similarity.py) and only compare against the
+whole graph for users whose neighbours have not been computed yet.
+"""
+from neo4j import AsyncDriver, AsyncGraphDatabase
 from typing import List, Dict, Any, Optional
 
-from api.config import NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD
+from api.config import (
+    NEO4J_ACQUISITION_TIMEOUT_SECONDS,
+    NEO4J_CONNECTION_TIMEOUT_SECONDS,
+    NEO4J_LIVENESS_CHECK_SECONDS,
+    NEO4J_MAX_CONNECTION_LIFETIME_SECONDS,
+    NEO4J_MAX_POOL_SIZE,
+    NEO4J_PASSWORD,
+    NEO4J_URI,
+    NEO4J_USER,
+)
 
+_driver: AsyncDriver | None = None
 
-class Neo4jQuery:
-    """
-    Neo4j query class focused on recommendations and data retrieval.
+
+def get_driver() -> AsyncDriver:
+    """Process-wide async Neo4j driver. Creating it does not connect; the pool fills on demand.
+
+    Only use it from the app's event loop.
     """
+    global _driver
+    if _driver is None:
+        _driver = AsyncGraphDatabase.driver(
+            NEO4J_URI,
+            auth=(NEO4J_USER, NEO4J_PASSWORD),
+            max_connection_pool_size=NEO4J_MAX_POOL_SIZE,
+            connection_acquisition_timeout=NEO4J_ACQUISITION_TIMEOUT_SECONDS,
+            connection_timeout=NEO4J_CONNECTION_TIMEOUT_SECONDS,
+            max_connection_lifetime=NEO4J_MAX_CONNECTION_LIFETIME_SECONDS,
+            liveness_check_timeout=NEO4J_LIVENESS_CHECK_SECONDS,
+        )
+    return _driver
 
-    def __init__(
-        self,
-        uri: str = NEO4J_URI,
-        user: str = NEO4J_USER,
-        password: str = NEO4J_PASSWORD,
-    ):
-        try:
-            self.driver = GraphDatabase.driver(uri, auth=(user, password))
-            with self.driver.session() as session:
-                session.run("RETURN 1")
-        except Exception as e:
-            raise RuntimeError(f"Failed to connect to Neo4j: {e}") from e
 
-    def close(self) -> None:
-        if self.driver:
-            self.driver.close()
+async def close_driver() -> None:
+    """Close the shared driver and its pool. Call at app shutdown."""
+    global _driver
+    if _driver is not None:
+        await _driver.close()
+        _driver = None
+
+
+async def check_connectivity() -> bool:
+    """Readiness probe: can the shared driver reach Neo4j right now?"""
+    try:
+        await get_driver().verify_connectivity()
+        return True
+    except Exception:
+        return False
+
+
+class Neo4jQuery:
+    """
+    Neo4j query class focused on recommendations and data retrieval.
 
-    def __enter__(self):
-        return self
+    Methods are coroutines; each opens its own session, so several may run
+    concurrently on one instance. Uses the shared driver unless one is given.
+    """
 
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        self.close()
+    def __init__(self, driver: AsyncDriver | None = None):
+        self.driver = driver or get_driver()
 
-    def find_similar_users_by_time(
+    async def find_similar_users_by_time(
         self,
         target_user_id: str,
         current_hour: int,
@@ -43,59 +82,92 @@ class Neo4jQuery:
         start_hour = (current_hour - time_window) % 24
         end_hour = (current_hour + time_window) % 24
 
-        with self.driver.session() as session:
+        async with self.driver.session() as session:
             if start_hour > end_hour:
                 hour_filter = f"h.hour >= {start_hour} OR h.hour <= {end_hour}"
             else:
                 hour_filter = f"h.hour >= {start_hour} AND h.hour <= {end_hour}"
 
+            # Precomputed neighbours (compute_user_similarity) that read in this window
             query = f"""
-            MATCH (target:User {{id: $target_user_id}})
-            MATCH (similar:User)-[:READS_AT]->(h:Hour)
-            WHERE {hour_filter} AND similar.id <> $target_user_id
-            OPTIONAL MATCH (target)-[:INTERESTED_IN]->(shared_cat:Category)<-[:INTERESTED_IN]-(similar)
-            OPTIONAL MATCH (target)-[:LIVES_IN]->(shared_loc:Location)<-[:LIVES_IN]-(similar)
-            OPTIONAL MATCH (target)-[:READS_AT]->(shared_hour:Hour)<-[:READS_AT]-(similar)
-            WITH similar,
-                count(DISTINCT shared_cat) as shared_categories,
-                count(DISTINCT shared_loc) as shared_locations,
-                count(DISTINCT shared_hour) as shared_hours,
-                (count(DISTINCT shared_cat) * 0.4 +
-                count(DISTINCT shared_loc) * 0.3 +
-                count(DISTINCT shared_hour) * 0.3) as similarity_score
-            WHERE similarity_score > 0
+            MATCH (target:User {{id: $target_user_id}})-[s:SIMILAR_TO]->(similar:User)
             MATCH (similar)-[r:READS_AT]->(h:Hour)
             WHERE {hour_filter}
             RETURN similar.id as user_id,
                 similar.name as name,
                 similar.age as age,
                 similar.location_preference as location,
-                similarity_score,
+                (s.shared_categories * 0.4 +
+                s.shared_locations * 0.3 +
+                s.shared_hours * 0.3) as similarity_score,
                 collect({{hour: h.hour, frequency: r.frequency}}) as time_overlap
             ORDER BY similarity_score DESC
             LIMIT {limit}
             """
-            result = session.run(query, target_user_id=target_user_id)
-            return [
-                {
-                    "user_id": record["user_id"],
-                    "name": record["name"],
-                    "age": record["age"],
-                    "location": record["location"],
-                    "similarity_score": round(record["similarity_score"], 4),
-                    "time_overlap": record["time_overlap"],
-                }
-                for record in result
-            ]
+            result = await session.run(query, target_user_id=target_user_id)
+            records = [record async for record in result]
+
+            if not records and not await self._has_similar_users(session, target_user_id):
+                # Not materialized yet (e.g. new user): compare against every user
+                query = f"""
+                MATCH (target:User {{id: $target_user_id}})
+                MATCH (similar:User)-[:READS_AT]->(h:Hour)
+                WHERE {hour_filter} AND similar.id <> $target_user_id
+                OPTIONAL MATCH (target)-[:INTERESTED_IN]->(shared_cat:Category)<-[:INTERESTED_IN]-(similar)
+                OPTIONAL MATCH (target)-[:LIVES_IN]->(shared_loc:Location)<-[:LIVES_IN]-(similar)
+                OPTIONAL MATCH (target)-[:READS_AT]->(shared_hour:Hour)<-[:READS_AT]-(similar)
+                WITH similar,
+                    count(DISTINCT shared_cat) as shared_categories,
+                    count(DISTINCT shared_loc) as shared_locations,
+                    count(DISTINCT shared_hour) as shared_hours,
+                    (count(DISTINCT shared_cat) * 0.4 +
+                    count(DISTINCT shared_loc) * 0.3 +
+                    count(DISTINCT shared_hour) * 0.3) as similarity_score
+                WHERE similarity_score > 0
+                MATCH (similar)-[r:READS_AT]->(h:Hour)
+                WHERE {hour_filter}
+                RETURN similar.id as user_id,
+                    similar.name as name,
+                    similar.age as age,
+                    similar.location_preference as location,
+                    similarity_score,
+                    collect({{hour: h.hour, frequency: r.frequency}}) as time_overlap
+                ORDER BY similarity_score DESC
+                LIMIT {limit}
+                """
+                result = await session.run(query, target_user_id=target_user_id)
+                records = [record async for record in result]
+
+        return [
+            {
+                "user_id": record["user_id"],
+                "name": record["name"],
+                "age": record["age"],
+                "location": record["location"],
+                "similarity_score": round(record["similarity_score"], 4),
+                "time_overlap": record["time_overlap"],
+            }
+            for record in records
+        ]
+
+    @staticmethod
+    async def _has_similar_users(session, user_id: str) -> bool:
+        """Have this user's SIMILAR_TO neighbours been computed (even if there are none)?"""
+        result = await session.run(
+            "MATCH (u:User {id: $user_id}) RETURN u.similar_updated_at IS NOT NULL AS ready",
+            user_id=user_id,
+        )
+        record = await result.single()
+        return bool(record and record["ready"])
 
-    def get_collaborative_recommendations(
+    async def get_collaborative_recommendations(
         self,
         target_user_id: str,
         current_hour: int,
         limit: int = 10,
         time_window: int = 2,
     ) -> Dict[str, Any]:
-        similar_users = self.find_similar_users_by_time(
+        similar_users = await self.find_similar_users_by_time(
             target_user_id, current_hour, time_window, limit=5
         )
         if not similar_users:
@@ -109,7 +181,7 @@ class Neo4jQuery:
             }
 
         similar_user_ids = [u["user_id"] for u in similar_users]
-        with self.driver.session() as session:
+        async with self.driver.session() as session:
             query = """
             MATCH (similar:User)-[r:READ]->(a:Article)
             WHERE similar.id IN $similar_user_ids
@@ -136,7 +208,7 @@ class Neo4jQuery:
             ORDER BY recommendation_score DESC, a.engagement_score DESC, a.pageviews DESC
             LIMIT $limit
             """
-            result = session.run(
+            result = await session.run(
                 query,
                 similar_user_ids=similar_user_ids,
                 target_user_id=target_user_id,
@@ -144,7 +216,7 @@ class Neo4jQuery:
             )
             recommendations = [
                 {"article_id": record["article_id"], "canonical_url": record["canonical_url"]}
-                for record in result
+                async for record in result
             ]
 
         return {
@@ -156,29 +228,26 @@ class Neo4jQuery:
             "total_recommendations": len(recommendations),
         }
 
-    def find_similar_users_by_category(
+    async def find_similar_users_by_category(
         self,
         target_user_id: str,
         target_category: str,
         limit: int = 10,
     ) -> List[Dict[str, Any]]:
-        with self.driver.session() as session:
+        async with self.driver.session() as session:
+            # Precomputed neighbours (compute_user_similarity) interested in the category
             query = """
-            MATCH (target:User {id: $target_user_id})
-            MATCH (similar:User)-[sir:INTERESTED_IN]->(target_cat:Category {name: $target_category})
-            WHERE similar.id <> $target_user_id
-            OPTIONAL MATCH (target)-[:INTERESTED_IN]->(shared_cat:Category)<-[:INTERESTED_IN]-(similar)
-            OPTIONAL MATCH (target)-[:LIVES_IN]->(shared_loc:Location)<-[:LIVES_IN]-(similar)
-            OPTIONAL MATCH (target)-[:READS_AT]->(shared_hour:Hour)<-[:READS_AT]-(similar)
-            WITH similar, sir.interest_weight as category_interest_weight,
-                count(DISTINCT shared_cat) as shared_categories,
-                count(DISTINCT shared_loc) as shared_locations,
-                count(DISTINCT shared_hour) as shared_hours,
-                (count(DISTINCT shared_cat) * 0.5 +
-                count(DISTINCT shared_loc) * 0.25 +
-                count(DISTINCT shared_hour) * 0.25 +
+            MATCH (target:User {id: $target_user_id})-[s:SIMILAR_TO]->(similar:User)
+            MATCH (similar)-[sir:INTERESTED_IN]->(:Category {name: $target_category})
+            WITH similar, s, sir.interest_weight as category_interest_weight,
+                (s.shared_categories * 0.5 +
+                s.shared_locations * 0.25 +
+                s.shared_hours * 0.25 +
                 sir.interest_weight * 0.3) as similarity_score
             WHERE similarity_score > 0
+            WITH similar, s, category_interest_weight, similarity_score
+            ORDER BY similarity_score DESC
+            LIMIT $limit
             MATCH (similar)-[ir:INTERESTED_IN]->(c:Category)
             RETURN similar.id as user_id,
                 similar.name as name,
@@ -187,43 +256,84 @@ class Neo4jQuery:
                 similarity_score,
                 category_interest_weight,
                 collect({category: c.name, weight: ir.interest_weight}) as all_interests,
-                shared_categories,
-                shared_locations,
-                shared_hours
+                s.shared_categories as shared_categories,
+                s.shared_locations as shared_locations,
+                s.shared_hours as shared_hours
             ORDER BY similarity_score DESC
-            LIMIT $limit
             """
-            result = session.run(
+            result = await session.run(
                 query,
                 target_user_id=target_user_id,
                 target_category=target_category,
                 limit=limit,
             )
-            return [
-                {
-                    "user_id": record["user_id"],
-                    "name": record["name"],
-                    "age": record["age"],
-                    "location": record["location"],
-                    "similarity_score": round(record["similarity_score"], 4),
-                    "category_interest_weight": record["category_interest_weight"],
-                    "all_interests": record["all_interests"],
-                    "shared_patterns": {
-                        "categories": record["shared_categories"],
-                        "locations": record["shared_locations"],
-                        "hours": record["shared_hours"],
-                    },
-                }
-                for record in result
-            ]
+            records = [record async for record in result]
+
+            if not records and not await self._has_similar_users(session, target_user_id):
+                # Not materialized yet (e.g. new user): compare against every user
+                query = """
+                MATCH (target:User {id: $target_user_id})
+                MATCH (similar:User)-[sir:INTERESTED_IN]->(target_cat:Category {name: $target_category})
+                WHERE similar.id <> $target_user_id
+                OPTIONAL MATCH (target)-[:INTERESTED_IN]->(shared_cat:Category)<-[:INTERESTED_IN]-(similar)
+                OPTIONAL MATCH (target)-[:LIVES_IN]->(shared_loc:Location)<-[:LIVES_IN]-(similar)
+                OPTIONAL MATCH (target)-[:READS_AT]->(shared_hour:Hour)<-[:READS_AT]-(similar)
+                WITH similar, sir.interest_weight as category_interest_weight,
+                    count(DISTINCT shared_cat) as shared_categories,
+                    count(DISTINCT shared_loc) as shared_locations,
+                    count(DISTINCT shared_hour) as shared_hours,
+                    (count(DISTINCT shared_cat) * 0.5 +
+                    count(DISTINCT shared_loc) * 0.25 +
+                    count(DISTINCT shared_hour) * 0.25 +
+                    sir.interest_weight * 0.3) as similarity_score
+                WHERE similarity_score > 0
+                MATCH (similar)-[ir:INTERESTED_IN]->(c:Category)
+                RETURN similar.id as user_id,
+                    similar.name as name,
+                    similar.age as age,
+                    similar.location_preference as location,
+                    similarity_score,
+                    category_interest_weight,
+                    collect({category: c.name, weight: ir.interest_weight}) as all_interests,
+                    shared_categories,
+                    shared_locations,
+                    shared_hours
+                ORDER BY similarity_score DESC
+                LIMIT $limit
+                """
+                result = await session.run(
+                    query,
+                    target_user_id=target_user_id,
+                    target_category=target_category,
+                    limit=limit,
+                )
+                records = [record async for record in result]
+
+        return [
+            {
+                "user_id": record["user_id"],
+                "name": record["name"],
+                "age": record["age"],
+                "location": record["location"],
+                "similarity_score": round(record["similarity_score"], 4),
+                "category_interest_weight": record["category_interest_weight"],
+                "all_interests": record["all_interests"],
+                "shared_patterns": {
+                    "categories": record["shared_categories"],
+                    "locations": record["shared_locations"],
+                    "hours": record["shared_hours"],
+                },
+            }
+            for record in records
+        ]
 
-    def get_category_collaborative_recommendations(
+    async def get_category_collaborative_recommendations(
         self,
         target_user_id: str,
         target_category: str,
         limit: int = 10,
     ) -> Dict[str, Any]:
-        similar_users = self.find_similar_users_by_category(
+        similar_users = await self.find_similar_users_by_category(
             target_user_id, target_category, limit=7
         )
         if not similar_users:
@@ -236,7 +346,7 @@ class Neo4jQuery:
             }
 
         similar_user_ids = [u["user_id"] for u in similar_users]
-        with self.driver.session() as session:
+        async with self.driver.session() as session:
             query = """
             MATCH (similar:User)-[r:READ]->(a:Article)
             WHERE similar.id IN $similar_user_ids
@@ -268,7 +378,7 @@ class Neo4jQuery:
             ORDER BY recommendation_score DESC, a.engagement_score DESC
             LIMIT $limit
             """
-            result = session.run(
+            result = await session.run(
                 query,
                 similar_user_ids=similar_user_ids,
                 target_user_id=target_user_id,
@@ -277,7 +387,7 @@ class Neo4jQuery:
             )
             recommendations = [
                 {"article_id": record["article_id"], "canonical_url": record["canonical_url"]}
-                for record in result
+                async for record in result
             ]
 
         return {
@@ -1,11 +1,16 @@
 """WAPOW API: FastAPI app combining MongoDB content API + Neo4j recommendations."""
+import asyncio
+import os
 from contextlib import asynccontextmanager
 
 from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from pymongo.errors import WaitQueueTimeoutError
 
 from api.config import PORT
-from api.db import get_client
+from api.db import check_connectivity, close_driver, get_client, get_driver, run_db
+from api.db.mongodb import pool_stats, shutdown_executor
 from api.routers import content as content_routers
 from api.routers.articles import router as articles_router
 from api.routers.stories import router as stories_router
@@ -20,20 +25,30 @@ from api.config import (
     VIDEO_COLLECTION,
     PODCAST_COLLECTION,
 )
-from api.auth import get_current_user, get_current_user_or_dev, UserClaims
+from api.auth import get_current_user, get_current_user_or_dev, refresh_jwks_loop, token_cache, UserClaims
 from api.services import user as user_service
+from api.services.pagination import InvalidCursor
+from api.services.recommendation_cache import recommendation_cache
+from api.services.totals import totals_cache
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: ensure MongoDB client is created
+    # Startup: ensure MongoDB client and the shared Neo4j driver are created
     get_client()
+    get_driver()
     from api.services import comments as comments_service
-    user_service.ensure_indexes()
-    comments_service.ensure_indexes()
-    
+    await run_db(user_service.ensure_indexes)
+    await run_db(comments_service.ensure_indexes)
+    jwks_refresh = asyncio.create_task(refresh_jwks_loop())
+
     yield
 
+    jwks_refresh.cancel()
+    shutdown_executor()
+    await close_driver()
+    await recommendation_cache.close()
+
 
 app = FastAPI(
     title="WAPOW API",
@@ -50,6 +65,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.exception_handler(WaitQueueTimeoutError)
+async def _mongo_pool_exhausted(request: Request, exc: WaitQueueTimeoutError):
+    # Every pooled connection stayed busy for MONGODB_WAIT_QUEUE_TIMEOUT_MS
+    return JSONResponse(
+        {"success": False, "error": "database busy, retry shortly"},
+        status_code=503,
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.exception_handler(InvalidCursor)
+async def _invalid_cursor(request: Request, exc: InvalidCursor):
+    return JSONResponse({"success": False, "error": str(exc)}, status_code=400)
+
+
 # Content routers for videos and podcasts (separate collections)
 app.include_router(
     content_routers._make_router(VIDEO_COLLECTION, "Video", is_video=True, is_podcast=False),
@@ -86,6 +117,7 @@ async def root():
             "saved_articles": "GET/POST/DELETE /api/saved-articles (save/list/unsave)",
             "comments": "GET/POST/DELETE /api/comments (list/create/delete/vote)",
             "article_get": "GET /api/articles/{id}",
+            "stats": "GET /stats (MongoDB pool usage for this process)",
         },
         "database": "wapo_data (MongoDB) + Neo4j",
         "auth": "enabled" if AUTH_ENABLED else "disabled (set AUTH0_DOMAIN and AUTH0_AUDIENCE to enable)",
@@ -96,13 +128,29 @@ async def root():
 async def health():
     try:
         client = get_client()
-        client.admin.command("ping")
+        await run_db(client.admin.command, "ping")
         db_status = "Connected"
     except Exception:
         db_status = "Disconnected"
+    neo4j_ok = await check_connectivity()
     return {
         "status": "OK",
         "database": db_status,
+        "neo4j": "Connected" if neo4j_ok else "Disconnected",
+    }
+
+
+@app.get("/stats")
+async def stats():
+    """Connection pool and cache usage for this API process (one of each per worker)."""
+    return {
+        "pid": os.getpid(),
+        "mongodb": pool_stats.snapshot(),
+        "caches": {
+            "totals": totals_cache.stats(),
+            "verified_tokens": token_cache.stats(),
+            "recommendations": recommendation_cache.stats(),
+        },
     }
 
 
@@ -117,7 +165,7 @@ async def test_json(request: Request):
 @app.get("/api/me", response_model=dict)
 async def me(user: UserClaims = Depends(get_current_user_or_dev)):
     """Current user from JWT. Upserts user document in MongoDB on every call."""
-    doc = user_service.get_or_create_user(user_id=user.user_id)
+    doc = await run_db(user_service.get_or_create_user, user_id=user.user_id)
     return {
         "_id": doc.get("_id"),
         "user_id": user.user_id,
@@ -4,9 +4,17 @@ from typing import Optional
 from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
 
-from api.db import get_db
+from api.db import get_read_db, run_db
 from api.config import ALL_COLLECTIONS, ARTICLE_CATEGORIES, ARTICLES_COLLECTION
-from api.services.content import _transform_content_item, _transform_video_item, _transform_podcast_item
+from api.services.content import (
+    ListView,
+    _transform_content_item,
+    _transform_podcast_item,
+    _transform_video_item,
+    card_projection,
+)
+from api.services.pagination import split_page, with_cursor
+from api.services.totals import count_total
 from bson import ObjectId
 
 router = APIRouter(prefix="/articles", tags=["articles"])
@@ -37,7 +45,7 @@ def _transform_item(item: dict, collection: str) -> dict:
 
 
 def _find_article_doc(article_id: str) -> dict | None:
-    db = get_db()
+    db = get_read_db()
     coll = db[ARTICLES_COLLECTION]
     try:
         oid = ObjectId(article_id)
@@ -57,6 +65,57 @@ def _find_article_doc(article_id: str) -> dict | None:
     return doc
 
 
+def _list_articles_page(
+    query: dict,
+    sort_spec: list[tuple[str, int]],
+    page: int,
+    limit: int,
+    cursor: str | None = None,
+    include_total: bool = True,
+    view: ListView = "full",
+) -> tuple[list[dict], int | None, bool | None, str | None]:
+    """Blocking page fetch (articles + story slides); run via run_db.
+
+    Returns (items, total, total_exact, next_cursor); `cursor` takes
+    precedence over `page`. The card view projects to tile fields and
+    skips the story-slides join.
+    """
+    db = get_read_db()
+    coll = db[ARTICLES_COLLECTION]
+
+    projection = None
+    if view == "card":
+        projection = card_projection("content", [field for field, _ in sort_spec])
+    find = coll.find(with_cursor(query, sort_spec, cursor), projection).sort(sort_spec)
+    if not cursor:
+        find = find.skip((page - 1) * limit)
+    items, next_cursor = split_page(list(find.limit(limit + 1)), limit, sort_spec)
+    total, total_exact = count_total(coll, query) if include_total else (None, None)
+    if view == "card":
+        return [_transform_content_item(item) for item in items], total, total_exact, next_cursor
+
+    # Fetch matching story slides in a single batch query to avoid N+1 query overhead
+    item_ids = [item["_id"] for item in items]
+    slides_cursor = db["story_slides"].find({"article_id": {"$in": item_ids}})
+    slides_map = {}
+    for s in slides_cursor:
+        art_id = s.get("article_id")
+        if art_id:
+            slides_map[str(art_id)] = s
+
+    for item in items:
+        str_id = str(item["_id"])
+        if str_id in slides_map:
+            slides = slides_map[str_id]
+            item["ai_summary"] = {
+                "pages": slides.get("pages"),
+                "generation_timestamp": slides.get("generation_timestamp"),
+                "llm_model_used": slides.get("llm_model_used"),
+            }
+
+    return [_transform_content_item(item) for item in items], total, total_exact, next_cursor
+
+
 @router.get("/")
 async def list_articles(
     category: Optional[str] = Query(None, description="Filter by category (e.g. sports, technology)"),
@@ -64,11 +123,11 @@ async def list_articles(
     limit: int = Query(100, ge=1, le=500),
     sort_by: str = Query("created_date"),
     sort_order: str = Query("desc"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; replaces page"),
+    include_total: bool = Query(True, description="Include a (possibly cached, approximate) total; see total_exact"),
+    view: ListView = Query("full", description="card: tile fields only, no body or story slides"),
 ):
     """List articles from the unified articles collection, optionally filtered by category."""
-    db = get_db()
-    coll = db[ARTICLES_COLLECTION]
-
     query: dict = {}
     if category:
         query["category"] = category
@@ -84,54 +143,24 @@ async def list_articles(
     # tiebreaker. Without it, skip/limit pages overlap and return duplicate articles.
     sort_spec = [(sort_field, sort_dir), ("_id", sort_dir)]
 
-    skip = (page - 1) * limit
-    cursor = coll.find(query).sort(sort_spec).skip(skip).limit(limit)
-    items = list(cursor)
-    total = coll.count_documents(query)
-
-    # Fetch matching story slides in a single batch query to avoid N+1 query overhead
-    item_ids = [item["_id"] for item in items]
-    slides_cursor = db["story_slides"].find({"article_id": {"$in": item_ids}})
-    slides_map = {}
-    for s in slides_cursor:
-        art_id = s.get("article_id")
-        if art_id:
-            slides_map[str(art_id)] = s
-
-    for item in items:
-        str_id = str(item["_id"])
-        if str_id in slides_map:
-            slides = slides_map[str_id]
-            item["ai_summary"] = {
-                "pages": slides.get("pages"),
-                "generation_timestamp": slides.get("generation_timestamp"),
-                "llm_model_used": slides.get("llm_model_used"),
-            }
-
-    data = [_transform_content_item(item) for item in items]
+    data, total, total_exact, next_cursor = await run_db(
+        _list_articles_page, query, sort_spec, page, limit, cursor, include_total, view
+    )
 
     return {
         "success": True,
         "data": data,
         "total": total,
+        "total_exact": total_exact,
         "page": page,
         "limit": limit,
-        "pages": (total + limit - 1) // limit,
+        "pages": (total + limit - 1) // limit if total is not None else None,
+        "next_cursor": next_cursor,
     }
 
 
-@router.post("/by-ids")
-async def articles_by_ids(body: ArticlesByIdsBody):
-    """Fetch articles by IDs across articles (by category), videos, podcasts."""
-    ids = body.ids
-    if not ids:
-        raise HTTPException(
-            status_code=400,
-            detail="Please provide a list of IDs in the request body",
-        )
-    max_ids = 100
-    limited_ids = ids[:max_ids]
-
+def _fetch_by_ids(limited_ids: list[str]) -> tuple[list[dict], dict[str, list[dict]]]:
+    """Blocking cross-collection lookup for /by-ids; run via run_db."""
     id_list = []
     for i in limited_ids:
         try:
@@ -139,7 +168,7 @@ async def articles_by_ids(body: ArticlesByIdsBody):
         except Exception:
             id_list.append(i)
 
-    db = get_db()
+    db = get_read_db()
     all_results = []
     grouped = {}
 
@@ -187,6 +216,23 @@ async def articles_by_ids(body: ArticlesByIdsBody):
             t["collection"] = key
             all_results.append(t)
 
+    return all_results, grouped
+
+
+@router.post("/by-ids")
+async def articles_by_ids(body: ArticlesByIdsBody):
+    """Fetch articles by IDs across articles (by category), videos, podcasts."""
+    ids = body.ids
+    if not ids:
+        raise HTTPException(
+            status_code=400,
+            detail="Please provide a list of IDs in the request body",
+        )
+    max_ids = 100
+    limited_ids = ids[:max_ids]
+
+    all_results, grouped = await run_db(_fetch_by_ids, limited_ids)
+
     summary = {k: len(v) for k, v in grouped.items()}
 
     return {
@@ -204,7 +250,7 @@ async def articles_by_ids(body: ArticlesByIdsBody):
 @router.get("/{article_id}")
 async def get_article(article_id: str):
     """Fetch a single article from the unified articles collection by _id."""
-    doc = _find_article_doc(article_id)
+    doc = await run_db(_find_article_doc, article_id)
     if not doc:
         raise HTTPException(status_code=404, detail="Article not found")
     data = _transform_content_item(doc)
@@ -3,6 +3,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel, Field
 
 from api.auth import UserClaims, get_current_user_or_dev
+from api.db import run_db
 from api.services import comments as comments_service
 
 router = APIRouter(prefix="/comments", tags=["comments"])
@@ -38,7 +39,8 @@ async def list_comments(
     user: UserClaims = Depends(get_current_user_or_dev),
 ):
     """List comments (with nested replies) for an article."""
-    items = comments_service.get_comments(
+    items = await run_db(
+        comments_service.get_comments,
         article_id=article_id,
         user_id=user.user_id,
         limit=limit,
@@ -51,7 +53,7 @@ async def comment_count(
     article_id: str = Query(..., description="Article/content ID"),
 ):
     """Get comment count for an article (no auth required)."""
-    count = comments_service.get_comment_count(article_id=article_id)
+    count = await run_db(comments_service.get_comment_count, article_id=article_id)
     return {"success": True, "count": count}
 
 
@@ -61,7 +63,8 @@ async def create_comment(
     user: UserClaims = Depends(get_current_user_or_dev),
 ):
     """Create a comment or reply."""
-    doc = comments_service.create_comment(
+    doc = await run_db(
+        comments_service.create_comment,
         user_id=user.user_id,
         user_name=body.user_name or "Anonymous",
         user_picture=body.user_picture,
@@ -78,7 +81,8 @@ async def delete_comment(
     user: UserClaims = Depends(get_current_user_or_dev),
 ):
     """Delete own comment (and its replies)."""
-    removed = comments_service.delete_comment(
+    removed = await run_db(
+        comments_service.delete_comment,
         comment_id=comment_id,
         user_id=user.user_id,
     )
@@ -102,7 +106,8 @@ async def vote_comment(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="vote must be 'up', 'down', or null",
         )
-    updated = comments_service.vote_comment(
+    updated = await run_db(
+        comments_service.vote_comment,
         comment_id=comment_id,
         user_id=user.user_id,
         vote=body.vote,
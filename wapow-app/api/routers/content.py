@@ -2,7 +2,9 @@
 from fastapi import APIRouter, Query, HTTPException
 from pydantic import BaseModel
 
+from api.db import run_db
 from api.services.content import (
+    ListView,
     get_collection,
     list_items,
     get_by_id,
@@ -36,8 +38,12 @@ def _make_router(collection_name: str, model_name: str, is_video: bool = False,
         search: str | None = None,
         sortBy: str = Query("created_date", alias="sortBy"),
         sortOrder: str = Query("desc", alias="sortOrder"),
+        cursor: str | None = Query(None, description="nextCursor from the previous page; replaces page"),
+        includeTotal: bool = Query(True, alias="includeTotal"),
+        view: ListView = Query("full", description="card: tile fields only instead of whole documents"),
     ):
-        items, total = list_items(
+        items, total, total_exact, next_cursor = await run_db(
+            list_items,
             collection_name,
             page=page,
             limit=limit,
@@ -47,36 +53,41 @@ def _make_router(collection_name: str, model_name: str, is_video: bool = False,
             sort_order=sortOrder,
             is_video=is_video,
             is_podcast=is_podcast,
+            cursor=cursor,
+            include_total=includeTotal,
+            view=view,
         )
         return {
             "success": True,
             "data": items,
             "pagination": {
                 "currentPage": page,
-                "totalPages": (total + limit - 1) // limit if limit else 0,
+                "totalPages": (total + limit - 1) // limit if total is not None else None,
                 "totalItems": total,
+                "totalExact": total_exact,
                 "itemsPerPage": limit,
+                "nextCursor": next_cursor,
             },
         }
 
     @router.get("/meta/categories")
     async def meta_categories():
-        data = get_categories(collection_name)
+        data = await run_db(get_categories, collection_name)
         return {"success": True, "data": data}
 
     @router.get("/meta/stats")
     async def meta_stats():
-        data = get_stats(collection_name)
+        data = await run_db(get_stats, collection_name)
         return {"success": True, "data": data}
 
     @router.get("/meta/authors")
     async def meta_authors():
-        data = get_authors(collection_name)
+        data = await run_db(get_authors, collection_name)
         return {"success": True, "data": data}
 
     @router.get("/{id}")
     async def get_item(id: str):
-        item = get_by_id(collection_name, id)
+        item = await run_db(get_by_id, collection_name, id)
         if item is None:
             raise HTTPException(status_code=404, detail=f"{model_name} item not found")
         return {"success": True, "data": item}
@@ -89,7 +100,8 @@ def _make_router(collection_name: str, model_name: str, is_video: bool = False,
                 status_code=400,
                 detail="Please provide a list of IDs in the request body",
             )
-        items, requested, returned, limited = get_by_ids(
+        items, requested, returned, limited = await run_db(
+            get_by_ids,
             collection_name,
             ids,
             transform_content=True,
@@ -1,10 +1,13 @@
 """Neo4j-based recommendations API (from grapow)."""
+import asyncio
 from datetime import datetime
 from fastapi import APIRouter, HTTPException
+from neo4j.exceptions import ServiceUnavailable, SessionExpired
 
 from pydantic import BaseModel, Field
 
 from api.db import Neo4jQuery
+from api.services.recommendation_cache import recommendation_cache
 
 router = APIRouter(prefix="/recommendations", tags=["recommendations"])
 
@@ -37,6 +40,8 @@ async def recommendations_info():
 async def get_recommendations(req: RecommendationsRequest):
     """
     Get category-based and time-based collaborative filtering recommendations from Neo4j.
+
+    Responses are cached in Redis per (user, category, hour, time_window, limit).
     """
     current_hour = req.current_hour
     if current_hour is None:
@@ -44,34 +49,61 @@ async def get_recommendations(req: RecommendationsRequest):
     if not (0 <= current_hour <= 23):
         raise HTTPException(status_code=400, detail="current_hour must be between 0-23")
 
-    try:
-        with Neo4jQuery() as db_query:
-            category_result = db_query.get_category_collaborative_recommendations(
-                target_user_id=req.user_id,
-                target_category=req.category,
-                limit=req.limit,
-            )
-            category_recommendations = category_result.get("recommendations", [])
+    cache_params = (req.user_id, req.category, current_hour, req.time_window, req.limit)
+    cached, cache_version = await recommendation_cache.get(*cache_params)
+    if cached is not None:
+        return cached
 
-            time_result = db_query.get_collaborative_recommendations(
-                target_user_id=req.user_id,
-                current_hour=current_hour,
-                limit=req.limit * 2,
-                time_window=req.time_window,
-            )
-            time_recommendations = time_result.get("recommendations", [])
-
-            category_article_ids = {rec["article_id"] for rec in category_recommendations}
-            general_recommendations = [
-                rec for rec in time_recommendations if rec["article_id"] not in category_article_ids
-            ][: req.limit]
-
-            return {
-                "user_id": req.user_id,
-                "category": req.category,
-                "category_recommendations": category_recommendations,
-                "general_recommendations": general_recommendations,
-                "status": "success",
-            }
+    try:
+        result = await _compute_recommendations(req, current_hour)
+    except (ServiceUnavailable, SessionExpired) as e:
+        raise HTTPException(status_code=503, detail=f"Recommendations unavailable: {e}") from e
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Recommendations error: {str(e)}") from e
+
+    await recommendation_cache.set(*cache_params, result, cache_version)
+    return result
+
+
+async def _compute_recommendations(req: RecommendationsRequest, current_hour: int) -> dict:
+    """Category and time-based branches run concurrently on the shared async driver.
+
+    If one branch fails the other is cancelled rather than left running, and
+    its error is re-raised as-is so the caller can map Neo4j outages to 503.
+    """
+    db_query = Neo4jQuery()
+    try:
+        async with asyncio.TaskGroup() as tg:
+            category_task = tg.create_task(
+                db_query.get_category_collaborative_recommendations(
+                    target_user_id=req.user_id,
+                    target_category=req.category,
+                    limit=req.limit,
+                )
+            )
+            time_task = tg.create_task(
+                db_query.get_collaborative_recommendations(
+                    target_user_id=req.user_id,
+                    current_hour=current_hour,
+                    limit=req.limit * 2,
+                    time_window=req.time_window,
+                )
+            )
+    except ExceptionGroup as eg:
+        raise eg.exceptions[0]
+    category_result, time_result = category_task.result(), time_task.result()
+    category_recommendations = category_result.get("recommendations", [])
+    time_recommendations = time_result.get("recommendations", [])
+
+    category_article_ids = {rec["article_id"] for rec in category_recommendations}
+    general_recommendations = [
+        rec for rec in time_recommendations if rec["article_id"] not in category_article_ids
+    ][: req.limit]
+
+    return {
+        "user_id": req.user_id,
+        "category": req.category,
+        "category_recommendations": category_recommendations,
+        "general_recommendations": general_recommendations,
+        "status": "success",
+    }
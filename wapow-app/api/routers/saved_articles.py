@@ -4,6 +4,7 @@ from fastapi import APIRouter, Depends
 from pydantic import BaseModel, Field
 
 from api.auth import UserClaims, get_current_user_or_dev
+from api.db import run_db
 from api.services import user as user_service
 
 router = APIRouter(prefix="/saved-articles", tags=["saved-articles"])
@@ -19,7 +20,7 @@ async def list_saved_article_ids(
     user: UserClaims = Depends(get_current_user_or_dev),
 ):
     """List saved article IDs (for quick lookup)."""
-    ids = user_service.get_saved_article_ids(user_id=user.user_id)
+    ids = await run_db(user_service.get_saved_article_ids, user_id=user.user_id)
     return {"success": True, "ids": list(ids)}
 
 
@@ -29,7 +30,8 @@ async def save_article(
     user: UserClaims = Depends(get_current_user_or_dev),
 ):
     """Save an article for the current user. Idempotent."""
-    doc = user_service.save_article(
+    doc = await run_db(
+        user_service.save_article,
         user_id=user.user_id,
         article_id=body.article_id,
         collection=body.collection,
@@ -43,7 +45,7 @@ async def unsave_article(
     user: UserClaims = Depends(get_current_user_or_dev),
 ):
     """Remove a saved article."""
-    removed = user_service.unsave_article(user_id=user.user_id, article_id=article_id)
+    removed = await run_db(user_service.unsave_article, user_id=user.user_id, article_id=article_id)
     return {"success": True, "removed": removed}
 
 
@@ -53,5 +55,5 @@ async def list_saved_articles(
     user: UserClaims = Depends(get_current_user_or_dev),
 ):
     """List saved articles for the current user."""
-    items = user_service.get_saved_articles(user_id=user.user_id, limit=limit)
+    items = await run_db(user_service.get_saved_articles, user_id=user.user_id, limit=limit)
     return {"success": True, "data": items, "count": len(items)}
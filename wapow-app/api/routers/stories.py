@@ -4,6 +4,7 @@ from typing import Optional
 from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
 
+from api.db import run_db
 from api.services import stories as stories_service
 
 router = APIRouter(prefix="/stories", tags=["stories"])
@@ -20,21 +21,28 @@ async def list_stories(
     page: int = Query(1, ge=1),
     limit: int = Query(100, ge=1, le=500),
     sort_order: str = Query("desc"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; replaces page"),
+    include_total: bool = Query(True, description="Count matching stories"),
 ):
     """List canonical generated story decks."""
-    data, total = stories_service.list_stories(
+    data, total, total_exact, next_cursor = await run_db(
+        stories_service.list_stories,
         page=page,
         limit=limit,
         category=category,
         sort_order=sort_order,
+        cursor=cursor,
+        include_total=include_total,
     )
     return {
         "success": True,
         "data": data,
         "total": total,
+        "total_exact": total_exact,
         "page": page,
         "limit": limit,
-        "pages": (total + limit - 1) // limit,
+        "pages": (total + limit - 1) // limit if total is not None else None,
+        "next_cursor": next_cursor,
     }
 
 
@@ -45,7 +53,7 @@ async def stories_by_ids(body: StoriesByIdsBody):
         raise HTTPException(status_code=400, detail="Please provide a list of IDs")
 
     limited_ids = body.ids[:100]
-    data = stories_service.get_stories_by_ids(limited_ids)
+    data = await run_db(stories_service.get_stories_by_ids, limited_ids)
     return {
         "success": True,
         "data": data,
@@ -58,7 +66,7 @@ async def stories_by_ids(body: StoriesByIdsBody):
 @router.get("/{article_id}")
 async def get_story(article_id: str):
     """Fetch one canonical story deck by article ID."""
-    story = stories_service.get_story(article_id)
+    story = await run_db(stories_service.get_story, article_id)
     if not story:
         raise HTTPException(status_code=404, detail="Story not found")
     return {"success": True, "data": story}
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""Precompute each user's nearest neighbours as (User)-[:SIMILAR_TO]->(User) edges.
+
+Comparing a user against every other user (shared categories, locations
+and reading hours) is too expensive to do per recommendations request, so
+it is done here instead. For each user the top `NEO4J_SIMILAR_TOP_K`
+neighbours are stored as
+
+  (User)-[:SIMILAR_TO {score, shared_categories, shared_locations,
+                       shared_hours, updated_at}]->(User)
+
+and the user is stamped with `similar_updated_at`. Neighbours are ranked by
+`shared_categories * 0.4 + shared_locations * 0.3 + shared_hours * 0.3`;
+the request path re-scores the stored counts for its own weighting.
+
+`sync_clickhouse_to_neo4j` refreshes the users whose INTERESTED_IN or
+READS_AT edges changed after each run.
+Those users' outgoing edges are rebuilt; other users' edges pointing at
+them are only rebuilt by a full run, so schedule one periodically:
+
+    python -m api.scripts.compute_user_similarity               # all users
+    python -m api.scripts.compute_user_similarity --users 1 2   # just these
+
+Environment variables:
+    NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD  — Neo4j connection
+    NEO4J_SIMILAR_TOP_K                    — neighbours kept per user (default 50)
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+from typing import Iterable
+
+# Add project root to path so api.config imports work
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from neo4j import GraphDatabase
+from neo4j.exceptions import ClientError
+
+from api.config import NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, NEO4J_SIMILAR_TOP_K
+
+logger = logging.getLogger("compute_user_similarity")
+
+# Users refreshed per write transaction
+BATCH_SIZE = 200
+
+REFRESH_QUERY = """
+UNWIND $user_ids AS uid
+MATCH (u:User {id: uid})
+OPTIONAL MATCH (u)-[old:SIMILAR_TO]->()
+DELETE old
+WITH DISTINCT u
+SET u.similar_updated_at = datetime()
+WITH u
+MATCH (u)-[r1:INTERESTED_IN|LIVES_IN|READS_AT]->(x)<-[r2:INTERESTED_IN|LIVES_IN|READS_AT]-(v:User)
+WHERE v <> u AND type(r1) = type(r2)
+WITH u, v,
+    count(DISTINCT CASE WHEN type(r1) = 'INTERESTED_IN' THEN x END) AS shared_categories,
+    count(DISTINCT CASE WHEN type(r1) = 'LIVES_IN' THEN x END) AS shared_locations,
+    count(DISTINCT CASE WHEN type(r1) = 'READS_AT' THEN x END) AS shared_hours
+WITH u, v, shared_categories, shared_locations, shared_hours,
+    (shared_categories * 0.4 + shared_locations * 0.3 + shared_hours * 0.3) AS score
+ORDER BY score DESC, v.id
+WITH u, collect({
+    user: v,
+    score: score,
+    shared_categories: shared_categories,
+    shared_locations: shared_locations,
+    shared_hours: shared_hours
+})[..$top_k] AS neighbours
+UNWIND neighbours AS n
+WITH u, n, n.user AS v
+CREATE (u)-[s:SIMILAR_TO]->(v)
+SET s.score = n.score,
+    s.shared_categories = n.shared_categories,
+    s.shared_locations = n.shared_locations,
+    s.shared_hours = n.shared_hours,
+    s.updated_at = datetime()
+"""
+
+
+def get_neo4j_driver():
+    return GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+
+
+def ensure_schema(neo4j_driver) -> None:
+    """Index User.id so the request path starts from an index seek."""
+    with neo4j_driver.session() as session:
+        try:
+            session.run("CREATE INDEX user_id IF NOT EXISTS FOR (u:User) ON (u.id)").consume()
+        except ClientError as e:
+            # An existing uniqueness constraint already provides the index
+            logger.info("Skipping User.id index: %s", e.message)
+
+
+def refresh_similar_users(neo4j_driver, user_ids: Iterable[str], top_k: int = NEO4J_SIMILAR_TOP_K) -> int:
+    """Rebuild the SIMILAR_TO edges of `user_ids`. Returns the number of users processed."""
+    ids = sorted(set(user_ids))
+    with neo4j_driver.session() as session:
+        for start in range(0, len(ids), BATCH_SIZE):
+            batch = ids[start:start + BATCH_SIZE]
+            session.run(REFRESH_QUERY, user_ids=batch, top_k=top_k).consume()
+            logger.info("Refreshed similar users for %d/%d users", start + len(batch), len(ids))
+    return len(ids)
+
+
+def refresh_all(neo4j_driver, top_k: int = NEO4J_SIMILAR_TOP_K) -> int:
+    """Rebuild the SIMILAR_TO edges of every user."""
+    with neo4j_driver.session() as session:
+        result = session.run("MATCH (u:User) WHERE u.id IS NOT NULL RETURN u.id AS id")
+        user_ids = [record["id"] for record in result]
+    return refresh_similar_users(neo4j_driver, user_ids, top_k)
+
+
+def main(argv: list[str] | None = None):
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", nargs="+", metavar="USER_ID", help="only refresh these users")
+    parser.add_argument("--top-k", type=int, default=NEO4J_SIMILAR_TOP_K, help="neighbours kept per user")
+    args = parser.parse_args(argv)
+
+    neo4j_driver = get_neo4j_driver()
+    try:
+        ensure_schema(neo4j_driver)
+        if args.users:
+            count = refresh_similar_users(neo4j_driver, args.users, args.top_k)
+        else:
+            count = refresh_all(neo4j_driver, args.top_k)
+        logger.info("Similar users computed for %d users.", count)
+    finally:
+        neo4j_driver.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,8 @@
 Seed Neo4j with minimal graph data so recommendation endpoints return results.
 
 Creates: Locations, Hours, Categories, Articles, Users, and READ/INTERESTED_IN/
-READS_AT/LIVES_IN/BELONGS_TO/PEAKS_AT/VIEWED_IN relationships.
+READS_AT/LIVES_IN/BELONGS_TO/PEAKS_AT/VIEWED_IN relationships, then the
+precomputed SIMILAR_TO neighbours for every user.
 
 Run from project root:
   poetry run python -m api.scripts.seed_neo4j
@@ -21,6 +22,7 @@ if __name__ == "__main__":
 
 from neo4j import GraphDatabase
 from api.config import NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD
+from api.scripts.compute_user_similarity import ensure_schema, refresh_all
 
 
 def seed(driver):
@@ -148,7 +150,10 @@ def seed(driver):
                 )
             print(f"  User {uid}: {len(read_ids)} READ relationships")
         print("Created READ relationships (user -> article)")
-        print("\nDone. Try: POST /api/recommendations with body {\"user_id\": \"1\", \"category\": \"sports\"}")
+
+    ensure_schema(driver)
+    print(f"Computed similar users for {refresh_all(driver)} users")
+    print("\nDone. Try: POST /api/recommendations with body {\"user_id\": \"1\", \"category\": \"sports\"}")
 
 
 if __name__ == "__main__":
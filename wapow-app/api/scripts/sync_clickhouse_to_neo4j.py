@@ -8,6 +8,17 @@ Neo4j graph relationships:
   - (User)-[:INTERESTED_IN {weight}]->(Category)
   - (User)-[:READS_AT {frequency}]->(Hour)
 
+Afterwards the precomputed SIMILAR_TO neighbours of every user whose
+INTERESTED_IN or READS_AT edges changed in this run are rebuilt (see
+compute_user_similarity). Cached recommendations in Redis are invalidated
+for those users and for users whose READ edges changed. Rows that only
+restate an edge's current weight, frequency or engagement score do not
+count as a change, so users active in the sync window but without new
+engagement are left alone.
+
+Dwell time is read from the typed `events.dwell_time_ms` column that the
+collector fills at ingest (see migrations/002_typed_properties.sh).
+
 Run periodically (e.g. every 15 minutes via cron) or manually:
 
     python -m api.scripts.sync_clickhouse_to_neo4j
@@ -15,6 +26,7 @@ Run periodically (e.g. every 15 minutes via cron) or manually:
 Environment variables:
     CLICKHOUSE_HOST, CLICKHOUSE_PORT, CLICKHOUSE_DB  — ClickHouse connection
     NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD            — Neo4j connection
+    REDIS_URL                                        — recommendation cache
 """
 
 from __future__ import annotations
@@ -30,9 +42,12 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
 
 import clickhouse_connect
+import redis
 from neo4j import GraphDatabase
 
-from api.config import NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD
+from api.config import NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, REDIS_URL
+from api.scripts.compute_user_similarity import ensure_schema, refresh_similar_users
+from api.services.recommendation_cache import invalidate_users
 
 logging.basicConfig(
     level=logging.INFO,
@@ -59,8 +74,11 @@ def get_neo4j_driver():
 
 # ── Sync: user READ relationships ─────────────────────────────────────────────
 
-def sync_read_relationships(ch, neo4j_driver, since_hours: int = 24):
-    """Create/update (User)-[:READ]->(Article) relationships from views + dwell."""
+def sync_read_relationships(ch, neo4j_driver, since_hours: int = 24) -> set[str]:
+    """Create/update (User)-[:READ]->(Article) relationships from views + dwell.
+
+    Returns the ids of the users with a new edge or a changed engagement score.
+    """
     logger.info("Syncing READ relationships (last %d hours)...", since_hours)
 
     rows = ch.query(
@@ -71,10 +89,7 @@ def sync_read_relationships(ch, neo4j_driver, since_hours: int = 24):
             content_type,
             category,
             countIf(event_type = 'view') AS views,
-            sumIf(
-                toUInt64OrZero(JSONExtractString(properties, 'dwell_time_ms')),
-                event_type = 'dwell'
-            ) AS total_dwell_ms,
+            sumIf(toUInt64(dwell_time_ms), event_type = 'dwell') AS total_dwell_ms,
             countIf(event_type = 'like') AS likes,
             countIf(event_type = 'save') AS saves,
             countIf(event_type = 'share') AS shares
@@ -88,6 +103,7 @@ def sync_read_relationships(ch, neo4j_driver, since_hours: int = 24):
     )
 
     count = 0
+    users: set[str] = set()
     with neo4j_driver.session() as session:
         for row in rows.result_rows:
             user_id, content_id, content_type, category, views, dwell_ms, likes, saves, shares = row
@@ -99,12 +115,13 @@ def sync_read_relationships(ch, neo4j_driver, since_hours: int = 24):
             view_score = min(views / 3.0, 1.0)
             engagement = round(dwell_score * 0.5 + interaction_score * 0.3 + view_score * 0.2, 4)
 
-            session.run(
+            record = session.run(
                 """
                 MERGE (u:User {id: $user_id})
                 MERGE (a:Article {id: $content_id})
                 ON CREATE SET a.content_type = $content_type, a.category = $category
                 MERGE (u)-[r:READ]->(a)
+                WITH r, coalesce(r.engagement_score <> $engagement, true) AS changed
                 SET r.engagement_score = $engagement,
                     r.views = $views,
                     r.total_dwell_ms = $dwell_ms,
@@ -112,6 +129,7 @@ def sync_read_relationships(ch, neo4j_driver, since_hours: int = 24):
                     r.saves = $saves,
                     r.shares = $shares,
                     r.updated_at = datetime()
+                RETURN changed
                 """,
                 user_id=user_id,
                 content_id=content_id,
@@ -123,16 +141,22 @@ def sync_read_relationships(ch, neo4j_driver, since_hours: int = 24):
                 likes=likes,
                 saves=saves,
                 shares=shares,
-            )
+            ).single()
+            if record["changed"]:
+                users.add(user_id)
             count += 1
 
-    logger.info("Synced %d READ relationships", count)
+    logger.info("Synced %d READ relationships (%d users changed)", count, len(users))
+    return users
 
 
 # ── Sync: user INTERESTED_IN relationships ────────────────────────────────────
 
-def sync_category_interests(ch, neo4j_driver, since_hours: int = 168):
-    """Update (User)-[:INTERESTED_IN]->(Category) weights from real engagement."""
+def sync_category_interests(ch, neo4j_driver, since_hours: int = 168) -> set[str]:
+    """Update (User)-[:INTERESTED_IN]->(Category) weights from real engagement.
+
+    Returns the ids of the users with a new edge or a changed weight.
+    """
     logger.info("Syncing INTERESTED_IN relationships (last %d hours)...", since_hours)
 
     rows = ch.query(
@@ -142,10 +166,7 @@ def sync_category_interests(ch, neo4j_driver, since_hours: int = 168):
             category,
             count()                      AS event_count,
             uniq(content_id)             AS unique_content,
-            sumIf(
-                toUInt64OrZero(JSONExtractString(properties, 'dwell_time_ms')),
-                event_type = 'dwell'
-            ) AS total_dwell_ms
+            sumIf(toUInt64(dwell_time_ms), event_type = 'dwell') AS total_dwell_ms
         FROM events
         WHERE user_id != ''
           AND category != ''
@@ -156,6 +177,7 @@ def sync_category_interests(ch, neo4j_driver, since_hours: int = 168):
     )
 
     count = 0
+    users: set[str] = set()
     with neo4j_driver.session() as session:
         for row in rows.result_rows:
             user_id, category, event_count, unique_content, dwell_ms = row
@@ -165,16 +187,18 @@ def sync_category_interests(ch, neo4j_driver, since_hours: int = 168):
             depth = min(math.log1p(dwell_ms / 1000) / math.log1p(600), 1.0)
             weight = round(breadth * 0.4 + depth * 0.6, 4)
 
-            session.run(
+            record = session.run(
                 """
                 MERGE (u:User {id: $user_id})
                 MERGE (c:Category {name: $category})
                 MERGE (u)-[r:INTERESTED_IN]->(c)
+                WITH r, coalesce(r.weight <> $weight, true) AS changed
                 SET r.weight = $weight,
                     r.event_count = $event_count,
                     r.unique_content = $unique_content,
                     r.total_dwell_ms = $dwell_ms,
                     r.updated_at = datetime()
+                RETURN changed
                 """,
                 user_id=user_id,
                 category=category,
@@ -182,16 +206,22 @@ def sync_category_interests(ch, neo4j_driver, since_hours: int = 168):
                 event_count=event_count,
                 unique_content=unique_content,
                 dwell_ms=int(dwell_ms),
-            )
+            ).single()
+            if record["changed"]:
+                users.add(user_id)
             count += 1
 
-    logger.info("Synced %d INTERESTED_IN relationships", count)
+    logger.info("Synced %d INTERESTED_IN relationships (%d users changed)", count, len(users))
+    return users
 
 
 # ── Sync: user READS_AT time patterns ─────────────────────────────────────────
 
-def sync_reading_times(ch, neo4j_driver, since_hours: int = 168):
-    """Update (User)-[:READS_AT]->(Hour) patterns from real timestamps."""
+def sync_reading_times(ch, neo4j_driver, since_hours: int = 168) -> set[str]:
+    """Update (User)-[:READS_AT]->(Hour) patterns from real timestamps.
+
+    Returns the ids of the users with a new edge or a changed frequency.
+    """
     logger.info("Syncing READS_AT relationships (last %d hours)...", since_hours)
 
     rows = ch.query(
@@ -210,25 +240,46 @@ def sync_reading_times(ch, neo4j_driver, since_hours: int = 168):
     )
 
     count = 0
+    users: set[str] = set()
     with neo4j_driver.session() as session:
         for row in rows.result_rows:
             user_id, hour, frequency = row
 
-            session.run(
+            record = session.run(
                 """
                 MERGE (u:User {id: $user_id})
                 MERGE (h:Hour {hour: $hour})
                 MERGE (u)-[r:READS_AT]->(h)
+                WITH r, coalesce(r.frequency <> $frequency, true) AS changed
                 SET r.frequency = $frequency,
                     r.updated_at = datetime()
+                RETURN changed
                 """,
                 user_id=user_id,
                 hour=int(hour),
                 frequency=int(frequency),
-            )
+            ).single()
+            if record["changed"]:
+                users.add(user_id)
             count += 1
 
-    logger.info("Synced %d READS_AT relationships", count)
+    logger.info("Synced %d READS_AT relationships (%d users changed)", count, len(users))
+    return users
+
+
+# ── Recommendation cache ──────────────────────────────────────────────────────
+
+def invalidate_recommendations(user_ids: set[str]):
+    """Drop cached recommendations for users whose graph edges changed."""
+    client = redis.Redis.from_url(REDIS_URL)
+    try:
+        count = invalidate_users(client, user_ids)
+        logger.info("Invalidated cached recommendations for %d users", count)
+    except redis.RedisError:
+        # Cached entries still expire on their TTL; the graph is already synced
+        logger.warning("Could not invalidate cached recommendations", exc_info=True)
+    finally:
+        client.close()
 
 
 # ── Main ──────────────────────────────────────────────────────────────────────
@@ -240,9 +291,15 @@ def main():
     neo4j_driver = get_neo4j_driver()
 
     try:
-        sync_read_relationships(ch, neo4j_driver, since_hours=24)
-        sync_category_interests(ch, neo4j_driver, since_hours=168)
-        sync_reading_times(ch, neo4j_driver, since_hours=168)
+        read_changed = sync_read_relationships(ch, neo4j_driver, since_hours=24)
+        # Only these edges feed SIMILAR_TO
+        changed = sync_category_interests(ch, neo4j_driver, since_hours=168)
+        changed |= sync_reading_times(ch, neo4j_driver, since_hours=168)
+
+        ensure_schema(neo4j_driver)
+        logger.info("Refreshing similar users for %d changed users...", len(changed))
+        refresh_similar_users(neo4j_driver, changed)
+        invalidate_recommendations(read_changed | changed)
         logger.info("Sync complete.")
     finally:
         ch.close()
@@ -1,11 +1,89 @@
 """Content service: shared MongoDB query logic for all collections."""
-from typing import Any
+from typing import Any, Literal
 
 from bson import ObjectId
 from pymongo.collection import Collection
 
-from api.db import get_db
+from api.db import get_read_db
 from api.config import ARTICLE_CATEGORIES, ARTICLES_COLLECTION
+from api.services.pagination import split_page, with_cursor
+from api.services.totals import count_total
+
+
+# "full" returns whole documents; "card" projects to what a grid/list tile renders
+ListView = Literal["full", "card"]
+
+# Fields each transform reads (and clients use on tiles). `_id` is always returned.
+_CARD_FIELDS: dict[str, list[str]] = {
+    "content": [
+        "headlines.basic",
+        "title",
+        "description",
+        "credits.by.name",
+        "author",
+        "lead_art.url",
+        "promo_items.basic.url",
+        "promo_items.basic.focal_point",
+        "imageUrl",
+        "category",
+        "taxonomy.primary_section.name",
+        "tracking.video_section",
+        "additional_properties.series_meta.name",
+        "publish_date",
+        "created_date",
+        "canonical_url",
+        "website_url",
+        "type",
+        "isActive",
+    ],
+    "video": [
+        "tracking.page_title",
+        "tracking.av_name",
+        "tracking.video_section",
+        "tracking.video_category",
+        "title",
+        "promo_image.url",
+        "imageUrl",
+        "category",
+        "duration",
+        "aspect_ratio",
+        "canonical_url",
+        "content_id",
+        "streams",
+        "created_date",
+        "isActive",
+    ],
+    "podcast": [
+        "additional_properties.page_title",
+        "additional_properties.description",
+        "additional_properties.lead_art.url",
+        "additional_properties.audio_article_raw_url",
+        "additional_properties.audio",
+        "title",
+        "imageUrl",
+        "audioUrl",
+        "thumbnail",
+        "promo_items.basic.url",
+        "created_date",
+        "isActive",
+    ],
+}
+
+
+def card_projection(kind: str, extra_fields: list[str] = ()) -> dict[str, int]:
+    """MongoDB projection for the card view of `kind` (content/video/podcast).
+
+    `extra_fields` (e.g. sort keys needed for cursors) are merged in without
+    creating parent/child path collisions, which MongoDB rejects.
+    """
+    projection = {field: 1 for field in _CARD_FIELDS[kind]}
+    for field in extra_fields:
+        if any(field == key or field.startswith(key + ".") for key in projection):
+            continue
+        for key in [key for key in projection if key.startswith(field + ".")]:
+            del projection[key]
+        projection[field] = 1
+    return projection
 
 
 def _serialize_doc(doc: dict) -> dict:
@@ -113,10 +191,13 @@ def _transform_podcast_item(item: dict) -> dict:
 
 
 def get_collection(collection_name: str) -> Collection:
-    """Return MongoDB collection. Article categories use the unified 'articles' collection."""
+    """Return MongoDB collection for read-only content queries.
+
+    Article categories use the unified 'articles' collection.
+    """
     if collection_name in ARTICLE_CATEGORIES:
-        return get_db()[ARTICLES_COLLECTION]
-    return get_db()[collection_name]
+        return get_read_db()[ARTICLES_COLLECTION]
+    return get_read_db()[collection_name]
 
 
 def list_items(
@@ -129,8 +210,20 @@ def list_items(
     sort_order: str = "desc",
     is_video: bool = False,
     is_podcast: bool = False,
-) -> tuple[list[dict], int]:
-    """Query collection with filters, sort, pagination. Returns (items, total)."""
+    cursor: str | None = None,
+    include_total: bool = True,
+    view: ListView = "full",
+) -> tuple[list[dict], int | None, bool | None, str | None]:
+    """Query collection with filters, sort, pagination.
+
+    `view="card"` fetches only the fields a list tile needs (see
+    `card_projection`) instead of whole documents.
+
+    Returns (items, total, total_exact, next_cursor). With `cursor` the page
+    is read by keyset after that position and `page` is ignored. Totals come
+    from the totals cache (see totals.py); both are None when `include_total`
+    is False. Raises pagination.InvalidCursor for a bad token.
+    """
     coll = get_collection(collection_name)
     query: dict[str, Any] = {}
 
@@ -170,20 +263,26 @@ def list_items(
     sort_spec: list[tuple[str, int]] = [(sort_field, sort_dir)]
     if sort_field not in ("created_date", "publish_date"):
         sort_spec.append(("created_date", -1))
-
-    skip = (page - 1) * limit
-    cursor = coll.find(query).sort(sort_spec).skip(skip).limit(limit)
-    items = list(cursor)
-    total = coll.count_documents(query)
+    # Unique tiebreaker: keeps pages disjoint and makes the cursor key unambiguous
+    sort_spec.append(("_id", sort_dir))
 
     if is_podcast:
-        transform = _transform_podcast_item
+        kind, transform = "podcast", _transform_podcast_item
     elif is_video:
-        transform = _transform_video_item
+        kind, transform = "video", _transform_video_item
     else:
-        transform = _transform_content_item
-
-    return [transform(i) for i in items], total
+        kind, transform = "content", _transform_content_item
+    projection = None
+    if view == "card":
+        projection = card_projection(kind, [field for field, _ in sort_spec])
+
+    find = coll.find(with_cursor(query, sort_spec, cursor), projection).sort(sort_spec)
+    if not cursor:
+        find = find.skip((page - 1) * limit)
+    items, next_cursor = split_page(list(find.limit(limit + 1)), limit, sort_spec)
+    total, total_exact = count_total(coll, query) if include_total else (None, None)
+
+    return [transform(i) for i in items], total, total_exact, next_cursor
 
 
 def get_by_id(collection_name: str, id_value: str) -> dict | None:
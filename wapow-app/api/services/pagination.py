@@ -0,0 +1,104 @@
+"""Keyset (cursor) pagination helpers for MongoDB list queries.
+
+A cursor is an opaque, URL-safe token holding the sort key of the last
+item on a page. The next page is fetched with a range filter on that key
+instead of `.skip()`, so every page costs one index seek no matter how
+deep it is. Sort specs must end in a unique field (`_id`) so the key is
+never ambiguous.
+"""
+from __future__ import annotations
+
+import base64
+import json
+from typing import Any
+
+from bson import json_util
+
+SortSpec = list[tuple[str, int]]
+
+
+class InvalidCursor(ValueError):
+    """Cursor token is malformed or was issued for a different sort order."""
+
+
+def _field_value(doc: dict, path: str) -> Any:
+    value: Any = doc
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def encode_cursor(doc: dict, sort_spec: SortSpec) -> str:
+    """Token pointing just past `doc` in `sort_spec` order."""
+    payload = {
+        "s": [[field, direction] for field, direction in sort_spec],
+        "k": [_field_value(doc, field) for field, _ in sort_spec],
+    }
+    raw = json_util.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str, sort_spec: SortSpec) -> list[Any]:
+    """Sort-key values stored in `token`; raises InvalidCursor if unusable."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json_util.loads(raw)
+        spec = [(field, direction) for field, direction in payload["s"]]
+        values = list(payload["k"])
+    except (ValueError, TypeError, KeyError, json.JSONDecodeError):
+        raise InvalidCursor("invalid cursor") from None
+    if spec != list(sort_spec) or len(values) != len(sort_spec):
+        raise InvalidCursor("cursor does not match the requested sort order")
+    return values
+
+
+def _after(field: str, direction: int, value: Any) -> dict | None:
+    """Filter for values strictly after `value` in one field's sort order.
+
+    MongoDB sorts null/missing before everything else: descending, nulls
+    come after every real value and nothing comes after null; ascending,
+    "after null" means "not null".
+    """
+    if value is None:
+        return None if direction < 0 else {field: {"$ne": None}}
+    if direction < 0:
+        return {"$or": [{field: {"$lt": value}}, {field: None}]}
+    return {field: {"$gt": value}}
+
+
+def keyset_filter(sort_spec: SortSpec, values: list[Any]) -> dict:
+    """Query matching documents that sort after `values` under `sort_spec`.
+
+    For a spec (a, b, c) this is
+    ``a > va OR (a = va AND b > vb) OR (a = va AND b = vb AND c > vc)``
+    with each comparison flipped for descending fields.
+    """
+    branches: list[dict] = []
+    equal: dict[str, Any] = {}
+    for (field, direction), value in zip(sort_spec, values):
+        after = _after(field, direction, value)
+        if after is not None:
+            branches.append({**equal, **after} if equal else after)
+        equal[field] = value
+    if not branches:
+        # Cursor sits on the very last possible key
+        return {"_id": {"$exists": False}}
+    return branches[0] if len(branches) == 1 else {"$or": branches}
+
+
+def with_cursor(query: dict, sort_spec: SortSpec, cursor: str | None) -> dict:
+    """`query` narrowed to the page after `cursor` (unchanged when no cursor)."""
+    if not cursor:
+        return query
+    after = keyset_filter(sort_spec, decode_cursor(cursor, sort_spec))
+    return {"$and": [query, after]} if query else after
+
+
+def split_page(docs: list[dict], limit: int, sort_spec: SortSpec) -> tuple[list[dict], str | None]:
+    """Trim a `limit + 1` fetch to `limit` docs and build the next cursor, if any."""
+    if len(docs) <= limit:
+        return docs, None
+    page = docs[:limit]
+    return page, encode_cursor(page[-1], sort_spec)
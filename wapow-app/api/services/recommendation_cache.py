@@ -0,0 +1,174 @@
+"""Redis cache for `POST /api/recommendations` responses.
+
+Entries are keyed by (user_id, category, hour, time_window, limit) and
+live for `RECOMMENDATIONS_CACHE_TTL_SECONDS`. Each key also embeds the
+user's current version, a `time_ns()` stamp stored at `reco:ver:{user}`;
+`sync_clickhouse_to_neo4j` replaces it (see `invalidate_users`) after
+rewriting a user's graph edges, so that user's cached responses stop being
+read and simply expire.
+
+Versions are never reused: a lost or expired version key is replaced by a
+fresh stamp, not reset to a counter value older entries may still carry.
+A lookup with no version key is a miss.
+
+Responses also depend on the neighbours' reading history, which does not
+bump the user's version; the TTL bounds how stale that can get.
+
+Redis is an optimization here: if it is down or slow, lookups miss and
+writes are skipped, and recommendations are computed as usual.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import time
+from typing import Iterable
+
+import redis
+import redis.asyncio as aioredis
+
+from api.config import (
+    RECOMMENDATIONS_CACHE_TTL_SECONDS,
+    REDIS_TIMEOUT_SECONDS,
+    REDIS_URL,
+)
+
+logger = logging.getLogger(__name__)
+
+_PREFIX = "reco"
+# Only bounds memory for idle users; refreshed on every write
+_VERSION_TTL_SECONDS = 2 * RECOMMENDATIONS_CACHE_TTL_SECONDS
+
+
+def _version_key(user_id: str) -> str:
+    return f"{_PREFIX}:ver:{user_id}"
+
+
+def _new_version() -> str:
+    return str(time.time_ns())
+
+
+def _entry_key(user_id: str, version: str, category: str, hour: int, time_window: int, limit: int) -> str:
+    return f"{_PREFIX}:{user_id}:{version}:{category}:{hour}:{time_window}:{limit}"
+
+
+class RecommendationCache:
+    """Async get/set of recommendation responses, with hit/miss counters."""
+
+    def __init__(self, url: str, ttl: int) -> None:
+        self.url = url
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._client: aioredis.Redis | None = None
+
+    def _get_client(self) -> aioredis.Redis:
+        if self._client is None:
+            self._client = aioredis.Redis.from_url(
+                self.url,
+                socket_timeout=REDIS_TIMEOUT_SECONDS,
+                socket_connect_timeout=REDIS_TIMEOUT_SECONDS,
+            )
+        return self._client
+
+    async def close(self) -> None:
+        """Close the connection pool. Call at app shutdown."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def get(
+        self, user_id: str, category: str, hour: int, time_window: int, limit: int
+    ) -> tuple[dict | None, str | None]:
+        """(cached response or None, version to pass to `set` on a miss).
+
+        The version is read before computing, so a response computed while
+        an invalidation lands is stored under the superseded version and
+        never served. Both are None if caching is off or Redis is unavailable.
+        """
+        if self.ttl <= 0:
+            return None, None
+        try:
+            client = self._get_client()
+            vkey = _version_key(user_id)
+            version = await client.get(vkey)
+            if version is None:
+                # First lookup, or the version expired: start a fresh one
+                fresh = _new_version()
+                if await client.set(vkey, fresh, nx=True, ex=_VERSION_TTL_SECONDS):
+                    self.misses += 1
+                    return None, fresh
+                # Another request (or an invalidation) set it first
+                version = await client.get(vkey)
+                if version is None:
+                    self.misses += 1
+                    return None, None
+            version = version.decode()
+            raw = await client.get(_entry_key(user_id, version, category, hour, time_window, limit))
+        except redis.RedisError:
+            self.errors += 1
+            logger.warning("Recommendation cache read failed", exc_info=True)
+            return None, None
+        if raw is None:
+            self.misses += 1
+            return None, version
+        self.hits += 1
+        return json.loads(raw), version
+
+    async def set(
+        self,
+        user_id: str,
+        category: str,
+        hour: int,
+        time_window: int,
+        limit: int,
+        value: dict,
+        version: str | None,
+    ) -> None:
+        """Store `value` under the `version` returned by the preceding `get`."""
+        if self.ttl <= 0 or version is None:
+            return
+        try:
+            client = self._get_client()
+            pipe = client.pipeline(transaction=False)
+            pipe.set(
+                _entry_key(user_id, version, category, hour, time_window, limit),
+                json.dumps(value),
+                ex=self.ttl,
+            )
+            pipe.expire(_version_key(user_id), _VERSION_TTL_SECONDS)
+            await pipe.execute()
+        except redis.RedisError:
+            self.errors += 1
+            logger.warning("Recommendation cache write failed", exc_info=True)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+recommendation_cache = RecommendationCache(REDIS_URL, RECOMMENDATIONS_CACHE_TTL_SECONDS)
+
+
+def invalidate_users(client: redis.Redis, user_ids: Iterable[str]) -> int:
+    """Drop cached recommendations for `user_ids` by giving them new versions.
+
+    Blocking (takes a sync client), for use from scripts. Returns the
+    number of users invalidated; 0 when caching is off, as nothing is cached.
+    """
+    ids = set(user_ids)
+    if not ids or RECOMMENDATIONS_CACHE_TTL_SECONDS <= 0:
+        return 0
+    version = _new_version()
+    pipe = client.pipeline(transaction=False)
+    for user_id in ids:
+        pipe.set(_version_key(user_id), version, ex=_VERSION_TTL_SECONDS)
+    pipe.execute()
+    return len(ids)
@@ -6,8 +6,10 @@ from typing import Any
 from bson import ObjectId
 
 from api.config import ARTICLES_COLLECTION
-from api.db import get_db
+from api.db import get_read_db
 from api.services.content import _serialize_doc, _transform_content_item
+from api.services.pagination import split_page, with_cursor
+from api.services.totals import count_total
 
 STORY_SLIDES_COLLECTION = "story_slides"
 
@@ -56,7 +58,7 @@ def _article_metadata(article_doc: dict | None) -> dict[str, Any]:
 
 
 def _load_articles_by_ids(article_ids: list[Any]) -> dict[str, dict]:
-    db = get_db()
+    db = get_read_db()
     candidates: list[Any] = []
     for article_id in article_ids:
         candidates.extend(_id_candidates(article_id))
@@ -88,7 +90,7 @@ def _story_dto(slides_doc: dict, article_doc: dict | None = None) -> dict[str, A
 
 
 def get_story(article_id: str) -> dict[str, Any] | None:
-    db = get_db()
+    db = get_read_db()
     candidates = _id_candidates(article_id)
     slides_doc = db[STORY_SLIDES_COLLECTION].find_one(
         {"article_id": {"$in": candidates}, **_usable_pages_query()}
@@ -106,8 +108,11 @@ def list_stories(
     limit: int = 100,
     category: str | None = None,
     sort_order: str = "desc",
-) -> tuple[list[dict[str, Any]], int]:
-    db = get_db()
+    cursor: str | None = None,
+    include_total: bool = True,
+) -> tuple[list[dict[str, Any]], int | None, bool | None, str | None]:
+    """Story decks plus (total, total_exact, next_cursor); `cursor` takes precedence over `page`."""
+    db = get_read_db()
     query = _usable_pages_query()
 
     if category:
@@ -120,30 +125,28 @@ def list_stories(
 
     sort_dir = -1 if sort_order == "desc" else 1
     sort_spec = [("generation_timestamp", sort_dir), ("_id", sort_dir)]
-    skip = (page - 1) * limit
 
-    slides = list(
-        db[STORY_SLIDES_COLLECTION]
-        .find(query)
-        .sort(sort_spec)
-        .skip(skip)
-        .limit(limit)
+    find = db[STORY_SLIDES_COLLECTION].find(with_cursor(query, sort_spec, cursor)).sort(sort_spec)
+    if not cursor:
+        find = find.skip((page - 1) * limit)
+    slides, next_cursor = split_page(list(find.limit(limit + 1)), limit, sort_spec)
+    total, total_exact = (
+        count_total(db[STORY_SLIDES_COLLECTION], query) if include_total else (None, None)
     )
-    total = db[STORY_SLIDES_COLLECTION].count_documents(query)
     articles = _load_articles_by_ids([slide.get("article_id") for slide in slides])
 
     stories = [
         _story_dto(slide, articles.get(str(slide.get("article_id"))))
         for slide in slides
     ]
-    return stories, total
+    return stories, total, total_exact, next_cursor
 
 
 def get_stories_by_ids(article_ids: list[str]) -> list[dict[str, Any]]:
     if not article_ids:
         return []
 
-    db = get_db()
+    db = get_read_db()
     candidates: list[Any] = []
     for article_id in article_ids:
         candidates.extend(_id_candidates(article_id))
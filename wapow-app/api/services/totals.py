@@ -0,0 +1,116 @@
+"""Cached result counts for paginated list endpoints.
+
+Feed clients mostly need "is there a next page" (the cursor answers
+that), so totals are served from a per-process cache instead of running
+`count_documents` on every page:
+
+- Unfiltered queries use `estimated_document_count()` (collection
+  metadata, no scan).
+- Filtered queries are counted once, then served from the cache keyed by
+  collection + normalized query. After `TOTALS_CACHE_TTL_SECONDS` the
+  cached value is still returned while a background thread recounts, up
+  to `TOTALS_CACHE_MAX_AGE_SECONDS`.
+
+Each result says whether it is exact (counted for this request) or
+approximate (estimated or cached).
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from bson import json_util
+from pymongo.collection import Collection
+
+from api.config import (
+    TOTALS_CACHE_MAX_AGE_SECONDS,
+    TOTALS_CACHE_SIZE,
+    TOTALS_CACHE_TTL_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(collection: Collection, query: dict) -> str:
+    """Cache key: same collection + same filter (key order ignored) → same key."""
+    return f"{collection.full_name}:{json_util.dumps(query, sort_keys=True)}"
+
+
+class TotalsCache:
+    """Bounded LRU of counts with stale-while-revalidate refresh."""
+
+    def __init__(self, maxsize: int, ttl: float, max_age: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # key → (counted_at, total)
+        self._data: OrderedDict[str, tuple[float, int]] = OrderedDict()
+        self._refreshing: set[str] = set()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="totals-refresh")
+
+    def count(self, collection: Collection, query: dict) -> tuple[int, bool]:
+        """Return (total, exact) for `query` on `collection`. Blocking."""
+        if not query:
+            return collection.estimated_document_count(), False
+
+        key = _normalize(collection, query)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and now - entry[0] < self.max_age:
+                self._data.move_to_end(key)
+                self.hits += 1
+                if now - entry[0] >= self.ttl and key not in self._refreshing:
+                    self._refreshing.add(key)
+                    self._executor.submit(self._refresh, key, collection, query)
+                return entry[1], False
+            self.misses += 1
+
+        total = collection.count_documents(query)
+        self._store(key, total)
+        return total, True
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "refreshing": len(self._refreshing),
+            }
+
+    def _store(self, key: str, total: int) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic(), total)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def _refresh(self, key: str, collection: Collection, query: dict) -> None:
+        try:
+            self._store(key, collection.count_documents(query))
+        except Exception:
+            # Keep serving the old value; the next stale hit retries
+            logger.warning("Background count refresh failed for %s", key, exc_info=True)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+
+totals_cache = TotalsCache(TOTALS_CACHE_SIZE, TOTALS_CACHE_TTL_SECONDS, TOTALS_CACHE_MAX_AGE_SECONDS)
+
+
+def count_total(collection: Collection, query: dict) -> tuple[int, bool]:
+    """(total, exact) for a list query, via the process-wide totals cache."""
+    return totals_cache.count(collection, query)
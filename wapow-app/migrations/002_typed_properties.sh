@@ -0,0 +1,122 @@
+#!/bin/bash
+set -e
+
+# Typed engagement columns on `events` plus per-session rollups.
+#
+# The collector lifts these values out of `properties` at ingest time:
+#   dwell_time_ms  ← properties.dwell_time_ms                  (dwell)
+#   scroll_depth   ← properties.depth_percent                  (scroll_depth)
+#   media_progress ← properties.progress_percent               (video/audio_progress)
+#   media_time_ms  ← properties.watch_time_ms / listen_time_ms (video/audio_progress)
+#
+# The DEFAULT expressions only matter for parts written before this
+# migration: ClickHouse evaluates them on read, so older rows still report
+# the right values without a rewrite. They mirror the collector's
+# `_lift_properties`/`_as_uint` (writer.py) so old and new rows agree:
+# numbers and numeric strings both count, fractions are truncated, values
+# are clamped to [0, column max], anything else is 0, and media_time_ms
+# takes watch_time_ms when that key is present, else listen_time_ms.
+#
+# Order of deployment: the collector checks `system.columns` when it
+# connects and leaves out columns that do not exist yet, so it can be
+# deployed before or after this migration. Restart it after migrating so
+# it starts writing the typed columns.
+#
+# The two rollup views are recreated to sum the typed column instead of
+# parsing JSON. Rows inserted between DROP and CREATE are not rolled up,
+# so run this while the collector is stopped (it spills to disk meanwhile).
+
+clickhouse client -n <<'SQL'
+
+ALTER TABLE wapow_analytics.events
+    ADD COLUMN IF NOT EXISTS dwell_time_ms  UInt32 DEFAULT
+        toUInt32(least(greatest(ifNotFinite(toFloat64OrZero(trim(BOTH '"' FROM JSONExtractRaw(properties, 'dwell_time_ms'))), 0), 0), 4294967295)),
+    ADD COLUMN IF NOT EXISTS scroll_depth   UInt8  DEFAULT
+        toUInt8(least(greatest(ifNotFinite(toFloat64OrZero(trim(BOTH '"' FROM JSONExtractRaw(properties, 'depth_percent'))), 0), 0), 100)),
+    ADD COLUMN IF NOT EXISTS media_progress UInt8  DEFAULT
+        toUInt8(least(greatest(ifNotFinite(toFloat64OrZero(trim(BOTH '"' FROM JSONExtractRaw(properties, 'progress_percent'))), 0), 0), 100)),
+    ADD COLUMN IF NOT EXISTS media_time_ms  UInt32 DEFAULT if(
+        JSONHas(properties, 'watch_time_ms'),
+        toUInt32(least(greatest(ifNotFinite(toFloat64OrZero(trim(BOTH '"' FROM JSONExtractRaw(properties, 'watch_time_ms'))), 0), 0), 4294967295)),
+        toUInt32(least(greatest(ifNotFinite(toFloat64OrZero(trim(BOTH '"' FROM JSONExtractRaw(properties, 'listen_time_ms'))), 0), 0), 4294967295))
+    );
+
+DROP VIEW IF EXISTS wapow_analytics.mv_content_engagement_hourly;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS wapow_analytics.mv_content_engagement_hourly
+TO wapow_analytics.content_engagement_hourly
+AS SELECT
+    content_id,
+    content_type,
+    category,
+    toStartOfHour(timestamp) AS hour,
+    countIf(event_type = 'view')    AS views,
+    countIf(event_type = 'like')    AS likes,
+    countIf(event_type = 'save')    AS saves,
+    countIf(event_type = 'share')   AS shares,
+    countIf(event_type = 'comment') AS comments,
+    sumIf(toUInt64(dwell_time_ms), event_type = 'dwell') AS total_dwell_ms,
+    count() AS event_count
+FROM wapow_analytics.events
+WHERE content_id != ''
+GROUP BY content_id, content_type, category, hour;
+
+DROP VIEW IF EXISTS wapow_analytics.mv_user_activity_daily;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS wapow_analytics.mv_user_activity_daily
+TO wapow_analytics.user_activity_daily
+AS SELECT
+    user_id,
+    toDate(timestamp) AS day,
+    countIf(event_type = 'view')    AS views,
+    countIf(event_type = 'like')    AS likes,
+    countIf(event_type = 'save')    AS saves,
+    countIf(event_type = 'share')   AS shares,
+    countIf(event_type = 'comment') AS comments,
+    sumIf(toUInt64(dwell_time_ms), event_type = 'dwell') AS total_dwell_ms,
+    uniq(session_id) AS sessions,
+    count() AS event_count
+FROM wapow_analytics.events
+WHERE user_id != ''
+GROUP BY user_id, day;
+
+-- Rolling per-session counters, updated on every insert into `events`.
+-- Read with the matching -Merge/aggregate functions and GROUP BY session_id.
+CREATE TABLE IF NOT EXISTS wapow_analytics.session_activity (
+    session_id         String,
+    day                Date,
+    user_id            SimpleAggregateFunction(max, String),
+    started_at         SimpleAggregateFunction(min, DateTime64(3)),
+    last_seen_at       SimpleAggregateFunction(max, DateTime64(3)),
+    event_count        SimpleAggregateFunction(sum, UInt64),
+    views              SimpleAggregateFunction(sum, UInt64),
+    total_dwell_ms     SimpleAggregateFunction(sum, UInt64),
+    max_scroll_depth   SimpleAggregateFunction(max, UInt8),
+    max_media_progress SimpleAggregateFunction(max, UInt8),
+    unique_content     AggregateFunction(uniq, Nullable(String))
+) ENGINE = AggregatingMergeTree()
+PARTITION BY toYYYYMM(day)
+ORDER BY (session_id, day)
+TTL day + INTERVAL 90 DAY;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS wapow_analytics.mv_session_activity
+TO wapow_analytics.session_activity
+AS SELECT
+    session_id,
+    toDate(timestamp) AS day,
+    max(user_id)                      AS user_id,
+    min(timestamp)                    AS started_at,
+    max(timestamp)                    AS last_seen_at,
+    count()                           AS event_count,
+    countIf(event_type = 'view')      AS views,
+    sumIf(toUInt64(dwell_time_ms), event_type = 'dwell') AS total_dwell_ms,
+    max(scroll_depth)                 AS max_scroll_depth,
+    max(media_progress)               AS max_media_progress,
+    uniqState(nullIf(content_id, '')) AS unique_content
+FROM wapow_analytics.events
+WHERE session_id != ''
+GROUP BY session_id, day;
+
+SQL
+
+echo "ClickHouse typed property columns and session rollups created"
@@ -4,6 +4,10 @@ set -euo pipefail
 # Simple wrapper for running the ClickHouse → Neo4j sync script from cron.
 # Example crontab (run every 15 minutes):
 # */15 * * * * cd /opt/wapow/wapow-app && /usr/bin/env bash scripts/sync_clickhouse_cron.sh >> /var/log/wapow-sync.log 2>&1
+#
+# The sync refreshes SIMILAR_TO neighbours only for users it touched; rebuild
+# them for everyone nightly:
+# 30 3 * * * cd /opt/wapow/wapow-app && python -m api.scripts.compute_user_similarity >> /var/log/wapow-sync.log 2>&1
 
 cd "$(dirname "${BASH_SOURCE[0]}")/.."
 
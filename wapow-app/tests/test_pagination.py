@@ -0,0 +1,116 @@
+"""Keyset pagination: cursor encoding, range filters and page splitting."""
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from api.services.pagination import (
+    InvalidCursor,
+    _after,
+    decode_cursor,
+    encode_cursor,
+    keyset_filter,
+    split_page,
+    with_cursor,
+)
+
+# The specs list_items/list_articles build: the default newest-first
+# listing, and `sort_by=publish_date&sort_order=asc`
+DESC = [("created_date", -1), ("_id", -1)]
+ASC = [("publish_date", 1), ("_id", 1)]
+
+OID = ObjectId("65f0c0ffee0000000000abcd")
+WHEN = datetime(2024, 5, 1, 12, 30, 15, 123000)
+
+
+def test_cursor_round_trips_object_id_and_datetime():
+    token = encode_cursor({"created_date": WHEN, "_id": OID, "title": "x"}, DESC)
+
+    assert "=" not in token
+    assert decode_cursor(token, DESC) == [WHEN, OID]
+
+
+def test_cursor_reads_nested_and_missing_fields():
+    spec = [("meta.rank", 1), ("_id", 1)]
+    token = encode_cursor({"meta": {"rank": 3}, "_id": OID}, spec)
+    assert decode_cursor(token, spec) == [3, OID]
+
+    token = encode_cursor({"_id": OID}, spec)
+    assert decode_cursor(token, spec) == [None, OID]
+
+
+def test_cursor_for_another_sort_order_is_rejected():
+    token = encode_cursor({"created_date": WHEN, "_id": OID}, DESC)
+
+    with pytest.raises(InvalidCursor):
+        decode_cursor(token, ASC)
+
+
+@pytest.mark.parametrize("token", ["", "not-a-cursor", "e30"])
+def test_malformed_cursor_is_rejected(token):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(token, DESC)
+
+
+def test_after_null_ascending_means_not_null():
+    assert _after("publish_date", 1, None) == {"publish_date": {"$ne": None}}
+
+
+def test_after_null_descending_matches_nothing():
+    assert _after("created_date", -1, None) is None
+
+
+def test_after_value_descending_includes_nulls():
+    assert _after("created_date", -1, WHEN) == {
+        "$or": [{"created_date": {"$lt": WHEN}}, {"created_date": None}]
+    }
+
+
+def test_keyset_filter_breaks_ties_on_id_descending():
+    assert keyset_filter(DESC, [WHEN, OID]) == {
+        "$or": [
+            {"$or": [{"created_date": {"$lt": WHEN}}, {"created_date": None}]},
+            {"created_date": WHEN, "$or": [{"_id": {"$lt": OID}}, {"_id": None}]},
+        ]
+    }
+
+
+def test_keyset_filter_breaks_ties_on_id_ascending():
+    assert keyset_filter(ASC, [WHEN, OID]) == {
+        "$or": [
+            {"publish_date": {"$gt": WHEN}},
+            {"publish_date": WHEN, "_id": {"$gt": OID}},
+        ]
+    }
+
+
+def test_keyset_filter_after_null_descending_only_breaks_the_tie():
+    assert keyset_filter(DESC, [None, OID]) == {
+        "created_date": None,
+        "$or": [{"_id": {"$lt": OID}}, {"_id": None}],
+    }
+
+
+def test_with_cursor_keeps_the_base_query():
+    token = encode_cursor({"publish_date": WHEN, "_id": OID}, ASC)
+
+    assert with_cursor({"category": "sports"}, ASC, None) == {"category": "sports"}
+    assert with_cursor({"category": "sports"}, ASC, token) == {
+        "$and": [{"category": "sports"}, keyset_filter(ASC, [WHEN, OID])]
+    }
+
+
+def test_split_page_detects_a_next_page_from_the_extra_doc():
+    docs = [{"created_date": WHEN, "_id": ObjectId()} for _ in range(4)]
+
+    page, cursor = split_page(docs, 3, DESC)
+
+    assert page == docs[:3]
+    assert decode_cursor(cursor, DESC) == [WHEN, docs[2]["_id"]]
+
+
+@pytest.mark.parametrize("count", [0, 2, 3])
+def test_split_page_without_extra_doc_is_the_last_page(count):
+    docs = [{"created_date": WHEN, "_id": ObjectId()} for _ in range(count)]
+
+    assert split_page(docs, 3, DESC) == (docs, None)
@@ -0,0 +1,82 @@
+"""Recommendation cache versioning (fakeredis stands in for Redis)."""
+import asyncio
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+import fakeredis.aioredis  # noqa: E402
+
+from api.services import recommendation_cache
+from api.services.recommendation_cache import (
+    RecommendationCache,
+    _version_key,
+    invalidate_users,
+)
+
+PARAMS = ("u1", "sports", 14, 2, 10)
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def cache(server):
+    cache = RecommendationCache("redis://unused", ttl=900)
+    cache._client = fakeredis.aioredis.FakeRedis(server=server)
+    return cache
+
+
+@pytest.fixture
+def sync_client(server):
+    return fakeredis.FakeRedis(server=server)
+
+
+def _fill(cache, value):
+    async def run():
+        cached, version = await cache.get(*PARAMS)
+        assert cached is None
+        await cache.set(*PARAMS, value, version)
+    asyncio.run(run())
+
+
+def test_hit_then_invalidate(cache, sync_client):
+    _fill(cache, {"n": 1})
+    assert asyncio.run(cache.get(*PARAMS))[0] == {"n": 1}
+
+    invalidate_users(sync_client, ["u1"])
+    assert asyncio.run(cache.get(*PARAMS))[0] is None
+
+
+def test_expired_version_never_revives_old_entries(cache, sync_client):
+    _fill(cache, {"n": 1})
+    invalidate_users(sync_client, ["u1"])
+    _fill(cache, {"n": 2})
+
+    # Version key expires while entries written under it are still live
+    sync_client.delete(_version_key("u1"))
+    assert asyncio.run(cache.get(*PARAMS))[0] is None
+
+    # Later invalidations must not land back on an old version either
+    for _ in range(3):
+        invalidate_users(sync_client, ["u1"])
+        assert asyncio.run(cache.get(*PARAMS))[0] is None
+
+
+def test_result_computed_across_invalidation_is_not_served(cache, sync_client):
+    async def run():
+        _, version = await cache.get(*PARAMS)
+        invalidate_users(sync_client, ["u1"])  # sync lands mid-computation
+        await cache.set(*PARAMS, {"stale": True}, version)
+        return await cache.get(*PARAMS)
+
+    assert asyncio.run(run())[0] is None
+
+
+def test_invalidate_is_a_no_op_when_caching_is_off(sync_client, monkeypatch):
+    monkeypatch.setattr(recommendation_cache, "RECOMMENDATIONS_CACHE_TTL_SECONDS", 0)
+    monkeypatch.setattr(recommendation_cache, "_VERSION_TTL_SECONDS", 0)
+
+    assert invalidate_users(sync_client, ["u1"]) == 0
+    assert sync_client.get(_version_key("u1")) is None
@@ -0,0 +1 @@
+"""Ingest load-test harness for the collector (see bench/run.py)."""
@@ -0,0 +1,311 @@
+"""Ingest load test for the collector.
+
+Starts the stub ClickHouse (`bench/stub_clickhouse.py`) and the collector
+(`main:app`, with the real ClickHouse client pointed at the stub) as
+subprocesses. It then drives `/collect` and `/collect/beacon` with a
+realistic event mix for a fixed duration and reports:
+
+- events/sec accepted
+- request latency p50/p99
+- rows per ClickHouse insert (flush sizes)
+- collector RSS and buffer depth over time
+
+Run from `wapow-collector/` (needs `pip install -r bench/requirements.txt`):
+
+    python -m bench.run --duration 30 --concurrency 64 --workers 2
+    python -m bench.run --json results/before.json   # save for comparison
+
+Collector tuning env vars (FLUSH_BATCH_SIZE, FLUSH_INTERVAL_SECONDS, ...)
+are passed through, so the same command can compare settings run to run.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import httpx
+
+_ROOT = Path(__file__).resolve().parent.parent
+
+# (event_type, weight, content_type, properties factory). Weights follow the
+# implemented events in docs/analytics-events-prioritized.md, with views and
+# dwell dominating as they do in the UI.
+_EVENT_MIX = [
+    ("view", 30, "article", lambda: {}),
+    ("dwell", 25, "article", lambda: {"dwell_time_ms": random.randint(300, 120_000)}),
+    ("scroll_depth", 12, "article", lambda: {"depth_percent": random.choice([25, 50, 75, 100])}),
+    ("video_progress", 8, "video", lambda: {
+        "progress_percent": random.choice([25, 50, 75, 100]),
+        "watch_time_ms": random.randint(1_000, 600_000),
+    }),
+    ("audio_progress", 4, "podcast", lambda: {
+        "progress_percent": random.choice([25, 50, 75, 100]),
+        "listen_time_ms": random.randint(1_000, 3_600_000),
+    }),
+    ("navigate", 8, "", lambda: {
+        "from_content_id": f"c{random.randint(1, 5000)}",
+        "to_content_id": f"c{random.randint(1, 5000)}",
+        "direction": random.choice(["next", "prev"]),
+    }),
+    ("like", 4, "article", lambda: {}),
+    ("save", 3, "article", lambda: {"saved": random.random() < 0.8}),
+    ("share", 2, "article", lambda: {"share_method": random.choice(["copy", "native", "x"])}),
+    ("comment", 1, "article", lambda: {"comment_id": uuid.uuid4().hex}),
+    ("search", 3, "", lambda: {
+        "query": random.choice(["election", "climate", "nba", "ai"]),
+        "results_count": random.randint(0, 50),
+    }),
+]
+_EVENT_WEIGHTS = [e[1] for e in _EVENT_MIX]
+_CATEGORIES = ["politics", "sports", "tech", "world", "business", "style", ""]
+_USER_AGENTS = [
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 Mobile/15E148",
+    "Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 Chrome/124.0 Mobile Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 Version/17.4 Safari/605.1.15",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/124.0 Safari/537.36",
+    "Mozilla/5.0 (iPad; CPU OS 17_4 like Mac OS X) AppleWebKit/605.1.15 Mobile/15E148",
+]
+
+
+def _make_event(user_id: str, session_id: str) -> dict:
+    event_type, _, content_type, props = random.choices(_EVENT_MIX, _EVENT_WEIGHTS)[0]
+    return {
+        "event_type": event_type,
+        "user_id": user_id,
+        "session_id": session_id,
+        "content_id": f"c{random.randint(1, 5000)}" if content_type else "",
+        "content_type": content_type,
+        "category": random.choice(_CATEGORIES),
+        "properties": props(),
+        "referrer": "",
+    }
+
+
+def _rss_kb(pid: int) -> int:
+    """RSS of `pid` plus its direct children (uvicorn workers), Linux only."""
+    pids = [pid]
+    try:
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                pids += [int(p) for p in f.read().split()]
+    except OSError:
+        pass
+    total = 0
+    for p in pids:
+        try:
+            with open(f"/proc/{p}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1])
+        except OSError:
+            pass
+    return total
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def _client_loop(
+    client: httpx.AsyncClient,
+    base: str,
+    args: argparse.Namespace,
+    deadline: float,
+    latencies: list[float],
+    counters: dict,
+) -> None:
+    user_id = random.choice(["", f"u{random.randint(1, 10_000)}"])
+    session_id = uuid.uuid4().hex
+    headers = {"user-agent": random.choice(_USER_AGENTS),
+               "x-forwarded-for": f"10.0.{random.randint(0, 255)}.{random.randint(1, 254)}"}
+    while time.monotonic() < deadline:
+        events = [_make_event(user_id, session_id) for _ in range(args.events_per_request)]
+        beacon = random.random() < args.beacon_ratio
+        started = time.perf_counter()
+        try:
+            if beacon:
+                resp = await client.post(
+                    f"{base}/collect/beacon",
+                    content=json.dumps({"events": events}),
+                    headers={**headers, "content-type": "text/plain"},
+                )
+            else:
+                resp = await client.post(f"{base}/collect", json={"events": events}, headers=headers)
+        except httpx.HTTPError:
+            counters["errors"] += 1
+            continue
+        latencies.append(time.perf_counter() - started)
+        if resp.status_code == 200:
+            counters["accepted"] += resp.json().get("accepted", 0)
+        else:
+            counters["errors"] += 1
+
+
+async def _sampler(base: str, pid: int, deadline: float, samples: list[dict]) -> None:
+    started = time.monotonic()
+    async with httpx.AsyncClient(timeout=5) as client:
+        while time.monotonic() < deadline:
+            sample = {"t": round(time.monotonic() - started, 1), "rss_kb": _rss_kb(pid)}
+            try:
+                stats = (await client.get(f"{base}/stats")).json()
+                sample["buffer_depth"] = stats["writer"]["buffer_depth"]
+            except (httpx.HTTPError, KeyError, ValueError):
+                pass
+            samples.append(sample)
+            await asyncio.sleep(1.0)
+
+
+async def _drive(args: argparse.Namespace, base: str, pid: int) -> dict:
+    latencies: list[float] = []
+    counters = {"accepted": 0, "errors": 0}
+    samples: list[dict] = []
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    started = time.monotonic()
+    deadline = started + args.duration
+    async with httpx.AsyncClient(timeout=30, limits=limits) as client:
+        await asyncio.gather(
+            _sampler(base, pid, deadline, samples),
+            *(
+                _client_loop(client, base, args, deadline, latencies, counters)
+                for _ in range(args.concurrency)
+            ),
+        )
+    elapsed = time.monotonic() - started
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "requests": len(latencies),
+        "events_accepted": counters["accepted"],
+        "errors": counters["errors"],
+        "events_per_s": round(counters["accepted"] / elapsed, 1),
+        "latency_ms": {
+            "p50": round(_percentile(latencies, 50) * 1000, 2),
+            "p99": round(_percentile(latencies, 99) * 1000, 2),
+            "max": round(max(latencies, default=0) * 1000, 2),
+        },
+        "samples": samples,
+    }
+
+
+def _wait_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not become ready")
+
+
+def _summarize_flushes(stub_stats: dict) -> dict:
+    sizes = [b["rows"] for b in stub_stats["batches"]]
+    return {
+        "inserts": stub_stats["inserts"],
+        "rows": stub_stats["rows"],
+        "rows_per_insert": {
+            "mean": round(statistics.fmean(sizes), 1) if sizes else 0,
+            "p50": _percentile(sizes, 50),
+            "max": max(sizes, default=0),
+        },
+        "insert_ms_p99": round(
+            _percentile([b["seconds"] for b in stub_stats["batches"]], 99) * 1000, 2
+        ),
+    }
+
+
+def _print_report(result: dict) -> None:
+    print()
+    print(f"duration        {result['elapsed_s']}s, {result['requests']} requests, "
+          f"{result['errors']} errors")
+    print(f"throughput      {result['events_per_s']} events/s "
+          f"({result['events_accepted']} accepted)")
+    lat = result["latency_ms"]
+    print(f"latency         p50 {lat['p50']} ms   p99 {lat['p99']} ms   max {lat['max']} ms")
+    fl = result["flushes"]
+    rpi = fl["rows_per_insert"]
+    print(f"flushes         {fl['inserts']} inserts, {fl['rows']} rows, rows/insert "
+          f"mean {rpi['mean']} p50 {rpi['p50']} max {rpi['max']}, insert p99 {fl['insert_ms_p99']} ms")
+    print("memory/buffer   t(s)  rss(MB)  buffer")
+    for s in result["samples"]:
+        print(f"                {s['t']:>5}  {s['rss_kb'] / 1024:>7.1f}  {s.get('buffer_depth', '-')}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Collector ingest load test")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of load")
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent clients")
+    parser.add_argument("--events-per-request", type=int, default=20,
+                        help="events per request (the UI flushes at 20)")
+    parser.add_argument("--beacon-ratio", type=float, default=0.2,
+                        help="share of requests sent to /collect/beacon")
+    parser.add_argument("--workers", type=int, default=1, help="collector worker processes")
+    parser.add_argument("--port", type=int, default=13002)
+    parser.add_argument("--stub-port", type=int, default=18123)
+    parser.add_argument("--stub-latency-ms", type=float, default=5.0)
+    parser.add_argument("--json", help="also write the full result to this file")
+    args = parser.parse_args()
+
+    base = f"http://127.0.0.1:{args.port}"
+    stub_url = f"http://127.0.0.1:{args.stub_port}"
+    spill_dir = tempfile.mkdtemp(prefix="collector-bench-spill-")
+    env = {
+        **os.environ,
+        "CLICKHOUSE_HOST": "127.0.0.1",
+        "CLICKHOUSE_PORT": str(args.stub_port),
+        "SPILL_DIR": spill_dir,
+    }
+
+    stub = subprocess.Popen(
+        [sys.executable, "-m", "bench.stub_clickhouse", "--port", str(args.stub_port),
+         "--latency-ms", str(args.stub_latency_ms)],
+        cwd=_ROOT,
+    )
+    collector = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+         "--port", str(args.port), "--workers", str(args.workers), "--log-level", "warning"],
+        cwd=_ROOT,
+        env=env,
+    )
+    try:
+        _wait_ready(f"{stub_url}/ping")
+        _wait_ready(f"{base}/health")
+        result = asyncio.run(_drive(args, base, collector.pid))
+        # Stop the collector first so every worker drains into the stub
+        collector.send_signal(signal.SIGTERM)
+        collector.wait(timeout=60)
+        result["flushes"] = _summarize_flushes(httpx.get(f"{stub_url}/_stats").json())
+    finally:
+        for proc in (collector, stub):
+            if proc.poll() is None:
+                proc.terminate()
+                proc.wait(timeout=10)
+
+    result["config"] = {
+        **vars(args),
+        "FLUSH_BATCH_SIZE": os.getenv("FLUSH_BATCH_SIZE", "default"),
+        "FLUSH_INTERVAL_SECONDS": os.getenv("FLUSH_INTERVAL_SECONDS", "default"),
+    }
+    _print_report(result)
+    if args.json:
+        Path(args.json).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.json).write_text(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
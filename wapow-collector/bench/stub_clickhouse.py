@@ -0,0 +1,327 @@
+"""Minimal stand-in for the ClickHouse HTTP interface, for benchmarks.
+
+The collector talks to it with the real `clickhouse_connect` client, so
+each flush pays for the library's Native column encoding, compression and
+HTTP insert exactly as in production. The stub answers just enough of
+ClickHouse's HTTP interface for that:
+
+- the client's connect-time queries (`version()`, `system.settings`, the
+  protocol probe), `system.columns` and `DESCRIBE TABLE` for the events
+  table in `EVENTS_SCHEMA`;
+- `INSERT ... FORMAT Native` bodies (chunked, lz4/zstd/gzip/deflate),
+  whose blocks are walked to count rows and reject malformed input;
+- any other query, with an empty result.
+
+Inserts can sleep to simulate server latency and are recorded (rows and
+bytes per insert). `GET /ping` answers like ClickHouse; `GET /_stats`
+returns the recorded inserts as JSON.
+
+Run standalone:
+
+    python -m bench.stub_clickhouse --port 18123 --latency-ms 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import struct
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import lz4.frame
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - only needed for zstd bodies
+    zstandard = None
+
+# wapow-app/migrations/001_events.sh + 002_typed_properties.sh
+EVENTS_SCHEMA = [
+    ("event_id", "UUID"),
+    ("event_type", "LowCardinality(String)"),
+    ("user_id", "String"),
+    ("session_id", "String"),
+    ("content_id", "String"),
+    ("content_type", "LowCardinality(String)"),
+    ("category", "LowCardinality(String)"),
+    ("timestamp", "DateTime64(3)"),
+    ("properties", "String"),
+    ("ip", "String"),
+    ("user_agent", "String"),
+    ("device_type", "LowCardinality(String)"),
+    ("country", "LowCardinality(String)"),
+    ("city", "String"),
+    ("referrer", "String"),
+    ("dwell_time_ms", "UInt32"),
+    ("scroll_depth", "UInt8"),
+    ("media_progress", "UInt8"),
+    ("media_time_ms", "UInt32"),
+]
+
+_SERVER_VERSION = "24.8.1.1"
+_FIXED_WIDTHS = {
+    "UInt8": 1, "UInt16": 2, "UInt32": 4, "UInt64": 8,
+    "Int8": 1, "Int16": 2, "Int32": 4, "Int64": 8,
+    "Float32": 4, "Float64": 8, "Date": 2, "DateTime": 4, "UUID": 16,
+}
+_DESCRIBE_COLUMNS = [
+    "name", "type", "default_type", "default_expression",
+    "comment", "codec_expression", "ttl_expression",
+]
+
+
+class NativeFormatError(ValueError):
+    """An insert body that is not valid Native format for our schema."""
+
+
+# ── Native format ─────────────────────────────────────────────────────
+
+
+def _leb128(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _native_string(value: str) -> bytes:
+    raw = value.encode()
+    return _leb128(len(raw)) + raw
+
+
+def native_block(columns: list[tuple[str, str]], rows: list[tuple]) -> bytes:
+    """Encode a result block; only String and UInt8 columns are needed."""
+    out = bytearray(_leb128(len(columns)) + _leb128(len(rows)))
+    for i, (name, type_name) in enumerate(columns):
+        out += _native_string(name) + _native_string(type_name)
+        for row in rows:
+            out += _native_string(row[i]) if type_name == "String" else bytes([row[i]])
+    return bytes(out)
+
+
+class _NativeReader:
+    """Walks Native blocks without materialising values."""
+
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+        self.pos = 0
+
+    def _take(self, size: int) -> bytes:
+        if self.pos + size > len(self.data):
+            raise NativeFormatError("unexpected end of Native data")
+        chunk = self.data[self.pos:self.pos + size]
+        self.pos += size
+        return chunk
+
+    def _leb128(self) -> int:
+        value = shift = 0
+        while True:
+            byte = self._take(1)[0]
+            value |= (byte & 0x7F) << shift
+            if not byte & 0x80:
+                return value
+            shift += 7
+
+    def _uint64(self) -> int:
+        return struct.unpack("<Q", self._take(8))[0]
+
+    def _skip_values(self, type_name: str, count: int) -> None:
+        if type_name == "String":
+            for _ in range(count):
+                self._take(self._leb128())
+        elif type_name.startswith("DateTime64"):
+            self._take(8 * count)
+        elif type_name in _FIXED_WIDTHS:
+            self._take(_FIXED_WIDTHS[type_name] * count)
+        else:
+            raise NativeFormatError(f"stub cannot read type {type_name}")
+
+    def _skip_column(self, type_name: str, rows: int) -> None:
+        if not type_name.startswith("LowCardinality("):
+            self._skip_values(type_name, rows)
+            return
+        self._uint64()  # key serialization version (column prefix)
+        if rows == 0:
+            return
+        key_width = 2 ** (self._uint64() & 0xFF)
+        self._skip_values(type_name[len("LowCardinality("):-1], self._uint64())
+        self._take(key_width * self._uint64())
+
+    def count_rows(self) -> int:
+        total = 0
+        while self.pos < len(self.data):
+            columns = self._leb128()
+            rows = self._leb128()
+            for _ in range(columns):
+                self._take(self._leb128())  # name
+                type_name = self._take(self._leb128()).decode()
+                self._skip_column(type_name, rows)
+            total += rows
+        return total
+
+
+def _decompress(body: bytes, encoding: str) -> bytes:
+    encoding = encoding.strip().lower()
+    if encoding in ("", "identity"):
+        return body
+    if encoding == "lz4":
+        # The client compresses each block as its own frame
+        out = []
+        while body:
+            d = lz4.frame.LZ4FrameDecompressor()
+            out.append(d.decompress(body))
+            body = d.unused_data
+        return b"".join(out)
+    if encoding == "zstd" and zstandard is not None:
+        return zstandard.ZstdDecompressor().decompressobj(read_across_frames=True).decompress(body)
+    if encoding == "gzip":
+        return zlib.decompress(body, zlib.MAX_WBITS | 16)
+    if encoding == "deflate":
+        return zlib.decompress(body)
+    raise NativeFormatError(f"stub cannot decode content-encoding {encoding}")
+
+
+# ── server ────────────────────────────────────────────────────────────
+
+
+class _Recorder:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.inserts: list[dict] = []
+
+    def record(self, rows: int, nbytes: int, seconds: float) -> None:
+        with self._lock:
+            self.inserts.append(
+                {"at": time.time(), "rows": rows, "bytes": nbytes, "seconds": seconds}
+            )
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            inserts = list(self.inserts)
+        return {
+            "inserts": len(inserts),
+            "rows": sum(i["rows"] for i in inserts),
+            "bytes": sum(i["bytes"] for i in inserts),
+            "batches": inserts,
+        }
+
+
+def _answer(sql: str) -> bytes:
+    """Result for a non-INSERT statement."""
+    if "version()" in sql:
+        # Sent as a command, answered in TabSeparated
+        return f"{_SERVER_VERSION}\tUTC\n".encode()
+    if "system.columns" in sql:
+        return native_block([("name", "String")], [(name,) for name, _ in EVENTS_SCHEMA])
+    if sql.startswith("DESCRIBE"):
+        rows = [
+            (name, type_name, "", "", "", "", "")
+            for name, type_name in EVENTS_SCHEMA
+        ]
+        return native_block([(name, "String") for name in _DESCRIBE_COLUMNS], rows)
+    if sql.startswith("SELECT 1 AS check"):
+        return native_block([("check", "UInt8")], [(1,)])
+    # system.settings and analytics reads: no rows
+    return b""
+
+
+def make_handler(recorder: _Recorder, latency: float, fail: bool):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, fmt, *args):  # keep benchmark output clean
+            pass
+
+        def _reply(self, status: int, body: bytes, content_type: str = "text/plain") -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _read_body(self) -> bytes:
+            if self.headers.get("Transfer-Encoding", "").lower() != "chunked":
+                return self.rfile.read(int(self.headers.get("Content-Length", "0")))
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().split(b";", 1)[0], 16)
+                if size == 0:
+                    self.rfile.readline()
+                    return b"".join(chunks)
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+
+        def do_GET(self):
+            path = urlparse(self.path).path
+            if path == "/ping":
+                self._reply(200, b"Ok.\n")
+            elif path == "/_stats":
+                self._reply(200, json.dumps(recorder.snapshot()).encode(), "application/json")
+            else:
+                self._reply(404, b"")
+
+        def do_POST(self):
+            started = time.perf_counter()
+            wire = self._read_body()
+            try:
+                body = _decompress(wire, self.headers.get("Content-Encoding", ""))
+            except (NativeFormatError, zlib.error, RuntimeError) as exc:
+                self._reply(400, f"Code: 27. DB::Exception: {exc}\n".encode())
+                return
+            # The statement is in `query` or leads the body, ahead of the data
+            query = parse_qs(urlparse(self.path).query).get("query", [""])[0]
+            if not query:
+                query, _, body = body.partition(b"\n")
+                query = query.decode()
+            if not query.lstrip().upper().startswith("INSERT"):
+                self._reply(200, _answer(query.strip()))
+                return
+            if fail:
+                self._reply(503, b"Code: 242. DB::Exception: stub configured to fail\n")
+                return
+            try:
+                rows = _NativeReader(body).count_rows()
+            except (NativeFormatError, UnicodeDecodeError) as exc:
+                self._reply(400, f"Code: 27. DB::Exception: Cannot parse input: {exc}\n".encode())
+                return
+            if latency:
+                time.sleep(latency)
+            recorder.record(rows, len(wire), time.perf_counter() - started)
+            self._reply(200, b"")
+
+    return Handler
+
+
+def serve(port: int, latency_ms: float = 0.0, fail: bool = False) -> ThreadingHTTPServer:
+    """Start the stub in a background thread and return the server."""
+    recorder = _Recorder()
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", port), make_handler(recorder, latency_ms / 1000.0, fail)
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=18123)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="simulated insert latency")
+    parser.add_argument("--fail", action="store_true", help="reject every insert (outage drill)")
+    args = parser.parse_args()
+    server = serve(args.port, args.latency_ms, args.fail)
+    print(f"stub ClickHouse listening on 127.0.0.1:{args.port}", flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
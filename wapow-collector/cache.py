@@ -0,0 +1,79 @@
+"""Small bounded LRU cache with per-entry TTL and hit/miss counters.
+
+Used in front of the per-request enrichment lookups (GeoIP, user-agent
+classification), where real traffic repeats a small set of keys.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterable
+
+_MISSING = object()
+
+
+class LRUCache:
+    """LRU cache bounded by entry count, with entries expiring after `ttl` seconds.
+
+    A `maxsize` of 0 disables caching (every call is a miss).
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[Hashable], Any]) -> Any:
+        """Return the cached value for `key`, computing and storing it on a miss."""
+        value = self._lookup(key)
+        if value is not _MISSING:
+            return value
+        value = compute(key)
+        self.put(key, value)
+        return value
+
+    def get_many(self, keys: Iterable[Hashable]) -> dict[Hashable, Any]:
+        """Return ``{key: value}`` for the keys that are cached and fresh."""
+        found: dict[Hashable, Any] = {}
+        for key in keys:
+            value = self._lookup(key)
+            if value is not _MISSING:
+                found[key] = value
+        return found
+
+    def _lookup(self, key: Hashable) -> Any:
+        entry = self._data.get(key)
+        if entry is not None:
+            expires, value = entry
+            if expires > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._data[key]
+        self.misses += 1
+        return _MISSING
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
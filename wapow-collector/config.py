@@ -33,6 +33,45 @@ else:
     CORS_ORIGINS = [o.strip() for o in _cors_raw.split(",") if o.strip()] or ["*"]
     CORS_ALLOW_CREDENTIALS = CORS_ORIGINS != ["*"]
 
+# Serving. Each uvicorn worker process owns its own writer, buffer and flush
+# loop, so the flush/buffer settings below apply per process.
+WORKERS = int(os.getenv("WORKERS", os.getenv("WEB_CONCURRENCY", "1")))
+RELOAD = os.getenv("RELOAD", "").lower() in ("1", "true", "yes")
+SHUTDOWN_TIMEOUT_SECONDS = float(os.getenv("SHUTDOWN_TIMEOUT_SECONDS", "20"))
+
+# Largest accepted request body after decompression (POST /collect/binary)
+MAX_BODY_BYTES = int(os.getenv("MAX_BODY_BYTES", str(1024 * 1024)))
+
 # Writer buffer settings
 FLUSH_INTERVAL_SECONDS = float(os.getenv("FLUSH_INTERVAL_SECONDS", "1.0"))
 FLUSH_BATCH_SIZE = int(os.getenv("FLUSH_BATCH_SIZE", "500"))
+
+# Back-pressure: max rows held in memory while ClickHouse is unavailable.
+# Overflow is spilled to SPILL_DIR and replayed once inserts succeed again.
+BUFFER_MAX_ROWS = int(os.getenv("BUFFER_MAX_ROWS", "50000"))
+SPILL_DIR = os.getenv("SPILL_DIR", "spill")  # one slot-<n>/ per worker; empty disables
+SPILL_SEGMENT_BYTES = int(os.getenv("SPILL_SEGMENT_BYTES", str(16 * 1024 * 1024)))
+SPILL_MAX_BYTES = int(os.getenv("SPILL_MAX_BYTES", str(1024 * 1024 * 1024)))
+
+# Enrichment caches (entries, seconds). Size 0 disables a cache.
+GEO_CACHE_SIZE = int(os.getenv("GEO_CACHE_SIZE", "10000"))
+GEO_CACHE_TTL_SECONDS = float(os.getenv("GEO_CACHE_TTL_SECONDS", "3600"))
+UA_CACHE_SIZE = int(os.getenv("UA_CACHE_SIZE", "2048"))
+UA_CACHE_TTL_SECONDS = float(os.getenv("UA_CACHE_TTL_SECONDS", "86400"))
+
+# How often geo.py checks MAXMIND_DB_PATH for a new or replaced database
+GEO_RELOAD_CHECK_SECONDS = float(os.getenv("GEO_RELOAD_CHECK_SECONDS", "60"))
+
+# /analytics/trending in-process cache: fresh for TTL, then served stale
+# (while refreshing in the background) for up to STALE more seconds
+TRENDING_CACHE_TTL_SECONDS = float(os.getenv("TRENDING_CACHE_TTL_SECONDS", "30"))
+TRENDING_STALE_SECONDS = float(os.getenv("TRENDING_STALE_SECONDS", "300"))
+
+# Analytics read queries (separate client from the insert path)
+QUERY_POOL_SIZE = int(os.getenv("QUERY_POOL_SIZE", "4"))
+QUERY_TIMEOUT_SECONDS = float(os.getenv("QUERY_TIMEOUT_SECONDS", "5"))
+QUERY_MAX_EXECUTION_SECONDS = int(os.getenv("QUERY_MAX_EXECUTION_SECONDS", "5"))
+
+# Per-content engagement cache for POST /analytics/content/batch
+CONTENT_CACHE_SIZE = int(os.getenv("CONTENT_CACHE_SIZE", "20000"))
+CONTENT_CACHE_TTL_SECONDS = float(os.getenv("CONTENT_CACHE_TTL_SECONDS", "30"))
@@ -0,0 +1,118 @@
+"""Request body decoding for the binary ingest endpoint.
+
+Bodies may be compressed (`Content-Encoding: gzip` or `zstd`) and encoded
+as Avro (`schemas/collect_request.avsc`), MessagePack or JSON, chosen by
+`Content-Type`. Each format decodes to the same ``{"events": [...]}``
+shape that `/collect` accepts.
+
+The Avro, MessagePack and zstd libraries are optional; if one is missing
+the matching format is reported as unsupported instead of failing import.
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import os
+import zlib
+from typing import Any
+
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+try:
+    import fastavro
+except ImportError:
+    fastavro = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+_SCHEMA_DIR = os.path.join(os.path.dirname(__file__), "schemas")
+
+AVRO_TYPES = {"application/avro", "avro/binary", "application/vnd.apache.avro"}
+MSGPACK_TYPES = {"application/msgpack", "application/x-msgpack", "application/vnd.msgpack"}
+JSON_TYPES = {"application/json", "text/plain", ""}
+
+
+class UnsupportedEncoding(Exception):
+    """Content-Type or Content-Encoding the collector cannot decode (HTTP 415)."""
+
+
+class BodyDecodeError(Exception):
+    """Body could not be decompressed or decoded (HTTP 400)."""
+
+
+_avro_schema = None
+
+
+def _get_avro_schema():
+    """Parse collect_request.avsc (which references EventPayload) once."""
+    global _avro_schema
+    if _avro_schema is None:
+        named: dict = {}
+        for name in ("event_payload.avsc", "collect_request.avsc"):
+            with open(os.path.join(_SCHEMA_DIR, name), encoding="utf-8") as f:
+                _avro_schema = fastavro.parse_schema(json.load(f), named_schemas=named)
+    return _avro_schema
+
+
+def decompress(raw: bytes, encoding: str, max_bytes: int) -> bytes:
+    """Undo `Content-Encoding`, refusing output larger than `max_bytes`."""
+    encoding = encoding.strip().lower()
+    if encoding in ("", "identity"):
+        return raw
+    try:
+        if encoding in ("gzip", "x-gzip"):
+            d = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+            out = d.decompress(raw, max_bytes + 1)
+            if len(out) <= max_bytes and not d.eof:
+                raise BodyDecodeError("could not decompress body: truncated gzip stream")
+        elif encoding == "zstd":
+            if zstandard is None:
+                raise UnsupportedEncoding("zstd support is not installed")
+            reader = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(raw))
+            out = reader.read(max_bytes + 1)
+        else:
+            raise UnsupportedEncoding(f"unsupported content-encoding: {encoding}")
+    except (zlib.error, ValueError) as exc:
+        raise BodyDecodeError(f"could not decompress body: {exc}") from None
+    except Exception as exc:
+        if zstandard is not None and isinstance(exc, zstandard.ZstdError):
+            raise BodyDecodeError(f"could not decompress body: {exc}") from None
+        raise
+    if len(out) > max_bytes:
+        raise BodyDecodeError("decompressed body too large")
+    return out
+
+
+def decode(body: bytes, content_type: str) -> Any:
+    """Decode a (decompressed) body according to its media type."""
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    try:
+        if media_type in AVRO_TYPES:
+            if fastavro is None:
+                raise UnsupportedEncoding("Avro support is not installed")
+            return fastavro.schemaless_reader(io.BytesIO(body), _get_avro_schema())
+        if media_type in MSGPACK_TYPES:
+            if msgpack is None:
+                raise UnsupportedEncoding("MessagePack support is not installed")
+            return msgpack.unpackb(body, raw=False)
+        if media_type in JSON_TYPES:
+            return _json_loads(body)
+    except UnsupportedEncoding:
+        raise
+    except Exception as exc:
+        raise BodyDecodeError(f"invalid {media_type or 'JSON'} body: {exc}") from None
+    raise UnsupportedEncoding(f"unsupported content-type: {media_type}")
@@ -1,38 +1,98 @@
 """Lightweight IP-to-geo lookup using MaxMind GeoLite2.
 
 If the database file is not available, lookups silently return empty strings.
+Results are kept in a bounded LRU cache, since most traffic comes from a
+small set of repeat IPs.
+
+The database is opened memory-mapped, so uvicorn workers on one host share
+its pages through the OS page cache. `reload_loop()` (started from the
+app lifespan) checks the file's mtime every `GEO_RELOAD_CHECK_SECONDS`,
+independently of the lookup cache: a changed file is opened off the event
+loop, swapped in, and the lookup cache cleared; a missing file drops the
+reader. Lookups themselves never stat or open the file.
 """
 
 from __future__ import annotations
+import asyncio
+import logging
 import os
 from typing import Optional
 
-_reader = None
+from cache import LRUCache
+from config import (
+    GEO_CACHE_SIZE,
+    GEO_CACHE_TTL_SECONDS,
+    GEO_RELOAD_CHECK_SECONDS,
+    MAXMIND_DB_PATH,
+)
 
+logger = logging.getLogger("collector.geo")
 
-def _get_reader():
-    global _reader
-    if _reader is not None:
-        return _reader
+_reader = None
+_reader_mtime: Optional[float] = None
+cache = LRUCache(GEO_CACHE_SIZE, GEO_CACHE_TTL_SECONDS)
 
-    db_path = os.getenv("MAXMIND_DB_PATH", "")
-    if not db_path or not os.path.isfile(db_path):
-        return None
 
+def _db_mtime() -> Optional[float]:
     try:
-        import geoip2.database
-        _reader = geoip2.database.Reader(db_path)
-    except Exception:
-        _reader = None
-    return _reader
+        return os.stat(MAXMIND_DB_PATH).st_mtime if MAXMIND_DB_PATH else None
+    except OSError:
+        return None
+
+
+def _open_reader():
+    """Blocking: open the database memory-mapped. Runs on a worker thread."""
+    import geoip2.database
+    return geoip2.database.Reader(MAXMIND_DB_PATH, mode=geoip2.database.MODE_MMAP)
+
+
+async def check_reload() -> None:
+    """Swap in the database if its file appeared, changed or disappeared."""
+    global _reader, _reader_mtime
+    loop = asyncio.get_running_loop()
+    mtime = await loop.run_in_executor(None, _db_mtime)
+    if mtime == _reader_mtime:
+        return
+
+    new_reader = None
+    if mtime is not None:
+        try:
+            new_reader = await loop.run_in_executor(None, _open_reader)
+        except Exception:
+            logger.exception("Could not open GeoIP database %s", MAXMIND_DB_PATH)
+            return  # keep serving from the old reader; retry next check
+
+    # Swap and clear on the loop thread, where lookups run
+    old_reader = _reader
+    _reader, _reader_mtime = new_reader, mtime
+    cache.clear()
+    if old_reader is not None:
+        old_reader.close()
+    if new_reader is not None:
+        logger.info("Loaded GeoIP database %s", MAXMIND_DB_PATH)
+
+
+async def reload_loop(interval: float = GEO_RELOAD_CHECK_SECONDS) -> None:
+    """Check for a new database every `interval` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await check_reload()
+        except Exception:
+            logger.exception("GeoIP reload check failed")
 
 
 def lookup(ip: str) -> dict:
     """Return {"country": ..., "city": ...} for the given IP.
 
     Returns empty strings if the lookup fails or the DB is unavailable.
+    The returned dict is shared with the cache and must not be mutated.
     """
-    reader = _get_reader()
+    return cache.get_or_compute(ip, _lookup_uncached)
+
+
+def _lookup_uncached(ip: str) -> dict:
+    reader = _reader
     if reader is None:
         return {"country": "", "city": ""}
 
@@ -4,33 +4,139 @@ analytics events from the frontend and writes them to ClickHouse.
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
+import os
 import re
 from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+try:
+    import orjson
+
+    _loads = orjson.loads
+    _DecodeError: tuple[type[Exception], ...] = (orjson.JSONDecodeError,)
+except ImportError:  # stdlib fallback
+    _loads = json.loads
+    _DecodeError = (json.JSONDecodeError, ValueError)
 
 import config
-from models import CollectRequest, EventPayload
+import decoding
+import metrics
+from cache import LRUCache
+from models import (
+    MAX_COLLECT_EVENTS,
+    ContentEngagementRequest,
+    EventPayload,
+    validate_events,
+)
+from query import AnalyticsQueryClient, QueryTimeout, QueryUnavailable, rows as column_rows
+from query_cache import QueryCache
 from writer import ClickHouseWriter
 import geo
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
 logger = logging.getLogger("collector")
 
-writer = ClickHouseWriter()
+# One writer per worker process; nothing is shared between processes
+writer = ClickHouseWriter(
+    batch_size=config.FLUSH_BATCH_SIZE,
+    interval=config.FLUSH_INTERVAL_SECONDS,
+    max_rows=config.BUFFER_MAX_ROWS,
+    spill_dir=config.SPILL_DIR,
+)
+
+_INGEST_ENDPOINTS = ("collect", "beacon", "binary")
+
+# Analytics reads get their own pooled client so they never compete with inserts
+query_client = AnalyticsQueryClient()
+
+# Trending results per (hours, limit), served from memory
+_trending_cache = QueryCache(
+    ttl=config.TRENDING_CACHE_TTL_SECONDS,
+    stale_ttl=config.TRENDING_STALE_SECONDS,
+)
+
+# Per-(content_id, hours) engagement rows for the batch endpoint; None = no data
+_content_cache = LRUCache(config.CONTENT_CACHE_SIZE, config.CONTENT_CACHE_TTL_SECONDS)
+
+# Scrape-time views of writer and cache state
+metrics.Gauge(
+    "collector_buffer_depth", "Rows waiting in memory for the next flush.",
+    callback=lambda: writer.buffer_depth,
+)
+metrics.Gauge(
+    "collector_spill_pending_bytes", "Spilled bytes not yet replayed to ClickHouse.",
+    callback=lambda: writer.spool.pending_bytes if writer.spool else 0,
+)
+metrics.Counter(
+    "collector_spilled_rows_total", "Rows written to the on-disk spill.",
+    callback=lambda: writer.spool.spilled_rows if writer.spool else 0,
+)
+metrics.Counter(
+    "collector_replayed_rows_total", "Spilled rows replayed to ClickHouse.",
+    callback=lambda: writer.spool.replayed_rows if writer.spool else 0,
+)
+metrics.Counter(
+    "collector_dropped_rows_total", "Rows dropped because memory and spill were full.",
+    callback=lambda: writer.dropped_rows + (writer.spool.dropped_rows if writer.spool else 0),
+)
+
+
+def _cache_counts(field: str) -> dict[tuple[str, ...], float]:
+    caches = {"geo": geo.cache, "user_agent": _ua_cache, "content": _content_cache}
+    return {(name,): getattr(cache, field) for name, cache in caches.items()}
+
+
+metrics.Counter(
+    "collector_cache_hits_total", "Enrichment/query cache hits.", ("cache",),
+    callback=lambda: _cache_counts("hits"),
+)
+metrics.Counter(
+    "collector_cache_misses_total", "Enrichment/query cache misses.", ("cache",),
+    callback=lambda: _cache_counts("misses"),
+)
+metrics.Gauge(
+    "collector_cache_hit_ratio", "Hits / (hits + misses) since start.", ("cache",),
+    callback=lambda: {
+        (name,): stats["hit_rate"]
+        for name, stats in (
+            ("geo", geo.cache.stats()),
+            ("user_agent", _ua_cache.stats()),
+            ("content", _content_cache.stats()),
+        )
+    },
+)
+
+# Cap on per-event rejection details echoed back in a beacon response
+_MAX_REPORTED_REJECTIONS = 20
+
+# How often the event-loop lag probe wakes up
+_LOOP_LAG_INTERVAL_SECONDS = 0.5
 
 
 # ── App lifecycle ──────────────────────────────────────────────────────────────
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    await geo.check_reload()
+    geo_reload = asyncio.create_task(geo.reload_loop())
     await writer.start()
+    await query_client.start()
+    trending_refresh = asyncio.create_task(
+        _trending_cache.refresh_loop(config.TRENDING_CACHE_TTL_SECONDS)
+    )
+    lag_probe = asyncio.create_task(_probe_loop_lag())
     yield
+    lag_probe.cancel()
+    trending_refresh.cancel()
+    geo_reload.cancel()
+    await query_client.stop()
     await writer.stop()
 
 
@@ -47,11 +153,27 @@ app.add_middleware(
 
 # ── Helpers ────────────────────────────────────────────────────────────────────
 
+async def _probe_loop_lag() -> None:
+    """Record how late a fixed-interval sleep wakes up: time the loop was blocked."""
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(_LOOP_LAG_INTERVAL_SECONDS)
+        lag = max(0.0, loop.time() - started - _LOOP_LAG_INTERVAL_SECONDS)
+        metrics.event_loop_lag.observe(lag)
+
+
 _MOBILE_RE = re.compile(r"Mobile|Android|iPhone|iPad", re.IGNORECASE)
 _TABLET_RE = re.compile(r"iPad|Tablet", re.IGNORECASE)
 
+_ua_cache = LRUCache(config.UA_CACHE_SIZE, config.UA_CACHE_TTL_SECONDS)
+
 
 def _detect_device(ua: str) -> str:
+    return _ua_cache.get_or_compute(ua, _classify_device)
+
+
+def _classify_device(ua: str) -> str:
     if _TABLET_RE.search(ua):
         return "tablet"
     if _MOBILE_RE.search(ua):
@@ -68,30 +190,44 @@ def _extract_ip(request: Request) -> str:
     return ""
 
 
-def _enrich_event(event: EventPayload, request: Request) -> dict:
-    """Turn a raw EventPayload into a dict ready for the ClickHouse writer."""
+def _request_context(request: Request) -> dict:
+    """Enrichment shared by every event in a request (IP, UA, device, geo)."""
     ip = _extract_ip(request)
     ua = request.headers.get("user-agent", "")
     geo_info = geo.lookup(ip)
-
     return {
-        "event_type": event.event_type,
-        "user_id": event.user_id,
-        "session_id": event.session_id,
-        "content_id": event.content_id,
-        "content_type": event.content_type,
-        "category": event.category,
-        "timestamp": event.timestamp or datetime.now(timezone.utc).isoformat(),
-        "properties": event.properties,
         "ip": ip,
         "user_agent": ua,
         "device_type": _detect_device(ua),
         "country": geo_info["country"],
         "city": geo_info["city"],
-        "referrer": event.referrer,
     }
 
 
+def _enrich_events(events: list[EventPayload], request: Request) -> list[dict]:
+    """Turn raw EventPayloads into dicts ready for the ClickHouse writer.
+
+    Request-level context is computed once and shared across the batch.
+    """
+    ctx = _request_context(request)
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "event_type": event.event_type,
+            "user_id": event.user_id,
+            "session_id": event.session_id,
+            "content_id": event.content_id,
+            "content_type": event.content_type,
+            "category": event.category,
+            "timestamp": event.timestamp or now,
+            "properties": event.properties,
+            "referrer": event.referrer,
+            **ctx,
+        }
+        for event in events
+    ]
+
+
 # ── Routes ─────────────────────────────────────────────────────────────────────
 
 @app.get("/")
@@ -102,7 +238,10 @@ async def root():
         "endpoints": {
             "collect": "POST /collect",
             "beacon": "POST /collect/beacon",
+            "binary": "POST /collect/binary",
             "health": "GET /health",
+            "stats": "GET /stats",
+            "metrics": "GET /metrics",
         },
     }
 
@@ -112,58 +251,156 @@ async def health():
     return {"status": "ok"}
 
 
+@app.get("/stats")
+async def stats():
+    """Writer buffer/spill progress and enrichment cache hit rates.
+
+    With several workers each process keeps its own numbers; this reports
+    the one that served the request.
+    """
+    return {
+        "pid": os.getpid(),
+        "writer": writer.stats(),
+        "ingest": {
+            **{
+                ep: {
+                    "accepted": metrics.events_accepted.total(endpoint=ep),
+                    "rejected": metrics.events_rejected.total(endpoint=ep),
+                }
+                for ep in _INGEST_ENDPOINTS
+            },
+            "rejection_reasons": metrics.events_rejected.by("reason"),
+        },
+        "caches": {
+            "geo": geo.cache.stats(),
+            "user_agent": _ua_cache.stats(),
+            "trending": _trending_cache.stats(),
+            "content": _content_cache.stats(),
+        },
+    }
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus text exposition of this worker process's metrics."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+def _overloaded(endpoint: str) -> JSONResponse:
+    metrics.requests_overloaded.inc(endpoint=endpoint)
+    return JSONResponse(
+        {"error": "collector overloaded"},
+        status_code=503,
+        headers={"Retry-After": "5"},
+    )
+
+
 @app.post("/collect")
-async def collect(body: CollectRequest, request: Request):
-    """Ingest a batch of analytics events (JSON body)."""
-    count = 0
-    for event in body.events:
-        row = _enrich_event(event, request)
-        await writer.add(row)
-        count += 1
-    return {"accepted": count}
+async def collect(request: Request):
+    """Ingest a batch of analytics events (JSON body).
+
+    Like the beacon, invalid events are rejected one by one (and counted)
+    while the rest of the batch is accepted.
+    """
+    if writer.saturated:
+        return _overloaded("collect")
+    raw = await request.body()
+    try:
+        payload = _loads(raw)
+    except _DecodeError:
+        return JSONResponse({"error": "invalid JSON"}, status_code=400)
+
+    events = payload.get("events") if isinstance(payload, dict) else None
+    if isinstance(events, list) and len(events) > MAX_COLLECT_EVENTS:
+        return JSONResponse(
+            {"error": f"at most {MAX_COLLECT_EVENTS} events per request"}, status_code=413
+        )
+    return await _ingest_payload(payload, request, "collect")
 
 
 @app.post("/collect/beacon")
 async def collect_beacon(request: Request):
     """Ingest events via navigator.sendBeacon (plain-text body)."""
+    if writer.saturated:
+        return _overloaded("beacon")
     raw = await request.body()
     try:
-        payload = json.loads(raw)
-    except (json.JSONDecodeError, ValueError):
+        payload = _loads(raw)
+    except _DecodeError:
         return JSONResponse({"error": "invalid JSON"}, status_code=400)
 
-    events_raw = payload.get("events", [])
+    return await _ingest_payload(payload, request, "beacon")
+
+
+@app.post("/collect/binary")
+async def collect_binary(request: Request):
+    """Ingest a compact, optionally compressed batch of events.
+
+    The body format follows `Content-Type` (Avro per
+    `schemas/collect_request.avsc`, MessagePack, or JSON) and may be
+    compressed with `Content-Encoding: gzip` or `zstd`.
+    """
+    if writer.saturated:
+        return _overloaded("binary")
+    raw = await request.body()
+    try:
+        body = decoding.decompress(
+            raw, request.headers.get("content-encoding", ""), config.MAX_BODY_BYTES
+        )
+        payload = decoding.decode(body, request.headers.get("content-type", ""))
+    except decoding.UnsupportedEncoding as exc:
+        return JSONResponse({"error": str(exc)}, status_code=415)
+    except decoding.BodyDecodeError as exc:
+        return JSONResponse({"error": str(exc)}, status_code=400)
+
+    return await _ingest_payload(payload, request, "binary")
+
+
+async def _ingest_payload(payload, request: Request, endpoint: str):
+    """Validate, enrich and buffer a decoded ``{"events": [...]}`` payload."""
+    events_raw = payload.get("events", []) if isinstance(payload, dict) else None
     if not isinstance(events_raw, list):
         return JSONResponse({"error": "events must be an array"}, status_code=400)
 
-    count = 0
-    for evt in events_raw:
-        try:
-            event = EventPayload(**evt)
-            row = _enrich_event(event, request)
-            await writer.add(row)
-            count += 1
-        except Exception:
-            continue  # skip malformed events silently
+    events, rejected = validate_events(events_raw)
+    for rejection in rejected.values():
+        metrics.events_rejected.inc(endpoint=endpoint, reason=rejection.kind)
 
-    return {"accepted": count}
+    rows = _enrich_events(events, request)
+    await writer.add_batch(rows)
+    metrics.events_accepted.inc(len(rows), endpoint=endpoint)
+
+    response: dict = {"accepted": len(rows)}
+    if rejected:
+        response["rejected"] = len(rejected)
+        response["errors"] = [
+            {"index": i, "reason": rejection.reason}
+            for i, rejection in list(rejected.items())[:_MAX_REPORTED_REJECTIONS]
+        ]
+    return response
 
 
 # ── Analytics Query Endpoints ──────────────────────────────────────────────────
 
-def _query_ch(sql: str, params: dict | None = None) -> list[dict]:
-    """Run a ClickHouse query and return rows as dicts."""
-    if not writer._client:
-        return []
-    result = writer._client.query(sql, parameters=params or {})
-    columns = result.column_names
-    return [dict(zip(columns, row)) for row in result.result_rows]
+@app.exception_handler(QueryTimeout)
+async def _query_timeout_handler(request: Request, exc: QueryTimeout):
+    return JSONResponse({"error": str(exc)}, status_code=504)
+
+
+@app.exception_handler(QueryUnavailable)
+async def _query_unavailable_handler(request: Request, exc: QueryUnavailable):
+    return JSONResponse({"error": str(exc)}, status_code=503, headers={"Retry-After": "5"})
+
+
+async def _query_ch(sql: str, params: dict | None = None) -> list[dict]:
+    """Run a ClickHouse read query off-loop and return rows as dicts."""
+    return column_rows(await query_client.query(sql, params))
 
 
 @app.get("/analytics/content/{content_id}")
 async def analytics_content(content_id: str, hours: int = 168):
     """Engagement stats for a single content item (default: last 7 days)."""
-    rows = _query_ch(
+    rows = await _query_ch(
         """
         SELECT
             content_id,
@@ -188,10 +425,73 @@ async def analytics_content(content_id: str, hours: int = 168):
     return {"content_id": content_id, "data": rows[0]}
 
 
+@app.post("/analytics/content/batch")
+async def analytics_content_batch(body: ContentEngagementRequest):
+    """Engagement stats for many content items in one ClickHouse query.
+
+    IDs answered recently are served from a short-TTL per-ID cache; the
+    rest are fetched with a single IN-filtered aggregation. If that query
+    fails the request fails (503/504) and nothing is cached, so an outage
+    is never remembered as zero engagement.
+    """
+    ids = list(dict.fromkeys(body.content_ids))  # dedupe, keep order
+    cached = _content_cache.get_many((cid, body.hours) for cid in ids)
+    missing = [cid for cid in ids if (cid, body.hours) not in cached]
+
+    fetched: dict[str, dict] = {}
+    if missing:
+        rows = await _query_ch(
+            """
+            SELECT
+                content_id,
+                content_type,
+                category,
+                sum(views)          AS views,
+                sum(likes)          AS likes,
+                sum(saves)          AS saves,
+                sum(shares)         AS shares,
+                sum(comments)       AS comments,
+                sum(total_dwell_ms) AS total_dwell_ms,
+                sum(event_count)    AS event_count
+            FROM content_engagement_hourly
+            WHERE content_id IN {cids:Array(String)}
+              AND hour >= now() - INTERVAL {hrs:UInt32} HOUR
+            GROUP BY content_id, content_type, category
+            """,
+            {"cids": missing, "hrs": body.hours},
+        )
+        for row in rows:
+            fetched.setdefault(row["content_id"], row)
+        for cid in missing:
+            _content_cache.put((cid, body.hours), fetched.get(cid))
+
+    data = {
+        cid: cached[(cid, body.hours)] if (cid, body.hours) in cached else fetched.get(cid)
+        for cid in ids
+    }
+    return {"hours": body.hours, "data": data}
+
+
 @app.get("/analytics/trending")
-async def analytics_trending(hours: int = 24, limit: int = 20):
-    """Trending content by engagement score in the last N hours."""
-    rows = _query_ch(
+async def analytics_trending(
+    hours: int = Query(24, ge=1, le=24 * 90),
+    limit: int = Query(20, ge=1, le=100),
+):
+    """Trending content by engagement score in the last N hours.
+
+    Served from an in-process cache that is refreshed in the background
+    (see `query_cache.py`), so most calls never reach ClickHouse. While
+    ClickHouse is down the last good list keeps being served until it
+    ages out; with nothing cached the request fails with 503/504.
+    """
+    rows = await _trending_cache.get(
+        (hours, limit), lambda: _query_trending(hours, limit)
+    )
+    return {"hours": hours, "data": rows}
+
+
+async def _query_trending(hours: int, limit: int) -> list[dict]:
+    return await _query_ch(
         """
         SELECT
             content_id,
@@ -213,13 +513,12 @@ async def analytics_trending(hours: int = 24, limit: int = 20):
         """,
         {"hrs": hours, "lim": limit},
     )
-    return {"hours": hours, "data": rows}
 
 
 @app.get("/analytics/user/{user_id}/summary")
 async def analytics_user_summary(user_id: str, days: int = 30):
     """User engagement summary for the last N days."""
-    rows = _query_ch(
+    rows = await _query_ch(
         """
         SELECT
             user_id,
@@ -251,8 +550,50 @@ async def analytics_user_summary(user_id: str, days: int = 30):
     return {"user_id": user_id, "data": data}
 
 
+@app.get("/analytics/session/{session_id}")
+async def analytics_session(session_id: str):
+    """Rolling counters for one session, from the ingest-time session rollup."""
+    rows = await _query_ch(
+        """
+        SELECT
+            session_id,
+            max(user_id)             AS user_id,
+            min(started_at)          AS started_at,
+            max(last_seen_at)        AS last_seen_at,
+            sum(event_count)         AS event_count,
+            sum(views)               AS views,
+            sum(total_dwell_ms)      AS total_dwell_ms,
+            max(max_scroll_depth)    AS max_scroll_depth,
+            max(max_media_progress)  AS max_media_progress,
+            uniqMerge(unique_content) AS unique_content
+        FROM session_activity
+        WHERE session_id = {sid:String}
+        GROUP BY session_id
+        """,
+        {"sid": session_id},
+    )
+    if not rows:
+        return {"session_id": session_id, "data": None}
+    data = rows[0]
+    for k in ("started_at", "last_seen_at"):
+        if k in data and hasattr(data[k], "isoformat"):
+            data[k] = data[k].isoformat()
+    return {"session_id": session_id, "data": data}
+
+
 # ── Entry point ────────────────────────────────────────────────────────────────
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=config.PORT, reload=True)
+
+    # --reload is single-process by nature; workers are for serving
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=config.PORT,
+        reload=config.RELOAD,
+        workers=None if config.RELOAD else config.WORKERS,
+        proxy_headers=True,
+        forwarded_allow_ips="*",
+        timeout_graceful_shutdown=config.SHUTDOWN_TIMEOUT_SECONDS,
+    )
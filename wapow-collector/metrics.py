@@ -0,0 +1,226 @@
+"""Minimal in-process metrics with Prometheus text exposition.
+
+Counters, gauges and histograms register themselves in a module-level
+registry; `render()` produces the text served on `GET /metrics`. Each
+uvicorn worker process has its own registry, so every sample carries a
+`pid` label to tell workers apart when a scrape lands on one of them.
+
+Some metrics are updated from the writer's insert thread while `/metrics`
+renders on the event loop, so each metric guards its series with a lock
+and renders from a snapshot.
+"""
+
+from __future__ import annotations
+
+import bisect
+import math
+import os
+import threading
+from typing import Callable, Iterable
+
+_registry: list["_Metric"] = []
+_PID = str(os.getpid())
+
+LabelValues = tuple[str, ...]
+
+
+def _fmt_labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    pairs.append(f'pid="{_PID}"')
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+
+class _SimpleMetric(_Metric):
+    """Single-number series, stored or read from a callback at scrape time.
+
+    A callback returns a number, or for labelled metrics a mapping of
+    label-value tuples to numbers.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        callback: Callable[[], float | dict[LabelValues, float]] | None = None,
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: dict[LabelValues, float] = {}
+        self._callback = callback
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            values = dict(self._values)
+        if self._callback is not None:
+            result = self._callback()
+            if isinstance(result, dict):
+                values.update(result)
+            else:
+                values[()] = result
+        return [
+            f"{self.name}{_fmt_labels(self.labelnames, key)} {_fmt_value(v)}"
+            for key, v in values.items()
+        ]
+
+
+class Counter(_SimpleMetric):
+    """Monotonically increasing count, optionally split by labels."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def total(self, **labels: str) -> float:
+        """Sum of every series whose labels include `labels`."""
+        idx = [(self.labelnames.index(n), str(v)) for n, v in labels.items()]
+        with self._lock:
+            values = list(self._values.items())
+        return sum(v for key, v in values if all(key[i] == want for i, want in idx))
+
+    def by(self, labelname: str) -> dict[str, float]:
+        """Totals grouped by one label."""
+        i = self.labelnames.index(labelname)
+        with self._lock:
+            values = list(self._values.items())
+        out: dict[str, float] = {}
+        for key, v in values:
+            out[key[i]] = out.get(key[i], 0) + v
+        return out
+
+
+class Gauge(_SimpleMetric):
+    """Point-in-time value, either set directly or read from a callback."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram (Prometheus semantics)."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        buckets: Iterable[float],
+        labelnames: tuple[str, ...] = (),
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = sorted(buckets)
+        # key → (per-bucket counts incl. +Inf, sum)
+        self._series: dict[LabelValues, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        bucket = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = ([0] * (len(self.buckets) + 1), [0.0])
+                self._series[key] = series
+            counts, total = series
+            counts[bucket] += 1
+            total[0] += value
+
+    def _samples(self) -> list[str]:
+        # Copy under the lock so each series' buckets, sum and count agree
+        with self._lock:
+            snapshot = [(key, list(counts), total[0]) for key, (counts, total) in self._series.items()]
+        lines = []
+        for key, counts, total in snapshot:
+            running = 0
+            for bound, count in zip([*self.buckets, math.inf], counts):
+                running += count
+                le = f'le="{_fmt_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_fmt_labels(self.labelnames, key, le)} {running}"
+                )
+            labels = _fmt_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_fmt_value(total)}")
+            lines.append(f"{self.name}_count{labels} {running}")
+        return lines
+
+
+def render() -> str:
+    """All registered metrics in Prometheus text format (version 0.0.4)."""
+    lines: list[str] = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ── Collector metrics ──────────────────────────────────────────────────────────
+
+events_accepted = Counter(
+    "collector_events_accepted_total", "Events accepted for writing.", ("endpoint",)
+)
+events_rejected = Counter(
+    "collector_events_rejected_total",
+    "Events rejected by validation, by pydantic error type.",
+    ("endpoint", "reason"),
+)
+requests_overloaded = Counter(
+    "collector_requests_overloaded_total", "Ingest requests refused with 503.", ("endpoint",)
+)
+flush_duration = Histogram(
+    "collector_flush_duration_seconds",
+    "Wall time of one ClickHouse insert.",
+    (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    ("result",),
+)
+rows_per_insert = Histogram(
+    "collector_rows_per_insert",
+    "Rows sent in one ClickHouse insert.",
+    (1, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10000),
+)
+flush_retries = Counter(
+    "collector_flush_retries_total", "Failed flush attempts that will be retried.", ("reason",)
+)
+event_loop_lag = Histogram(
+    "collector_event_loop_lag_seconds",
+    "How late the event loop ran a timer scheduled on it.",
+    (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
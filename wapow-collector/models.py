@@ -1,8 +1,8 @@
 """Pydantic models for the event collector."""
 
 from __future__ import annotations
-from typing import Optional
-from pydantic import BaseModel, Field
+from typing import Any, NamedTuple, Optional
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
 
 
 class EventPayload(BaseModel):
@@ -21,7 +21,42 @@ class EventPayload(BaseModel):
     referrer: str = ""
 
 
-class CollectRequest(BaseModel):
-    """Batch of events sent by the frontend SDK."""
+# Largest `events` array accepted on /collect (the UI flushes at 20)
+MAX_COLLECT_EVENTS = 200
 
-    events: list[EventPayload] = Field(..., min_length=1, max_length=200)
+
+class ContentEngagementRequest(BaseModel):
+    """Engagement lookup for a grid of content tiles."""
+
+    content_ids: list[str] = Field(..., min_length=1, max_length=500)
+    hours: int = Field(168, ge=1, le=24 * 90)
+
+
+_events_adapter = TypeAdapter(list[EventPayload])
+
+
+class Rejection(NamedTuple):
+    """Why one event failed validation."""
+
+    reason: str  # human-readable, e.g. "event_type: Field required"
+    kind: str  # pydantic error type, e.g. "missing" — a small fixed set, safe as a metric label
+
+
+def validate_events(items: list[Any]) -> tuple[list[EventPayload], dict[int, Rejection]]:
+    """Validate a raw events array in one pass of pydantic's compiled validator.
+
+    Returns the valid events (in order) and a map of rejected index → Rejection.
+    The common all-valid case costs a single `validate_python` call; on
+    failure the offending indices are read from the error locations and the
+    remaining items are validated again as one batch.
+    """
+    try:
+        return _events_adapter.validate_python(items), {}
+    except ValidationError as exc:
+        rejected: dict[int, Rejection] = {}
+        for err in exc.errors(include_url=False):
+            loc = err["loc"]
+            field = ".".join(str(part) for part in loc[1:]) or "event"
+            rejected.setdefault(loc[0], Rejection(f"{field}: {err['msg']}", err["type"]))
+    valid = [item for i, item in enumerate(items) if i not in rejected]
+    return _events_adapter.validate_python(valid), rejected
@@ -0,0 +1,160 @@
+"""Pooled, off-loop ClickHouse client for the analytics read endpoints.
+
+Kept separate from the writer's insert client so analytics reads never
+queue behind (or block) ingest. Queries run on a small thread pool
+sharing one session-less HTTP client, each bounded both server-side
+(`max_execution_time`) and client-side (an asyncio timeout). The
+server-side limit is what is left of the client timeout when the query
+leaves the pool queue, so work the caller gave up on is killed by
+ClickHouse rather than holding a pool thread. Results come back
+column-wise.
+
+Failures raise rather than return an empty result, so callers never
+mistake an outage for "no rows": `QueryUnavailable` when ClickHouse
+cannot be reached or rejects the query (e.g. a table missing before its
+migration ran), `QueryTimeout` when a query runs too long.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import clickhouse_connect
+from clickhouse_connect.driver import httputil
+from clickhouse_connect.driver.exceptions import DatabaseError, OperationalError
+
+from config import (
+    CLICKHOUSE_DB,
+    CLICKHOUSE_HOST,
+    CLICKHOUSE_PASSWORD,
+    CLICKHOUSE_PORT,
+    CLICKHOUSE_USER,
+    QUERY_MAX_EXECUTION_SECONDS,
+    QUERY_POOL_SIZE,
+    QUERY_TIMEOUT_SECONDS,
+)
+
+logger = logging.getLogger("collector.query")
+
+# ClickHouse error code for max_execution_time exceeded
+_TIMEOUT_EXCEEDED = "Code: 159."
+
+
+class QueryTimeout(Exception):
+    """An analytics query did not finish within its timeout."""
+
+
+class QueryUnavailable(Exception):
+    """ClickHouse could not be reached to run an analytics query."""
+
+
+class AnalyticsQueryClient:
+    """Thread-pooled ClickHouse reader with per-query timeouts."""
+
+    def __init__(
+        self,
+        pool_size: int = QUERY_POOL_SIZE,
+        timeout: float = QUERY_TIMEOUT_SECONDS,
+        max_execution_time: int = QUERY_MAX_EXECUTION_SECONDS,
+    ) -> None:
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.max_execution_time = max_execution_time
+        self._client = None
+        self._connect_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=pool_size, thread_name_prefix="clickhouse-query"
+        )
+
+    # ── lifecycle ──────────────────────────────────────────────────────
+
+    async def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._connect)
+
+    async def stop(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._client:
+            self._client.close()
+
+    # ── public API ─────────────────────────────────────────────────────
+
+    async def query(
+        self,
+        sql: str,
+        params: dict | None = None,
+        timeout: float | None = None,
+    ) -> dict[str, list[Any]]:
+        """Run a read query off the event loop; return ``{column: values}``.
+
+        Raises `QueryUnavailable` if ClickHouse is unreachable and
+        `QueryTimeout` if the query outlives its timeout.
+        """
+        timeout = timeout or self.timeout
+        deadline = time.monotonic() + timeout
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, self._run, sql, params or {}, deadline)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise QueryTimeout(f"query exceeded {timeout:.1f}s") from None
+
+    # ── internal ───────────────────────────────────────────────────────
+
+    def _connect(self) -> None:
+        try:
+            self._client = clickhouse_connect.get_client(
+                host=CLICKHOUSE_HOST,
+                port=CLICKHOUSE_PORT,
+                database=CLICKHOUSE_DB,
+                username=CLICKHOUSE_USER,
+                password=CLICKHOUSE_PASSWORD,
+                # No session: a session would serialise concurrent queries
+                autogenerate_session_id=False,
+                pool_mgr=httputil.get_pool_manager(maxsize=self.pool_size),
+                send_receive_timeout=self.timeout,
+            )
+        except Exception:
+            logger.warning(
+                "Could not connect query client to ClickHouse at %s:%s",
+                CLICKHOUSE_HOST,
+                CLICKHOUSE_PORT,
+            )
+            self._client = None
+
+    def _run(self, sql: str, params: dict, deadline: float) -> dict[str, list[Any]]:
+        """Blocking query; runs on a pool thread."""
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            # Waited out its timeout in the pool queue; the caller is gone
+            raise QueryTimeout("query timed out before it started")
+        if self._client is None:
+            with self._connect_lock:
+                if self._client is None:
+                    self._connect()
+        if self._client is None:
+            raise QueryUnavailable("ClickHouse is unreachable")
+        try:
+            result = self._client.query(
+                sql,
+                parameters=params,
+                settings={"max_execution_time": min(self.max_execution_time, int(remaining) or 1)},
+            )
+        except OperationalError as exc:
+            raise QueryUnavailable(f"ClickHouse query failed: {exc}") from None
+        except DatabaseError as exc:
+            if _TIMEOUT_EXCEEDED in str(exc):
+                raise QueryTimeout("query exceeded max_execution_time") from None
+            raise QueryUnavailable(f"ClickHouse rejected query: {exc}") from None
+        return dict(zip(result.column_names, result.result_columns))
+
+
+def rows(columns: dict[str, list[Any]]) -> list[dict]:
+    """Turn a column-wise result into a list of row dicts."""
+    names = list(columns)
+    return [dict(zip(names, values)) for values in zip(*columns.values())]
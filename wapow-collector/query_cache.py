@@ -0,0 +1,129 @@
+"""In-process result cache for analytics queries.
+
+Entries are served from memory while fresh (`ttl`). Once stale they are
+still served for up to `stale_ttl` seconds while a single background
+refresh runs (stale-while-revalidate). `refresh_loop()` additionally
+re-runs recently requested keys on a schedule, so hot keys are normally
+refreshed before any request sees them stale.
+
+Loaders must raise on failure (e.g. `QueryUnavailable`), never return a
+placeholder: a failed refresh keeps the previous value with its original
+fetch time, so it ages out normally instead of being replaced. Once it is
+past `ttl + stale_ttl`, a failed load drops it and raises.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Hashable
+
+logger = logging.getLogger("collector.query_cache")
+
+Loader = Callable[[], Awaitable[Any]]
+
+
+@dataclass
+class _Entry:
+    value: Any
+    loader: Loader
+    fetched_at: float
+    last_access: float = field(default_factory=time.monotonic)
+
+
+class QueryCache:
+    """TTL + stale-while-revalidate cache keyed by query parameters."""
+
+    def __init__(self, ttl: float, stale_ttl: float, max_entries: int = 256) -> None:
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refresh_failures = 0
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+
+    async def get(self, key: Hashable, loader: Loader) -> Any:
+        """Return the cached value for `key`, loading it with `loader` if needed."""
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = now - entry.fetched_at
+            if age < self.ttl + self.stale_ttl:
+                entry.last_access = now
+                self._entries.move_to_end(key)
+                if age < self.ttl:
+                    self.hits += 1
+                else:
+                    self.stale_hits += 1
+                    self._refresh(key, loader)
+                return entry.value
+
+        self.misses += 1
+        return await asyncio.shield(self._refresh(key, loader))
+
+    async def refresh_loop(self, interval: float) -> None:
+        """Periodically refresh keys requested within the last `stale_ttl` seconds."""
+        while True:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            for key, entry in list(self._entries.items()):
+                if now - entry.last_access > self.stale_ttl:
+                    del self._entries[key]  # nobody asked for it lately
+                elif now - entry.fetched_at >= interval:
+                    self._refresh(key, entry.loader)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refresh_failures": self.refresh_failures,
+        }
+
+    # ── internal ───────────────────────────────────────────────────────
+
+    def _refresh(self, key: Hashable, loader: Loader) -> asyncio.Task:
+        """Start (or join) the single in-flight load for `key`."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._load(key, loader))
+            # Background refreshes are not awaited; consume their errors here
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[key] = task
+        return task
+
+    async def _load(self, key: Hashable, loader: Loader) -> Any:
+        try:
+            value = await loader()
+        except Exception as exc:
+            self.refresh_failures += 1
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry.fetched_at >= self.ttl + self.stale_ttl:
+                # Nothing left that may still be served
+                self._entries.pop(key, None)
+                logger.warning("Loading %r failed: %s", key, exc)
+                raise
+            # Keep serving the last good result; do not store anything
+            logger.warning("Refreshing %r failed, keeping previous value: %s", key, exc)
+            return entry.value
+        finally:
+            self._inflight.pop(key, None)
+
+        previous = self._entries.get(key)
+        self._entries[key] = _Entry(
+            value=value,
+            loader=loader,
+            fetched_at=time.monotonic(),
+            last_access=previous.last_access if previous else time.monotonic(),
+        )
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return value
@@ -0,0 +1,276 @@
+"""Append-only on-disk spool for rows that could not be written to ClickHouse.
+
+When ClickHouse is unreachable the writer keeps at most `BUFFER_MAX_ROWS`
+rows in memory and spills the oldest overflow here. Rows are stored as
+JSON lines in numbered segment files and replayed oldest-first once
+inserts succeed again. A small `.pos` sidecar records how far into a
+segment replay has got, so a restart mid-replay does not re-insert rows.
+A line left half-written by a crash is cut off when the spool is opened,
+so the next append does not run into it.
+
+With several collector worker processes, each one claims its own
+`slot-<n>` subdirectory (see `SpillSlot`) so segment files are never
+shared. Slots are numbered rather than keyed by PID, so data left behind
+by a crashed worker is replayed by whichever process claims that slot
+next. Slots nobody claims any more (e.g. after lowering `WORKERS`) are
+picked up with `SpillSlot.adopt_orphans` at start-up and replayed by a
+running worker.
+
+All methods are blocking and are meant to run on the writer's executor
+thread, which also serialises access to the spool.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import json
+import logging
+import os
+from typing import Any, Callable
+
+logger = logging.getLogger("collector.spool")
+
+_SEGMENT_PREFIX = "segment-"
+_SEGMENT_SUFFIX = ".jsonl"
+_MAX_SLOTS = 256
+
+
+class SpillSlot:
+    """Exclusive, per-process subdirectory of the shared spill directory."""
+
+    def __init__(self, path: str, lock_fd: int) -> None:
+        self.path = path
+        self._lock_fd = lock_fd
+
+    @classmethod
+    def claim(cls, base: str) -> "SpillSlot":
+        """Lock and return the lowest-numbered free slot under `base`."""
+        os.makedirs(base, exist_ok=True)
+        for n in range(_MAX_SLOTS):
+            path = os.path.join(base, f"slot-{n}")
+            fd = os.open(path + ".lock", os.O_CREAT | os.O_RDWR, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                continue
+            os.makedirs(path, exist_ok=True)
+            logger.info("Using spill slot %s", path)
+            return cls(path, fd)
+        raise OSError(f"No free spill slot under {base}")
+
+    @classmethod
+    def adopt_orphans(cls, base: str, own: "SpillSlot") -> list["SpillSlot"]:
+        """Lock every other slot under `base` that holds segments but has no owner."""
+        adopted = []
+        for name in sorted(os.listdir(base)):
+            path = os.path.join(base, name)
+            if not name.startswith("slot-") or path == own.path or not os.path.isdir(path):
+                continue
+            if not any(
+                n.startswith(_SEGMENT_PREFIX) and n.endswith(_SEGMENT_SUFFIX)
+                for n in os.listdir(path)
+            ):
+                continue
+            fd = os.open(path + ".lock", os.O_CREAT | os.O_RDWR, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)  # a running worker owns it
+                continue
+            adopted.append(cls(path, fd))
+        return adopted
+
+    def release(self) -> None:
+        if self._lock_fd >= 0:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+            os.close(self._lock_fd)
+            self._lock_fd = -1
+
+
+class SpillSpool:
+    """Ordered, size-capped spill area made of append-only segment files."""
+
+    def __init__(self, directory: str, segment_bytes: int, max_bytes: int) -> None:
+        self._dir = directory
+        self._segment_bytes = segment_bytes
+        self._max_bytes = max_bytes
+
+        # Metrics
+        self.spilled_rows = 0
+        self.spilled_bytes = 0
+        self.replayed_rows = 0
+        self.dropped_rows = 0
+
+        os.makedirs(self._dir, exist_ok=True)
+        segments = self._segments()
+        if segments:
+            # New rows are appended to the newest segment; make sure they
+            # start on a line of their own after a crash mid-append
+            self._truncate_torn_tail(segments[-1])
+        self.pending_bytes = sum(
+            os.path.getsize(p) - self._read_pos(p) for p in self._segments()
+        )
+        if self.pending_bytes:
+            logger.info(
+                "Found %d bytes of spilled events in %s — will replay",
+                self.pending_bytes,
+                self._dir,
+            )
+
+    # ── public API ─────────────────────────────────────────────────────
+
+    @property
+    def has_pending(self) -> bool:
+        return self.pending_bytes > 0
+
+    @property
+    def full(self) -> bool:
+        return self.pending_bytes >= self._max_bytes
+
+    def append(self, rows: list[list[Any]]) -> int:
+        """Append rows to the newest segment; return how many were written.
+
+        Rows that would push the spool past `max_bytes` are dropped.
+        """
+        lines: list[str] = []
+        size = 0
+        for row in rows:
+            line = json.dumps(row, default=str) + "\n"
+            if self.pending_bytes + size + len(line) > self._max_bytes:
+                break
+            lines.append(line)
+            size += len(line)
+
+        dropped = len(rows) - len(lines)
+        if dropped:
+            self.dropped_rows += dropped
+            logger.error("Spill area full — dropped %d events", dropped)
+        if not lines:
+            return 0
+
+        with open(self._active_segment(), "a", encoding="utf-8") as f:
+            f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+        self.pending_bytes += size
+        self.spilled_bytes += size
+        self.spilled_rows += len(lines)
+        return len(lines)
+
+    def replay(
+        self,
+        insert: Callable[[list[list[Any]]], None],
+        batch_size: int,
+    ) -> int:
+        """Feed spilled rows to `insert` in order, oldest segment first.
+
+        Progress is committed after every successful batch. If `insert`
+        raises, the exception propagates and replay resumes from the last
+        committed position next time. Returns the number of rows replayed.
+        """
+        replayed = 0
+        for path in self._segments():
+            pos = self._read_pos(path)
+            with open(path, "r", encoding="utf-8") as f:
+                f.seek(pos)
+                while True:
+                    rows: list[list[Any]] = []
+                    size = 0
+                    for line in f:
+                        size += len(line.encode("utf-8"))
+                        try:
+                            rows.append(json.loads(line))
+                        except ValueError:
+                            # Torn write from a crash mid-append
+                            logger.warning("Skipping corrupt spill line in %s", path)
+                            continue
+                        if len(rows) >= batch_size:
+                            break
+                    if not rows:
+                        if size:
+                            pos += size
+                            self.pending_bytes = max(0, self.pending_bytes - size)
+                        break
+                    insert(rows)
+                    pos += size
+                    self._write_pos(path, pos)
+                    self.pending_bytes = max(0, self.pending_bytes - size)
+                    self.replayed_rows += len(rows)
+                    replayed += len(rows)
+            self._remove(path)
+        return replayed
+
+    def stats(self) -> dict:
+        return {
+            "pending_bytes": self.pending_bytes,
+            "pending_segments": len(self._segments()),
+            "spilled_rows": self.spilled_rows,
+            "spilled_bytes": self.spilled_bytes,
+            "replayed_rows": self.replayed_rows,
+            "dropped_rows": self.dropped_rows,
+        }
+
+    # ── internal ───────────────────────────────────────────────────────
+
+    def _segments(self) -> list[str]:
+        names = sorted(
+            n
+            for n in os.listdir(self._dir)
+            if n.startswith(_SEGMENT_PREFIX) and n.endswith(_SEGMENT_SUFFIX)
+        )
+        return [os.path.join(self._dir, n) for n in names]
+
+    def _active_segment(self) -> str:
+        segments = self._segments()
+        if segments and os.path.getsize(segments[-1]) < self._segment_bytes:
+            return segments[-1]
+        seq = 0
+        if segments:
+            name = os.path.basename(segments[-1])
+            seq = int(name[len(_SEGMENT_PREFIX):-len(_SEGMENT_SUFFIX)]) + 1
+        return os.path.join(self._dir, f"{_SEGMENT_PREFIX}{seq:012d}{_SEGMENT_SUFFIX}")
+
+    def _truncate_torn_tail(self, path: str) -> None:
+        """Cut a partial last line (no trailing newline) off `path`."""
+        with open(path, "rb+") as f:
+            end = f.seek(0, os.SEEK_END)
+            keep = 0
+            pos = end
+            while pos > 0:
+                step = min(pos, 64 * 1024)
+                f.seek(pos - step)
+                newline = f.read(step).rfind(b"\n")
+                if newline >= 0:
+                    keep = pos - step + newline + 1
+                    break
+                pos -= step
+            if keep == end:
+                return
+            f.truncate(keep)
+        self.dropped_rows += 1
+        logger.warning("Dropped a torn spill line (%d bytes) at the end of %s", end - keep, path)
+
+    @staticmethod
+    def _read_pos(path: str) -> int:
+        try:
+            with open(path + ".pos", "r", encoding="utf-8") as f:
+                return int(f.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    @staticmethod
+    def _write_pos(path: str, pos: int) -> None:
+        tmp = path + ".pos.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(str(pos))
+        os.replace(tmp, path + ".pos")
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        for p in (path, path + ".pos"):
+            try:
+                os.remove(p)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,10 @@
+"""The collector's modules are imported top-level (`import writer`), as in the image.
+
+Run from `wapow-collector/` (needs `pip install -r tests/requirements.txt`):
+
+    python -m pytest tests
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
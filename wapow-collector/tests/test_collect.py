@@ -0,0 +1,41 @@
+"""/collect validates events one by one and counts rejections per endpoint."""
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import metrics
+from models import MAX_COLLECT_EVENTS
+
+
+@pytest.fixture
+def client():
+    # No lifespan: the writer only buffers, nothing is sent to ClickHouse
+    return TestClient(main.app)
+
+
+def test_invalid_events_are_rejected_and_counted(client):
+    before = metrics.events_rejected.total(endpoint="collect")
+
+    response = client.post(
+        "/collect",
+        json={"events": [{"event_type": "view", "session_id": "s1"}, {"session_id": "s1"}]},
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "accepted": 1,
+        "rejected": 1,
+        "errors": [{"index": 1, "reason": "event_type: Field required"}],
+    }
+    assert metrics.events_rejected.total(endpoint="collect") == before + 1
+    assert metrics.events_rejected.total(endpoint="collect", reason="missing") >= 1
+
+
+def test_malformed_json_is_a_400(client):
+    assert client.post("/collect", content=b"{not json").status_code == 400
+
+
+def test_oversized_batch_is_refused(client):
+    events = [{"event_type": "view"}] * (MAX_COLLECT_EVENTS + 1)
+
+    assert client.post("/collect", json={"events": events}).status_code == 413
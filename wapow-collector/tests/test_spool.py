@@ -0,0 +1,150 @@
+"""On-disk spill spool: ordering, replay progress, torn lines, the size cap and slots."""
+import json
+import os
+
+import pytest
+
+from spool import SpillSlot, SpillSpool
+
+
+class FlakyInsert:
+    """`insert` callable that raises for the calls numbered in `fail_on`."""
+
+    def __init__(self, fail_on=()):
+        self.fail_on = set(fail_on)
+        self.calls = 0
+        self.rows = []
+
+    def __call__(self, rows):
+        self.calls += 1
+        if self.calls in self.fail_on:
+            raise ConnectionError("ClickHouse unreachable")
+        self.rows.extend(rows)
+
+
+def _rows(start, stop):
+    return [[f"e{i}", i] for i in range(start, stop)]
+
+
+def _segments(path):
+    return sorted(n for n in os.listdir(path) if n.endswith(".jsonl"))
+
+
+def test_replay_is_oldest_first_across_segments(tmp_path):
+    spool = SpillSpool(str(tmp_path), segment_bytes=40, max_bytes=1 << 20)
+    for start in range(0, 12, 3):
+        assert spool.append(_rows(start, start + 3)) == 3
+    assert len(_segments(tmp_path)) > 1
+
+    insert = FlakyInsert()
+    assert spool.replay(insert, batch_size=5) == 12
+
+    assert insert.rows == _rows(0, 12)
+    assert not spool.has_pending
+    assert _segments(tmp_path) == []
+
+
+def test_failed_replay_resumes_from_the_committed_position(tmp_path):
+    spool = SpillSpool(str(tmp_path), segment_bytes=1 << 20, max_bytes=1 << 20)
+    spool.append(_rows(0, 10))
+
+    insert = FlakyInsert(fail_on={2})
+    with pytest.raises(ConnectionError):
+        spool.replay(insert, batch_size=4)
+    assert insert.rows == _rows(0, 4)
+
+    # A restart reads the `.pos` sidecar instead of starting over
+    reopened = SpillSpool(str(tmp_path), segment_bytes=1 << 20, max_bytes=1 << 20)
+    assert reopened.pending_bytes == spool.pending_bytes
+    assert reopened.replay(insert, batch_size=4) == 6
+    assert insert.rows == _rows(0, 10)
+
+
+def test_torn_tail_is_cut_off_when_the_spool_is_opened(tmp_path):
+    spool = SpillSpool(str(tmp_path), segment_bytes=1 << 20, max_bytes=1 << 20)
+    spool.append(_rows(0, 2))
+    segment = tmp_path / _segments(tmp_path)[0]
+    with open(segment, "a", encoding="utf-8") as f:
+        f.write('["e2", ')  # crash mid-append
+
+    reopened = SpillSpool(str(tmp_path), segment_bytes=1 << 20, max_bytes=1 << 20)
+    assert reopened.dropped_rows == 1
+    assert reopened.pending_bytes == os.path.getsize(segment)
+    reopened.append(_rows(3, 5))
+
+    insert = FlakyInsert()
+    assert reopened.replay(insert, batch_size=10) == 4
+    assert insert.rows == _rows(0, 2) + _rows(3, 5)
+
+
+def test_corrupt_line_in_an_older_segment_is_skipped(tmp_path):
+    (tmp_path / "segment-000000000000.jsonl").write_text(
+        json.dumps(["e0", 0]) + "\n" + '["e1", \n' + json.dumps(["e2", 2]) + "\n"
+    )
+    spool = SpillSpool(str(tmp_path), segment_bytes=1 << 20, max_bytes=1 << 20)
+    spool.append(_rows(3, 4))
+
+    insert = FlakyInsert()
+    assert spool.replay(insert, batch_size=10) == 3
+    assert insert.rows == [["e0", 0], ["e2", 2], ["e3", 3]]
+    assert spool.pending_bytes == 0
+
+
+def test_append_stops_at_max_bytes_and_counts_drops(tmp_path):
+    line = len(json.dumps(_rows(0, 1)[0])) + 1
+    spool = SpillSpool(str(tmp_path), segment_bytes=1 << 20, max_bytes=line * 3)
+
+    assert spool.append(_rows(0, 5)) == 3
+    assert spool.full
+    assert spool.dropped_rows == 2
+    assert spool.append(_rows(5, 6)) == 0
+    assert spool.dropped_rows == 3
+    assert spool.stats()["spilled_rows"] == 3
+
+    spool.replay(FlakyInsert(), batch_size=10)
+    assert not spool.full
+    assert spool.append(_rows(6, 7)) == 1
+
+
+def test_claims_in_one_process_get_different_slots(tmp_path):
+    # flock locks belong to the open file, so separate fds exclude each other
+    first = SpillSlot.claim(str(tmp_path))
+    second = SpillSlot.claim(str(tmp_path))
+    try:
+        assert first.path == str(tmp_path / "slot-0")
+        assert second.path == str(tmp_path / "slot-1")
+    finally:
+        first.release()
+        second.release()
+
+    again = SpillSlot.claim(str(tmp_path))
+    assert again.path == str(tmp_path / "slot-0")
+    again.release()
+
+
+def test_adopt_orphans_takes_unowned_slots_with_segments(tmp_path):
+    base = str(tmp_path)
+    own = SpillSlot.claim(base)
+    busy = SpillSlot.claim(base)
+    SpillSpool(busy.path, 1 << 20, 1 << 20).append(_rows(0, 1))
+    orphan = tmp_path / "slot-2"
+    SpillSpool(str(orphan), 1 << 20, 1 << 20).append(_rows(0, 1))
+    (tmp_path / "slot-3").mkdir()  # unowned but empty
+
+    adopted = SpillSlot.adopt_orphans(base, own)
+    try:
+        assert [slot.path for slot in adopted] == [str(orphan)]
+        # While adopted, the slot is skipped by workers claiming one
+        claimed = SpillSlot.claim(base)
+        assert claimed.path == str(tmp_path / "slot-3")
+        claimed.release()
+    finally:
+        for slot in adopted:
+            slot.release()
+
+    # Released again: the next claim past the live slots gets it
+    claimed = SpillSlot.claim(base)
+    assert claimed.path == str(orphan)
+    claimed.release()
+    own.release()
+    busy.release()
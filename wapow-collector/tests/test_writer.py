@@ -0,0 +1,235 @@
+"""ClickHouseWriter: column buffer, row normalisation, the in-memory bound and spilling."""
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+import writer
+from writer import (
+    _COLUMNS,
+    _IDX_TS,
+    _TYPED_PROPERTIES,
+    ClickHouseWriter,
+    _as_uint,
+    _ColumnBuffer,
+    _normalize,
+)
+
+_IDX_CONTENT = _COLUMNS.index("content_id")
+
+
+class FakeClient:
+    """Records inserted content ids; raises while `down` is set."""
+
+    def __init__(self):
+        self.down = False
+        self.content_ids = []
+
+    def insert(self, table, data, column_names, column_oriented):
+        if self.down:
+            raise ConnectionError("ClickHouse unreachable")
+        self.content_ids.extend(data[column_names.index("content_id")])
+
+    def close(self):
+        pass
+
+
+def _events(start, stop):
+    return [{"event_type": "page_view", "content_id": f"c{i}"} for i in range(start, stop)]
+
+
+def _ids(start, stop):
+    return [f"c{i}" for i in range(start, stop)]
+
+
+def _columns(rows):
+    return [[row.get(col, "") for row in rows] for col in _COLUMNS]
+
+
+def _legacy_row(row):
+    """The row-wise path `_normalize` replaced, for the pre-typed columns."""
+    ordered = [row.get(col, "") for col in _COLUMNS[:_COLUMNS.index("dwell_time_ms")]]
+    idx_props = _COLUMNS.index("properties")
+    if isinstance(ordered[idx_props], dict):
+        ordered[idx_props] = json.dumps(ordered[idx_props])
+    elif not ordered[idx_props]:
+        ordered[idx_props] = "{}"
+    ts = ordered[_IDX_TS]
+    if isinstance(ts, str) and ts:
+        ordered[_IDX_TS] = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+    return ordered
+
+
+def test_column_buffer_keeps_columns_aligned():
+    buf = _ColumnBuffer(capacity=2)
+    buf.extend(_columns(_events(0, 3)), 3)  # grows past the initial capacity
+    assert len(buf) == 3
+
+    oldest = buf.pop_oldest(2)
+    assert oldest[_IDX_CONTENT] == _ids(0, 2)
+    assert oldest[0] == ["page_view"] * 2
+
+    buf.prepend(_columns(_events(10, 12)))
+    buf.extend(_columns(_events(3, 4)), 1)
+    out = buf.take()
+
+    assert all(len(col) == 4 for col in out)
+    assert out[_IDX_CONTENT] == ["c10", "c11", "c2", "c3"]
+    assert len(buf) == 0
+    assert buf.pop_oldest(5) == [[] for _ in _COLUMNS]
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (None, 0),
+        (True, 0),
+        ("", 0),
+        ("abc", 0),
+        (float("inf"), 0),
+        ([], 0),
+        (-5, 0),
+        (42.9, 42),
+        ("17", 17),
+        ("3.5", 3),
+        (250, 100),
+    ],
+)
+def test_as_uint_clamps_to_the_column_range(value, expected):
+    assert _as_uint(value, 100) == expected
+
+
+def test_normalize_matches_the_row_path_and_lifts_typed_properties():
+    rows = [
+        {
+            "event_type": "article_scroll",
+            "content_id": "a1",
+            "timestamp": "2024-05-01T12:30:15.123Z",
+            "properties": {"depth_percent": 180, "dwell_time_ms": "2500"},
+        },
+        {
+            "event_type": "video_progress",
+            "timestamp": datetime(2024, 5, 1, tzinfo=timezone.utc),
+            "properties": {"progress_percent": 50, "watch_time_ms": 9000},
+        },
+        {"event_type": "podcast_progress", "properties": {"listen_time_ms": -1}},
+        {"event_type": "page_view", "timestamp": "2024-05-01T00:00:00+02:00"},
+    ]
+    columns = _normalize(_columns(rows))
+
+    for i, row in enumerate(rows):
+        got = [col[i] for col in columns]
+        expected = _legacy_row(row)
+        if not row.get("timestamp"):
+            # Both paths stamp "now"; only the type is comparable
+            assert isinstance(got[_IDX_TS], datetime)
+            got[_IDX_TS] = expected[_IDX_TS] = None
+        assert got[:len(expected)] == expected
+
+    typed = {col: columns[_COLUMNS.index(col)] for col in _TYPED_PROPERTIES}
+    assert list(typed) == _COLUMNS[-len(_TYPED_PROPERTIES):]
+    assert typed == {
+        "dwell_time_ms": [2500, 0, 0, 0],
+        "scroll_depth": [100, 0, 0, 0],
+        "media_progress": [0, 50, 0, 0],
+        "media_time_ms": [0, 9000, 0, 0],
+    }
+    assert columns[_IDX_TS][0] == datetime(2024, 5, 1, 12, 30, 15, 123000, tzinfo=timezone.utc)
+
+
+def test_normalize_keeps_requeued_rows_and_parses_spilled_ones():
+    columns = _normalize(_columns([{"properties": {"depth_percent": 40}}]))
+    assert _normalize(columns) == columns
+
+    # Spilled by a collector that predates the typed columns
+    legacy = _columns([{"properties": json.dumps({"depth_percent": 40})}, {"timestamp": "nope"}])
+    for col in _TYPED_PROPERTIES:
+        legacy[_COLUMNS.index(col)] = [None, None]
+    legacy = _normalize(legacy)
+    assert legacy[_COLUMNS.index("scroll_depth")] == [40, 0]
+    assert isinstance(legacy[_IDX_TS][1], datetime)
+
+
+@pytest.fixture
+def make_writer(tmp_path, monkeypatch):
+    monkeypatch.setattr(writer, "SPILL_SEGMENT_BYTES", 1 << 20)
+    monkeypatch.setattr(writer, "SPILL_MAX_BYTES", 1 << 20)
+
+    async def make(max_rows, client=None):
+        w = ClickHouseWriter(
+            batch_size=1000, interval=3600, max_rows=max_rows, spill_dir=str(tmp_path)
+        )
+        monkeypatch.setattr(w, "_connect", lambda: setattr(w, "_client", client))
+        await w.start()
+        return w
+
+    return make
+
+
+def test_overflow_spills_oldest_rows_and_keeps_the_bound(make_writer):
+    async def scenario():
+        client = FakeClient()
+        w = await make_writer(max_rows=5, client=client)
+        await w.add_batch(_events(0, 8))
+
+        assert w.buffer_depth == 5
+        assert w.spool.stats()["spilled_rows"] == 3
+
+        assert await w.flush()
+        assert client.content_ids == _ids(0, 8)
+        assert not w.spool.has_pending
+        await w.stop()
+
+    asyncio.run(scenario())
+
+
+def test_failed_flush_requeues_in_order(make_writer):
+    async def scenario():
+        client = FakeClient()
+        client.down = True
+        w = await make_writer(max_rows=4, client=client)
+
+        await w.add_batch(_events(0, 3))
+        assert not await w.flush()
+        assert w.buffer_depth == 3
+
+        await w.add_batch(_events(3, 6))
+        assert not await w.flush()
+        assert w.buffer_depth == 4
+        assert w.spool.stats()["spilled_rows"] == 2
+
+        client.down = False
+        assert await w.flush()
+        assert client.content_ids == _ids(0, 6)
+        await w.stop()
+
+    asyncio.run(scenario())
+
+
+def test_without_a_spool_overflow_is_dropped(make_writer):
+    async def scenario():
+        w = await make_writer(max_rows=3)
+        w._spool = None
+        await w.add_batch(_events(0, 5))
+
+        assert w.buffer_depth == 3
+        assert w.dropped_rows == 2
+        assert w.saturated
+        await w.stop()
+
+    asyncio.run(scenario())
+
+
+def test_saturated_only_when_overflow_has_nowhere_to_go(make_writer, monkeypatch):
+    async def scenario():
+        w = await make_writer(max_rows=2)
+        assert not w.saturated
+        await w.add_batch(_events(0, 2))
+        assert not w.saturated  # overflow would go to the spool
+
+        monkeypatch.setattr(type(w.spool), "full", property(lambda self: True))
+        assert w.saturated
+        await w.stop()
+
+    asyncio.run(scenario())
@@ -3,6 +3,37 @@
 Accumulates rows in an internal buffer and flushes them to ClickHouse
 either when the buffer reaches `FLUSH_BATCH_SIZE` or every
 `FLUSH_INTERVAL_SECONDS`, whichever comes first.
+
+`clickhouse_connect` is a blocking HTTP client, so inserts run on a
+dedicated single-thread executor. Request handlers only append to the
+buffer and wake the flush loop; they never wait on ClickHouse.
+
+While ClickHouse is unavailable at most `BUFFER_MAX_ROWS` rows (plus one
+request's batch) stay in memory. `add_batch` enforces the bound as rows
+arrive: the oldest overflow is spilled to an on-disk spool (see
+`spool.py`) and replayed, in order, ahead of newer rows once inserts
+succeed again. While a flush is in flight the overflow cannot be spilled
+without reordering, so `saturated` turns the next requests away instead.
+
+Each writer instance is self-contained (buffer, flush loop, insert
+thread, spill slot), so running several uvicorn worker processes gives
+each its own shared-nothing writer with its own tuning. At start-up a
+writer also adopts unclaimed slots that still hold spilled rows (left by
+workers that no longer run) and replays them before its own spool.
+
+Rows are accumulated column-wise: one preallocated list per column,
+filled a whole request batch at a time and handed to ClickHouse with
+`column_oriented=True`. Per-row normalisation (JSON-encoding
+`properties`, parsing timestamps) happens at flush time on the executor
+thread rather than on the request path.
+
+Well-known numeric properties (dwell time, scroll depth, media progress)
+are lifted out of `properties` into typed columns during normalisation,
+so ClickHouse aggregations never have to parse the JSON string. On
+connect the writer reads `system.columns` and only inserts columns that
+`events` actually has, so it keeps working against a ClickHouse that has
+not run `migrations/002_typed_properties.sh` yet (the migration's DEFAULTs
+backfill those rows on read). Restart the collector after migrating.
 """
 
 from __future__ import annotations
@@ -10,12 +41,16 @@ from __future__ import annotations
 import asyncio
 import json
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from typing import Any
 
 import clickhouse_connect
 
+import metrics
 from config import (
+    BUFFER_MAX_ROWS,
     CLICKHOUSE_DB,
     CLICKHOUSE_HOST,
     CLICKHOUSE_PASSWORD,
@@ -23,7 +58,11 @@ from config import (
     CLICKHOUSE_USER,
     FLUSH_BATCH_SIZE,
     FLUSH_INTERVAL_SECONDS,
+    SPILL_DIR,
+    SPILL_MAX_BYTES,
+    SPILL_SEGMENT_BYTES,
 )
+from spool import SpillSlot, SpillSpool
 
 logger = logging.getLogger("collector.writer")
 
@@ -43,22 +82,336 @@ _COLUMNS = [
     "country",
     "city",
     "referrer",
+    "dwell_time_ms",
+    "scroll_depth",
+    "media_progress",
+    "media_time_ms",
+]
+_IDX_TS = _COLUMNS.index("timestamp")
+_IDX_PROPS = _COLUMNS.index("properties")
+
+# Typed column → (property keys to read, upper bound of the column type)
+_TYPED_PROPERTIES = {
+    "dwell_time_ms": (("dwell_time_ms",), 2**32 - 1),
+    "scroll_depth": (("depth_percent",), 100),
+    "media_progress": (("progress_percent",), 100),
+    "media_time_ms": (("watch_time_ms", "listen_time_ms"), 2**32 - 1),
+}
+_TYPED_INDEXES = [
+    (_COLUMNS.index(col), keys, limit) for col, (keys, limit) in _TYPED_PROPERTIES.items()
 ]
 
 
+class _ColumnBuffer:
+    """Column-oriented row accumulator backed by preallocated lists.
+
+    Not thread-safe; only touched from the event loop. None of the
+    methods await, so no lock is needed around them.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self._initial = max(1, capacity)
+        self._reset()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def extend(self, columns: list[list[Any]], n: int) -> None:
+        """Append `n` rows given as one list per column."""
+        end = self._size + n
+        self._reserve(end)
+        for col, values in zip(self._cols, columns):
+            col[self._size:end] = values
+        self._size = end
+
+    def prepend(self, columns: list[list[Any]]) -> None:
+        """Put rows (e.g. a failed batch) back in front of the buffer."""
+        n = len(columns[0]) if columns else 0
+        if not n:
+            return
+        size = self._size
+        self._cols = [values + col[:size] for values, col in zip(columns, self._cols)]
+        self._size = size + n
+        self._capacity = self._size
+
+    def pop_oldest(self, n: int) -> list[list[Any]]:
+        """Remove and return the oldest `n` rows, column-wise."""
+        n = min(n, self._size)
+        out = [col[:n] for col in self._cols]
+        self._cols = [col[n:self._size] for col in self._cols]
+        self._size -= n
+        self._capacity = self._size
+        return out
+
+    def take(self) -> list[list[Any]]:
+        """Return all rows column-wise and start over with fresh arrays."""
+        out = [col[:self._size] for col in self._cols]
+        self._reset()
+        return out
+
+    def _reserve(self, needed: int) -> None:
+        if needed <= self._capacity:
+            return
+        grow = max(needed, self._capacity * 2) - self._capacity
+        for col in self._cols:
+            col.extend([None] * grow)
+        self._capacity += grow
+
+    def _reset(self) -> None:
+        self._capacity = self._initial
+        self._cols: list[list[Any]] = [[None] * self._capacity for _ in _COLUMNS]
+        self._size = 0
+
+
+def _as_uint(value: Any, limit: int) -> int:
+    """Best-effort non-negative int for a typed column; 0 when unusable."""
+    if isinstance(value, bool) or value is None:
+        return 0
+    try:
+        number = int(float(value))
+    except (TypeError, ValueError, OverflowError):
+        return 0
+    return min(max(number, 0), limit)
+
+
+def _lift_properties(props: dict) -> list[int]:
+    """Typed column values (in `_TYPED_INDEXES` order) read from `props`."""
+    values = []
+    for _, keys, limit in _TYPED_INDEXES:
+        raw = next((props[k] for k in keys if k in props), None)
+        values.append(_as_uint(raw, limit))
+    return values
+
+
+def _normalize(columns: list[list[Any]]) -> list[list[Any]]:
+    """Coerce `properties` to JSON text and `timestamp` to datetime, in place.
+
+    Also fills the typed property columns. Rows that were already
+    normalised (a requeued batch) keep their values; rows with string
+    properties and no typed values (e.g. spilled by an older collector)
+    are parsed once here.
+    """
+    props = columns[_IDX_PROPS]
+    typed = [columns[idx] for idx, _, _ in _TYPED_INDEXES]
+    for i, value in enumerate(props):
+        if isinstance(value, dict):
+            lifted = _lift_properties(value)
+            props[i] = json.dumps(value) if value else "{}"
+        elif not value:
+            lifted = [0] * len(typed)
+            props[i] = "{}"
+        elif typed[0][i] in (None, ""):
+            try:
+                parsed = json.loads(value)
+            except ValueError:
+                parsed = None
+            lifted = _lift_properties(parsed) if isinstance(parsed, dict) else [0] * len(typed)
+        else:
+            continue
+        for col, v in zip(typed, lifted):
+            col[i] = v
+
+    stamps = columns[_IDX_TS]
+    for i, ts in enumerate(stamps):
+        if isinstance(ts, str):
+            try:
+                stamps[i] = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+            except ValueError:
+                stamps[i] = datetime.now(timezone.utc)
+        elif not ts:
+            stamps[i] = datetime.now(timezone.utc)
+    return columns
+
+
 class ClickHouseWriter:
     """Buffered ClickHouse batch writer."""
 
-    def __init__(self) -> None:
-        self._buffer: list[list[Any]] = []
-        self._lock = asyncio.Lock()
+    def __init__(
+        self,
+        batch_size: int = FLUSH_BATCH_SIZE,
+        interval: float = FLUSH_INTERVAL_SECONDS,
+        max_rows: int = BUFFER_MAX_ROWS,
+        spill_dir: str = SPILL_DIR,
+    ) -> None:
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_rows = max_rows
+        self._spill_base = spill_dir
+        self._spill_slot = None
+        self._buffer = _ColumnBuffer(batch_size)
         self._client = None
         self._flush_task: asyncio.Task | None = None
+        # Wakes the flush loop early once the buffer reaches batch_size
+        self._flush_needed = asyncio.Event()
+        # Serialises flushes so batches reach ClickHouse in order
+        self._flush_lock = asyncio.Lock()
+        # One thread: inserts are sequential and never touch the event loop
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="clickhouse-insert"
+        )
+        self._spool: SpillSpool | None = None
+        # Unclaimed slots with leftover rows, replayed then released
+        self._orphans: list[tuple[SpillSlot, SpillSpool]] = []
+        self._dropped_rows = 0
+        self._connect_failures = 0
+        # Positions in _COLUMNS that the events table has (all until checked)
+        self._insert_indexes = list(range(len(_COLUMNS)))
 
     # ── lifecycle ──────────────────────────────────────────────────────
 
     async def start(self) -> None:
         """Connect to ClickHouse and start the periodic flush loop."""
+        if self._spill_base:
+            try:
+                # Worker processes must not share segment files
+                self._spill_slot = SpillSlot.claim(self._spill_base)
+                self._spool = SpillSpool(
+                    self._spill_slot.path, SPILL_SEGMENT_BYTES, SPILL_MAX_BYTES
+                )
+            except OSError:
+                logger.exception(
+                    "Could not open spill directory %s — spilling disabled", self._spill_base
+                )
+            else:
+                self._adopt_orphans()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._connect)
+        self._flush_task = asyncio.create_task(self._periodic_flush())
+
+    async def stop(self) -> None:
+        """Flush remaining events and close the connection."""
+        if self._flush_task:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+        # Anything still in memory goes to disk rather than being lost
+        if len(self._buffer):
+            await self._spill(self._buffer.take())
+        self._executor.shutdown(wait=True)
+        for slot, _ in self._orphans:
+            slot.release()
+        self._orphans = []
+        if self._spill_slot:
+            self._spill_slot.release()
+        if self._client:
+            self._client.close()
+            logger.info("ClickHouse connection closed")
+
+    # ── public API ─────────────────────────────────────────────────────
+
+    @property
+    def saturated(self) -> bool:
+        """True when the buffer is full and overflow has nowhere to go right now.
+
+        That is: spilling is off or the spool is full, or a flush is in
+        flight (overflow is spilled once it finishes).
+        """
+        if len(self._buffer) < self.max_rows:
+            return False
+        return self._spool is None or self._spool.full or self._flush_lock.locked()
+
+    @property
+    def buffer_depth(self) -> int:
+        return len(self._buffer)
+
+    @property
+    def spool(self) -> SpillSpool | None:
+        return self._spool
+
+    @property
+    def dropped_rows(self) -> int:
+        return self._dropped_rows
+
+    def stats(self) -> dict:
+        """Buffer depth, spill and replay counters."""
+        return {
+            "connected": self._client is not None,
+            "buffer_depth": len(self._buffer),
+            "buffer_max_rows": self.max_rows,
+            "batch_size": self.batch_size,
+            "interval_seconds": self.interval,
+            "dropped_rows": self._dropped_rows,
+            "spill": self._spool.stats() if self._spool else None,
+            "adopted_spill_slots": {
+                slot.path: spool.pending_bytes for slot, spool in self._orphans
+            },
+        }
+
+    async def add(self, row: dict) -> None:
+        """Add a single enriched event row to the buffer."""
+        await self.add_batch([row])
+
+    async def add_batch(self, rows: list[dict]) -> None:
+        """Add a request's worth of enriched event rows in one step."""
+        n = len(rows)
+        if not n:
+            return
+        columns = [[row.get(col, "") for row in rows] for col in _COLUMNS]
+        # Missing timestamps mean "received now", not "flushed later"
+        now = datetime.now(timezone.utc)
+        stamps = columns[_IDX_TS]
+        for i, ts in enumerate(stamps):
+            if not ts:
+                stamps[i] = now
+        self._buffer.extend(columns, n)
+
+        if len(self._buffer) > self.max_rows and not self._flush_lock.locked():
+            # Nothing older is in flight, so the oldest buffered rows are
+            # the next ones due and can go to the spool without reordering
+            async with self._flush_lock:
+                await self._requeue()
+
+        if len(self._buffer) >= self.batch_size:
+            # Hand off to the flush loop instead of awaiting the insert here
+            self._flush_needed.set()
+
+    async def flush(self) -> bool:
+        """Write the current buffer to ClickHouse.
+
+        The insert itself runs on the writer's executor thread; the event
+        loop stays free to accept new events while a batch is in flight.
+        Returns False if ClickHouse could not be reached.
+        """
+        async with self._flush_lock:
+            batch = self._buffer.take()
+            count = len(batch[0])
+            pending_spill = bool(self._orphans) or (
+                self._spool is not None and self._spool.has_pending
+            )
+            if not count and not pending_spill:
+                return True
+
+            loop = asyncio.get_running_loop()
+            if not self._client:
+                await loop.run_in_executor(self._executor, self._connect)
+            if not self._client:
+                metrics.flush_retries.inc(reason="unreachable")
+                await self._requeue(batch)
+                return False
+
+            try:
+                if pending_spill:
+                    # Spilled rows are older than anything in memory
+                    replayed = await loop.run_in_executor(self._executor, self._replay_spools)
+                    if replayed:
+                        logger.info("Replayed %d spilled events to ClickHouse", replayed)
+                if count:
+                    await loop.run_in_executor(self._executor, self._insert, batch)
+                    logger.info("Flushed %d events to ClickHouse", count)
+            except Exception:
+                logger.exception("Failed to flush %d events", count)
+                metrics.flush_retries.inc(reason="insert_failed")
+                await self._requeue(batch)
+                return False
+            return True
+
+    # ── internal ───────────────────────────────────────────────────────
+
+    def _connect(self) -> None:
+        """Blocking connect; runs on the executor thread."""
         try:
             self._client = clickhouse_connect.get_client(
                 host=CLICKHOUSE_HOST,
@@ -73,86 +426,147 @@ class ClickHouseWriter:
                 CLICKHOUSE_PORT,
                 CLICKHOUSE_DB,
             )
+            self._connect_failures = 0
+            self._check_columns()
         except Exception:
-            logger.warning(
-                "Could not connect to ClickHouse at %s:%s — events will be buffered and dropped",
+            # Warn once per outage; retries happen every flush interval
+            log = logger.warning if self._connect_failures == 0 else logger.debug
+            log(
+                "Could not connect to ClickHouse at %s:%s — events will be buffered until it is reachable",
                 CLICKHOUSE_HOST,
                 CLICKHOUSE_PORT,
             )
+            self._connect_failures += 1
             self._client = None
-        self._flush_task = asyncio.create_task(self._periodic_flush())
-
-    async def stop(self) -> None:
-        """Flush remaining events and close the connection."""
-        if self._flush_task:
-            self._flush_task.cancel()
-            try:
-                await self._flush_task
-            except asyncio.CancelledError:
-                pass
-        await self.flush()
-        if self._client:
-            self._client.close()
-            logger.info("ClickHouse connection closed")
 
-    # ── public API ─────────────────────────────────────────────────────
+    def _check_columns(self) -> None:
+        """Restrict inserts to the columns `events` has; runs on the executor thread."""
+        try:
+            result = self._client.query(
+                "SELECT name FROM system.columns WHERE database = {db:String} AND table = 'events'",
+                parameters={"db": CLICKHOUSE_DB},
+            )
+        except Exception:
+            logger.warning("Could not read events columns — inserting all of them", exc_info=True)
+            return
+        present = {row[0] for row in result.result_rows}
+        if not present:
+            return
+        self._insert_indexes = [i for i, col in enumerate(_COLUMNS) if col in present]
+        missing = [col for col in _COLUMNS if col not in present]
+        if missing:
+            logger.warning(
+                "events has no %s column(s) — inserting without them; "
+                "apply wapow-app/migrations/002_typed_properties.sh and restart the collector",
+                ", ".join(missing),
+            )
 
-    async def add(self, row: dict) -> None:
-        """Add a single enriched event row to the buffer."""
-        ordered = [row.get(col, "") for col in _COLUMNS]
-        # Serialize properties dict → JSON string
-        idx_props = _COLUMNS.index("properties")
-        if isinstance(ordered[idx_props], dict):
-            ordered[idx_props] = json.dumps(ordered[idx_props])
-        elif not ordered[idx_props]:
-            ordered[idx_props] = "{}"
-
-        # Ensure timestamp is a datetime
-        idx_ts = _COLUMNS.index("timestamp")
-        ts = ordered[idx_ts]
-        if isinstance(ts, str) and ts:
+    def _adopt_orphans(self) -> None:
+        """Take over unclaimed spill slots that still hold rows."""
+        try:
+            slots = SpillSlot.adopt_orphans(self._spill_base, self._spill_slot)
+        except OSError:
+            logger.exception("Could not scan %s for unclaimed spill slots", self._spill_base)
+            return
+        for slot in slots:
             try:
-                ordered[idx_ts] = datetime.fromisoformat(ts.replace("Z", "+00:00"))
-            except ValueError:
-                ordered[idx_ts] = datetime.now(timezone.utc)
-        elif not ts:
-            ordered[idx_ts] = datetime.now(timezone.utc)
+                spool = SpillSpool(slot.path, SPILL_SEGMENT_BYTES, SPILL_MAX_BYTES)
+            except OSError:
+                logger.exception("Could not open unclaimed spill slot %s", slot.path)
+                slot.release()
+                continue
+            if not spool.has_pending:
+                slot.release()
+                continue
+            logger.warning(
+                "Adopted unclaimed spill slot %s (%d bytes pending) — will replay it",
+                slot.path,
+                spool.pending_bytes,
+            )
+            self._orphans.append((slot, spool))
 
-        async with self._lock:
-            self._buffer.append(ordered)
+    def _replay_spools(self) -> int:
+        """Replay adopted slots, then our own spool; runs on the executor thread."""
+        replayed = 0
+        while self._orphans:
+            slot, spool = self._orphans[0]
+            replayed += spool.replay(self._insert_spilled, self.batch_size)
+            # replay() raises on failure, so reaching here means it drained
+            self._orphans.pop(0)
+            slot.release()
+            logger.info("Finished replaying adopted spill slot %s", slot.path)
+        if self._spool is not None and self._spool.has_pending:
+            replayed += self._spool.replay(self._insert_spilled, self.batch_size)
+        return replayed
 
-        if len(self._buffer) >= FLUSH_BATCH_SIZE:
-            await self.flush()
+    def _insert_spilled(self, rows: list[list[Any]]) -> None:
+        """Insert rows read back from the spool (stored row-wise as JSON)."""
+        width = len(_COLUMNS)
+        # Segments written before the typed columns existed have shorter rows
+        rows = [row + [None] * (width - len(row)) if len(row) < width else row for row in rows]
+        self._insert([list(col) for col in zip(*rows)])
 
-    async def flush(self) -> None:
-        """Write the current buffer to ClickHouse."""
-        async with self._lock:
-            if not self._buffer:
-                return
-            batch = self._buffer[:]
-            self._buffer.clear()
+    async def _requeue(self, batch: list[list[Any]] | None = None) -> None:
+        """Put a failed batch back in front of the buffer, spilling overflow."""
+        if batch:
+            self._buffer.prepend(batch)
+        overflow = len(self._buffer) - self.max_rows
+        if overflow <= 0:
+            return
+        # Oldest rows leave memory first so the spool stays in order
+        await self._spill(self._buffer.pop_oldest(overflow))
 
-        if not self._client:
-            logger.warning("Cannot flush — no ClickHouse client")
+    async def _spill(self, columns: list[list[Any]]) -> None:
+        """Move rows to the on-disk spool, or drop them if spilling is off."""
+        count = len(columns[0]) if columns else 0
+        if not count:
+            return
+        if self._spool is None:
+            self._dropped_rows += count
+            logger.error("Buffer full and spilling disabled — dropped %d events", count)
             return
+        rows = [list(row) for row in zip(*columns)]
+        first = not self._spool.has_pending
+        loop = asyncio.get_running_loop()
+        written = await loop.run_in_executor(self._executor, self._spool.append, rows)
+        if written:
+            # Spills happen per request during an outage; warn once, count the rest
+            log = logger.warning if first else logger.debug
+            log("Spilled %d events to %s", written, self._spill_slot.path)
 
+    def _insert(self, columns: list[list[Any]]) -> None:
+        """Blocking column-oriented insert; runs on the executor thread."""
+        started = time.perf_counter()
+        columns = _normalize(columns)
+        indexes = self._insert_indexes
         try:
             self._client.insert(
                 "events",
-                batch,
-                column_names=_COLUMNS,
+                [columns[i] for i in indexes],
+                column_names=[_COLUMNS[i] for i in indexes],
+                column_oriented=True,
             )
-            logger.info("Flushed %d events to ClickHouse", len(batch))
         except Exception:
-            logger.exception("Failed to flush %d events", len(batch))
-            # Put them back so we retry next flush
-            async with self._lock:
-                self._buffer = batch + self._buffer
-
-    # ── internal ───────────────────────────────────────────────────────
+            metrics.flush_duration.observe(time.perf_counter() - started, result="error")
+            raise
+        metrics.flush_duration.observe(time.perf_counter() - started, result="ok")
+        metrics.rows_per_insert.observe(len(columns[0]))
 
     async def _periodic_flush(self) -> None:
-        """Periodically flush the buffer."""
+        """Flush every `interval` seconds, or sooner when the buffer fills."""
+        loop = asyncio.get_running_loop()
+        retry_at = 0.0
         while True:
-            await asyncio.sleep(FLUSH_INTERVAL_SECONDS)
-            await self.flush()
+            try:
+                await asyncio.wait_for(
+                    self._flush_needed.wait(), timeout=self.interval
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._flush_needed.clear()
+            if loop.time() < retry_at:
+                # ClickHouse is down: keep memory bounded without hammering it
+                await self._requeue()
+                continue
+            if not await self.flush():
+                retry_at = loop.time() + self.interval